@@ -1,16 +1,841 @@
 import sqlite3
 import sys
-import csv
 import os
 import re
+import time
+import json
+from array import array
+from collections import deque
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QTabWidget, QTreeWidget, QTreeWidgetItem, QTableWidget,
     QTableWidgetItem, QComboBox, QFileDialog, QMessageBox, QHeaderView,
-    QLineEdit, QScrollArea, QDialog
+    QLineEdit, QScrollArea, QDialog, QGridLayout, QProgressDialog,
+    QTableView, QPlainTextEdit, QSplitter, QStyledItemDelegate, QAbstractItemView, QStyleOptionViewItem
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QKeySequence, QShortcut, QFontDatabase, QPalette
 from PyQt6.QtWidgets import QMessageBox as QMessageBoxWidget
+import sqlite_profiles
+import sqlite_diagnostics
+import sqlite_core
+import sqlite_connections
+
+
+# Queries slower than this are flagged by the index advisor
+SLOW_QUERY_MS = 50
+# Rows fetched from a SQL console result each time the grid scrolls near the end
+CONSOLE_FETCH_SIZE = 500
+CONSOLE_HISTORY_SIZE = 100
+# How often to check whether another connection or process changed the database
+CHANGE_POLL_MS = 1000
+# Bytes shown per page in the cell viewer
+VIEWER_PAGE_BYTES = 4096
+# Memory budget for recently browsed tables and searches kept for instant switching
+PAGE_CACHE_MB = int(os.environ.get("SQLITE_EDITOR_CACHE_MB", "256"))
+# Longest text drawn in a browse grid cell; the cell editor and viewer show all of it
+CELL_DISPLAY_CHARS = 200
+# Bulk Edit operations: (menu label, label of the first input, label of the second);
+# None hides an input
+BULK_OPERATION_LABELS = {
+    "replace": ("Replace text", "Find:", "Replace with:"),
+    "regex": ("Replace regular expression", "Pattern:", "Replace with (\\1 for groups):"),
+    "fill-down": ("Fill empty cells down", None, None),
+    "set": ("Set to value", None, "Value:"),
+    "null": ("Set to NULL", None, None),
+    "expression": ("Set to SQL expression", "Expression:", None),
+}
+
+
+class MaintenanceWorker(QThread):
+    # Runs a maintenance task on its own connection. total is 0 while the size of the
+    # work is unknown (a single ANALYZE or VACUUM statement).
+    progress = pyqtSignal(int, int, str)
+    succeeded = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_path, task, target_path=None, profile_name=sqlite_profiles.DEFAULT_PROFILE):
+        super().__init__()
+        self.db_path = db_path
+        self.profile_name = profile_name
+        self.task = task
+        self.target_path = target_path
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        conn = sqlite_profiles.connect(self.db_path, self.profile_name, isolation_level=None)
+        start = time.perf_counter()
+
+        def on_progress():
+            self.progress.emit(0, 0, f"Working... {time.perf_counter() - start:.1f} s elapsed")
+            return 1 if self.cancelled else 0
+
+        conn.set_progress_handler(on_progress, 500000)
+        op = sqlite_diagnostics.start_operation("maintenance", task=self.task)
+        try:
+            message = getattr(self, f"run_{self.task}")(conn)
+            if self.task != "vacuum_into":
+                # In WAL mode the main file only shrinks once the log is checkpointed
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            op.finish()
+            self.succeeded.emit(f"{message} ({time.perf_counter() - start:.1f} s)")
+        except sqlite3.OperationalError as e:
+            op.finish(error=str(e))
+            self.failed.emit("Cancelled." if self.cancelled else str(e))
+        except Exception as e:
+            op.finish(error=str(e))
+            self.failed.emit(str(e))
+        finally:
+            conn.close()
+
+    def run_analyze(self, conn):
+        conn.execute("ANALYZE")
+        return "Statistics updated for all tables and indexes"
+
+    def run_optimize(self, conn):
+        conn.execute("PRAGMA optimize")
+        return "PRAGMA optimize completed"
+
+    def run_vacuum(self, conn):
+        conn.execute("VACUUM")
+        return "Database rebuilt and compacted"
+
+    def run_vacuum_into(self, conn):
+        conn.execute("VACUUM INTO ?", (self.target_path,))
+        return f"Compacted copy written to {self.target_path}"
+
+    def run_enable_incremental(self, conn):
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # Changing auto_vacuum on an existing database only takes effect after a VACUUM
+        conn.execute("VACUUM")
+        return "Database converted to incremental auto-vacuum"
+
+    def run_incremental_vacuum(self, conn):
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            raise ValueError("Incremental vacuum requires auto_vacuum=INCREMENTAL. Convert the database first.")
+        total = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        remaining = total
+        while remaining:
+            if self.cancelled:
+                return f"Stopped after releasing {total - remaining:,} of {total:,} free pages"
+            conn.execute("PRAGMA incremental_vacuum(1024)").fetchall()
+            remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            self.progress.emit(total - remaining, total, f"Released {total - remaining:,} of {total:,} free pages")
+        return f"Released {total:,} free pages"
+
+
+class SortableItem(QTableWidgetItem):
+    # Shows formatted text but sorts on the raw number stored in UserRole
+    def __init__(self, text, sort_value):
+        super().__init__(text)
+        self.setData(Qt.ItemDataRole.UserRole, sort_value)
+        self.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+
+    def __lt__(self, other):
+        mine = self.data(Qt.ItemDataRole.UserRole)
+        theirs = other.data(Qt.ItemDataRole.UserRole)
+        return (mine if mine is not None else -1) < (theirs if theirs is not None else -1)
+
+
+class StorageWorker(QThread):
+    # Collects per-table and per-index storage figures on a pooled reader connection
+    results = pyqtSignal(list, str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, connections):
+        super().__init__()
+        self.connections = connections
+
+    def run(self):
+        try:
+            with self.connections.reader() as conn:
+                self.collect(conn)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def collect(self, conn):
+        objects = {row[0]: (row[1], row[2]) for row in conn.execute(
+            "SELECT name, type, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')")}
+        try:
+            rows = self.from_dbstat(conn, objects)
+            source = "dbstat"
+        except sqlite3.OperationalError:
+            # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+            rows = self.estimate(conn, objects)
+            source = "estimate"
+        self.results.emit(rows, source)
+
+    def from_dbstat(self, conn, objects):
+        rows = []
+        for name, pages, size, payload, unused, overflow, leaf_cells, all_cells in conn.execute(
+                "SELECT name, count(*), sum(pgsize), sum(payload), sum(unused), sum(pagetype = 'overflow'), "
+                "sum(CASE WHEN pagetype = 'leaf' THEN ncell ELSE 0 END), sum(ncell) "
+                "FROM dbstat GROUP BY name"):
+            obj_type, table = objects.get(name, ("table", name))
+            # Index b-trees keep entries in interior pages too; table b-trees only in leaves
+            entries = all_cells if obj_type == "index" else leaf_cells
+            rows.append({
+                "name": name, "type": obj_type, "table": table, "rows": entries, "pages": pages,
+                "size": size, "payload": payload, "unused": unused, "overflow": overflow,
+                "avg_row": payload / entries if entries else 0,
+            })
+        return rows
+
+    def estimate(self, conn, objects):
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        rows = []
+        for name, (obj_type, table) in objects.items():
+            escaped_table = table.replace('"', '""')
+            if obj_type == "index":
+                escaped_name = name.replace('"', '""')
+                columns = [col[2] for col in conn.execute(f'PRAGMA index_info("{escaped_name}")') if col[2]]
+            else:
+                escaped_name = escaped_table
+                columns = [col[1] for col in conn.execute(f'PRAGMA table_info("{escaped_table}")')]
+            count = conn.execute(f'SELECT count(*) FROM "{escaped_table}"').fetchone()[0]
+            lengths = " + ".join(f'ifnull(length("{col.replace(chr(34), chr(34) * 2)}"), 0)' for col in columns) or "0"
+            avg_row = conn.execute(
+                f'SELECT avg({lengths}) FROM (SELECT * FROM "{escaped_table}" LIMIT 1000)').fetchone()[0] or 0
+            if obj_type == "index":
+                avg_row += 8  # rowid stored with every index entry
+            payload = int(avg_row * count)
+            # Assume pages are about 80% full, as b-tree pages typically are after random inserts
+            pages = max(1, int(payload / (page_size * 0.8)) + 1)
+            rows.append({
+                "name": name, "type": obj_type, "table": table, "rows": count, "pages": pages,
+                "size": pages * page_size, "payload": payload, "unused": None, "overflow": None,
+                "avg_row": avg_row,
+            })
+        return rows
+
+
+class ProfileWorker(QThread):
+    # Profiles every column of a table in one scan on a pooled reader connection
+    progress = pyqtSignal(str)
+    results = pyqtSignal(list, float)
+    failed = pyqtSignal(str)
+
+    def __init__(self, connections, table_name):
+        super().__init__()
+        self.connections = connections
+        self.table_name = table_name
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        start = time.perf_counter()
+
+        def on_progress():
+            self.progress.emit(f"Scanning {self.table_name}... {time.perf_counter() - start:.1f} s elapsed")
+            return 1 if self.cancelled else 0
+
+        op = sqlite_diagnostics.start_operation("profile", table=self.table_name)
+        try:
+            with self.connections.reader() as conn:
+                conn.set_progress_handler(on_progress, 500000)
+                try:
+                    profiles = sqlite_core.profile_table(conn, self.table_name)
+                finally:
+                    conn.set_progress_handler(None, 0)
+            op.finish(rows=profiles[0]["rows"] if profiles else 0)
+            self.results.emit(profiles, time.perf_counter() - start)
+        except Exception as e:
+            op.finish(error=str(e))
+            self.failed.emit("Cancelled." if self.cancelled else str(e))
+
+
+class ImportWorker(QThread):
+    # Imports a CSV on the writer connection so the grid can keep browsing through the
+    # reader pool until the import commits
+    progress = pyqtSignal(int)
+    succeeded = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, connections, table_name, file_path):
+        super().__init__()
+        self.connections = connections
+        self.table_name = table_name
+        self.file_path = file_path
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        op = sqlite_diagnostics.start_operation("import", table=self.table_name, path=self.file_path)
+        try:
+            with self.connections.writing(wait=True) as conn:
+                count = sqlite_core.import_csv(conn, self.table_name, self.file_path,
+                                               progress=self.progress.emit, cancelled=lambda: self.cancelled)
+            op.finish(rows=count)
+            self.succeeded.emit(count)
+        except sqlite_core.ImportCancelled:
+            op.finish(error="Cancelled")
+            self.failed.emit("Cancelled.")
+        except Exception as e:
+            op.finish(error=str(e))
+            self.failed.emit(str(e))
+
+
+class CellViewer(QDialog):
+    # Pages through one BLOB or long TEXT value without loading it whole, and streams it
+    # to or from a file
+    def __init__(self, editor, row, column):
+        super().__init__(editor)
+        self.editor = editor
+        self.row = row
+        self.table_name = editor.current_table
+        self.column = editor.grid_model.columns[column]
+        self.key_columns = editor.key_columns
+        self.key = editor.row_key(row)
+        self.page = 0
+        self.setWindowTitle(f"{self.table_name}.{self.column}")
+        self.setGeometry(250, 250, 760, 520)
+
+        layout = QVBoxLayout(self)
+        top = QHBoxLayout()
+        self.info_label = QLabel()
+        top.addWidget(self.info_label)
+        top.addStretch()
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(["Hex", "Text"])
+        self.mode_combo.currentIndexChanged.connect(self.show_page)
+        top.addWidget(self.mode_combo)
+        layout.addLayout(top)
+
+        self.view = QPlainTextEdit()
+        self.view.setReadOnly(True)
+        self.view.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        layout.addWidget(self.view)
+
+        buttons = QHBoxLayout()
+        self.prev_btn = QPushButton("< Previous")
+        self.prev_btn.clicked.connect(lambda: self.go_to(self.page - 1))
+        buttons.addWidget(self.prev_btn)
+        self.page_label = QLabel()
+        buttons.addWidget(self.page_label)
+        self.next_btn = QPushButton("Next >")
+        self.next_btn.clicked.connect(lambda: self.go_to(self.page + 1))
+        buttons.addWidget(self.next_btn)
+        buttons.addStretch()
+        export_btn = QPushButton("Export to File...")
+        export_btn.clicked.connect(self.export_value)
+        buttons.addWidget(export_btn)
+        import_btn = QPushButton("Import from File...")
+        import_btn.clicked.connect(self.import_value)
+        import_btn.setEnabled(not editor.read_only)
+        buttons.addWidget(import_btn)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+        self.load_value()
+
+    def load_value(self):
+        with self.editor.connections.reader() as conn:
+            self.reader = sqlite_core.CellReader(conn, self.table_name, self.column, self.key_columns, self.key)
+        self.info_label.setText(f"{self.reader.kind.upper()}, {sqlite_core.format_bytes(self.reader.length)}")
+        if self.reader.kind == "text":
+            self.mode_combo.setCurrentText("Text")
+        self.go_to(0)
+
+    def page_count(self):
+        return max(1, -(-self.reader.length // VIEWER_PAGE_BYTES))
+
+    def go_to(self, page):
+        self.page = max(0, min(page, self.page_count() - 1))
+        self.show_page()
+
+    def show_page(self):
+        offset = self.page * VIEWER_PAGE_BYTES
+        with self.editor.connections.reader() as conn:
+            data = self.reader.read(offset, VIEWER_PAGE_BYTES, conn)
+        if self.mode_combo.currentText() == "Hex":
+            lines = []
+            for start in range(0, len(data), 16):
+                chunk = data[start:start + 16]
+                text = "".join(chr(b) if 32 <= b < 127 else "." for b in chunk)
+                lines.append(f"{offset + start:08x}  {chunk.hex(' '):<47}  {text}")
+            self.view.setPlainText("\n".join(lines))
+        else:
+            self.view.setPlainText(data.decode("utf-8", errors="replace"))
+        self.page_label.setText(f"Page {self.page + 1:,} of {self.page_count():,}")
+        self.prev_btn.setEnabled(self.page > 0)
+        self.next_btn.setEnabled(self.page < self.page_count() - 1)
+
+    def export_value(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Cell", "", "All files (*)")
+        if not file_path:
+            return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            with self.editor.connections.reader() as conn:
+                size = sqlite_core.export_cell(conn, self.table_name, self.column, self.key_columns, self.key, file_path)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, "Error", f"Export failed: {str(e)}")
+            return
+        QApplication.restoreOverrideCursor()
+        QMessageBox.information(self, "Success", f"Exported {sqlite_core.format_bytes(size)}")
+
+    def import_value(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Import Cell", "", "All files (*)")
+        if not file_path:
+            return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            with self.editor.connections.writing() as conn:
+                size = sqlite_core.import_cell(conn, self.table_name, self.column, self.key_columns, self.key, file_path)
+            self.editor.table_written(self.table_name)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, "Error", f"Import failed: {str(e)}")
+            return
+        QApplication.restoreOverrideCursor()
+        if self.editor.current_table == self.table_name:
+            self.editor.refresh_rows([self.row])
+        self.load_value()
+        QMessageBox.information(self, "Success", f"Imported {sqlite_core.format_bytes(size)}")
+
+
+def split_sql_statements(text):
+    # Splits on semicolons, keeping ones inside literals, comments and trigger bodies
+    statements = []
+    buffer = ""
+    for piece in text.split(";"):
+        buffer += piece + ";"
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip(" \t\r\n;"):
+                statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip(" \t\r\n;"):
+        statements.append(buffer.strip().rstrip(";"))
+    return statements
+
+
+class SqlConsoleWorker(QThread):
+    # Runs console statements on the editor's console connection. Only the last
+    # statement's rows are kept open for the grid; earlier result sets are counted.
+    statement_done = pyqtSignal(str, float, int, str)
+    result_ready = pyqtSignal(object, list, list, bool)
+    succeeded = pyqtSignal(bool)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, conn, statements):
+        super().__init__()
+        self.conn = conn
+        self.statements = statements
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        self.conn.interrupt()
+
+    def run(self):
+        schema_changed = False
+        for idx, sql in enumerate(self.statements):
+            if self.cancelled:
+                self.failed.emit(sql, "Cancelled.")
+                return
+            cursor = self.conn.cursor()
+            start = time.perf_counter()
+            try:
+                cursor.execute(sql)
+                if cursor.description is None:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    verb = sql.split(None, 1)[0].upper()
+                    schema_changed = schema_changed or verb in ("CREATE", "DROP", "ALTER")
+                    self.statement_done.emit(sql, elapsed_ms, cursor.rowcount, "")
+                    cursor.close()
+                elif idx < len(self.statements) - 1:
+                    row_count = sum(1 for _ in cursor)
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    self.statement_done.emit(sql, elapsed_ms, row_count, "rows returned (not shown)")
+                    cursor.close()
+                else:
+                    rows = cursor.fetchmany(CONSOLE_FETCH_SIZE)
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    more = len(rows) == CONSOLE_FETCH_SIZE
+                    if not more:
+                        cursor.close()
+                    self.statement_done.emit(sql, elapsed_ms, len(rows), "rows returned" + (" so far" if more else ""))
+                    self.result_ready.emit(cursor if more else None, [d[0] for d in cursor.description], rows, more)
+            except Exception as e:
+                cursor.close()
+                self.failed.emit(sql, "Cancelled." if self.cancelled else str(e))
+                return
+        self.succeeded.emit(schema_changed)
+
+
+class QueryResultModel(QAbstractTableModel):
+    # Read-only grid model that pulls further rows from an open cursor on demand
+    def __init__(self, columns=None, rows=None, cursor=None):
+        super().__init__()
+        self.columns = columns or []
+        self.rows = rows or []
+        self.cursor = cursor
+
+    def close(self):
+        if self.cursor:
+            self.cursor.close()
+            self.cursor = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.columns[section]
+        return section + 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.rows[index.row()][index.column()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if value is None:
+                return "Null"
+            if isinstance(value, bytes):
+                return f"<BLOB {sqlite_core.format_bytes(len(value))}>"
+            return str(value)
+        if role == Qt.ItemDataRole.TextAlignmentRole and isinstance(value, (int, float)):
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.cursor is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.cursor is None:
+            return
+        rows = self.cursor.fetchmany(CONSOLE_FETCH_SIZE)
+        if len(rows) < CONSOLE_FETCH_SIZE:
+            self.close()
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+
+
+class BrowseModel(QAbstractTableModel):
+    # Rows of the browse grid. Loaded rows are read from a RowStore; edited cells, added
+    # rows and removed rows are held until they are saved. Each grid row is a store
+    # position, or a negative id for a row added in the grid. Every unsaved change is
+    # journaled so it can be undone and redone.
+    history_changed = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.columns = []
+        self.numeric = []
+        self.store = None
+        self.rows = array("q")
+        self.edits = {}
+        self.removed = []
+        self.next_new_id = -1
+        self.editable = True
+        self.journal = sqlite_core.EditJournal()
+
+    def set_columns(self, columns, column_types):
+        self.beginResetModel()
+        self.columns = list(columns)
+        self.numeric = [sqlite_core.column_affinity(col_type) in ("INTEGER", "REAL", "NUMERIC")
+                        for col_type in column_types]
+        self.store = None
+        self.rows = array("q")
+        self.edits = {}
+        self.removed = []
+        self.endResetModel()
+        self.clear_history()
+
+    def set_store(self, store):
+        self.beginResetModel()
+        self.store = store
+        self.rows = array("q", range(len(store)))
+        self.edits = {}
+        self.removed = []
+        self.endResetModel()
+        self.clear_history()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.columns[section]
+        return section + 1
+
+    def store_index(self, row):
+        row_id = self.rows[row]
+        return row_id if row_id >= 0 else None
+
+    def value(self, row, column):
+        # What the cell shows: the stored value, or the edited text (empty text saves as NULL)
+        row_id = self.rows[row]
+        edits = self.edits.get(row_id)
+        if edits is not None and column in edits:
+            return edits[column] or None
+        return self.store.value(row_id, column)
+
+    def edit_text(self, row, column):
+        edits = self.edits.get(self.rows[row])
+        if edits is not None and column in edits:
+            return edits[column]
+        return sqlite_core.display_value(self.value(row, column))
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return sqlite_core.display_value(self.value(index.row(), index.column()))
+        if role == Qt.ItemDataRole.EditRole:
+            return self.edit_text(index.row(), index.column())
+        if role == Qt.ItemDataRole.ToolTipRole and isinstance(self.value(index.row(), index.column()), sqlite_core.LazyCell):
+            return "Double-click to open the cell viewer"
+        return None
+
+    READ_ONLY_FLAGS = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+    EDITABLE_FLAGS = READ_ONLY_FLAGS | Qt.ItemFlag.ItemIsEditable
+
+    def flags(self, index):
+        if self.editable and not isinstance(self.value(index.row(), index.column()), sqlite_core.LazyCell):
+            return self.EDITABLE_FLAGS
+        return self.READ_ONLY_FLAGS
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        row_id = self.rows[index.row()]
+        edits = self.edits.setdefault(row_id, {})
+        self.journal.record([("edit", row_id, index.column(), edits.get(index.column()), value)])
+        edits[index.column()] = value
+        self.dataChanged.emit(index, index)
+        self.history_changed.emit()
+        return True
+
+    def edited_rows(self):
+        # (row id, texts) for every added or edited row; texts holds None for unedited cells
+        return [(row_id, [edits.get(column) for column in range(len(self.columns))])
+                for row_id, edits in self.edits.items()]
+
+    def is_edited(self, row):
+        return self.rows[row] in self.edits
+
+    def has_changes(self):
+        return bool(self.edits or self.removed)
+
+    def add_rows(self, rows_texts):
+        # Appends added rows holding the given texts; returns the first one's grid row
+        first = len(self.rows)
+        self.journal.record(self.append_rows(rows_texts))
+        self.history_changed.emit()
+        return first
+
+    def append_rows(self, rows_texts):
+        # One insert for the whole block, so the view updates once; returns the journal ops
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows_texts) - 1)
+        ops = []
+        for texts in rows_texts:
+            row_id = self.next_new_id
+            self.next_new_id -= 1
+            ops.append(("add", row_id, len(self.rows), None, json.dumps(texts)))
+            self.rows.append(row_id)
+            self.edits[row_id] = dict(enumerate(texts))
+        self.endInsertRows()
+        return ops
+
+    def set_cells(self, cells, new_rows=()):
+        # Pasted (row, column, text) cells and any rows appended below them, as one undo step
+        ops = []
+        for row, column, text in cells:
+            row_id = self.rows[row]
+            edits = self.edits.setdefault(row_id, {})
+            ops.append(("edit", row_id, column, edits.get(column), text))
+            edits[column] = text
+        if cells:
+            rows = [cell[0] for cell in cells]
+            columns = [cell[1] for cell in cells]
+            self.dataChanged.emit(self.index(min(rows), min(columns)), self.index(max(rows), max(columns)))
+        if new_rows:
+            ops += self.append_rows(new_rows)
+        self.journal.record(ops)
+        self.history_changed.emit()
+
+    def add_row(self):
+        return self.add_rows([[""] * len(self.columns)])
+
+    def delete_rows(self, rows):
+        # Removes grid rows as an unsaved change; loaded rows are deleted by the next save
+        ops = []
+        for row in sorted(rows, reverse=True):
+            row_id = self.rows[row]
+            edits = self.edits.get(row_id)
+            ops.append(("remove", row_id, row, json.dumps(sorted(edits.items())) if edits else None, None))
+        self.take_rows({op[1] for op in ops})
+        self.journal.record(ops)
+        self.history_changed.emit()
+
+    def remove_row(self, row):
+        # A row another program deleted; not an edit, so it is not journaled
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.edits.pop(self.rows.pop(row), None)
+        self.endRemoveRows()
+
+    def take_rows(self, row_ids):
+        if len(row_ids) == 1:
+            row = self.rows.index(next(iter(row_ids)))
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.drop_rows(row_ids)
+            self.endRemoveRows()
+        else:
+            self.beginResetModel()
+            self.drop_rows(row_ids)
+            self.endResetModel()
+
+    def undo(self):
+        # Returns the grid row of the last change undone, or None
+        return self.replay(self.journal.undo(), undo=True)
+
+    def redo(self):
+        return self.replay(self.journal.redo(), undo=False)
+
+    def replay(self, ops, undo):
+        if not ops:
+            return None
+        edit_only = all(op[1] == "edit" for op in ops)
+        if not edit_only:
+            self.beginResetModel()
+        taken = set()
+        row_id = None
+        for _, kind, row_id, position, old, new in ops:
+            if kind == "edit":
+                self.set_edit(row_id, position, old if undo else new)
+            elif (kind == "add") == undo:
+                taken.add(row_id)
+            else:
+                if taken:
+                    self.drop_rows(taken)
+                    taken = set()
+                self.rows.insert(position, row_id)
+                if kind == "add":
+                    self.edits[row_id] = dict(enumerate(json.loads(new)))
+                else:
+                    if row_id >= 0:
+                        self.removed.remove(row_id)
+                    if old is not None:
+                        self.edits[row_id] = dict(json.loads(old))
+        if taken:
+            self.drop_rows(taken)
+        if edit_only:
+            self.refresh()
+        else:
+            self.endResetModel()
+        self.history_changed.emit()
+        return self.rows.index(row_id) if row_id in self.rows else None
+
+    def drop_rows(self, row_ids):
+        self.rows = array("q", (row_id for row_id in self.rows if row_id not in row_ids))
+        for row_id in row_ids:
+            self.edits.pop(row_id, None)
+            if row_id >= 0:
+                self.removed.append(row_id)
+
+    def set_edit(self, row_id, column, text):
+        if text is not None:
+            self.edits.setdefault(row_id, {})[column] = text
+            return
+        edits = self.edits.get(row_id, {})
+        edits.pop(column, None)
+        if not edits and row_id >= 0:
+            self.edits.pop(row_id, None)
+
+    def clear_history(self):
+        self.journal.clear()
+        self.history_changed.emit()
+
+    def saved(self):
+        self.removed = []
+        self.clear_history()
+
+    def commit_rows(self, committed):
+        # Drops the saved edits of (row id, store position) rows; added rows now point at
+        # their store positions, all replaced in one pass over the grid
+        added = {}
+        for row_id, index in committed:
+            self.edits.pop(row_id, None)
+            if row_id < 0:
+                added[row_id] = index
+        if added:
+            self.rows = array("q", (added.get(row_id, row_id) for row_id in self.rows))
+
+    def row_changed(self, row):
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
+
+    def refresh(self):
+        if self.rows and self.columns:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, len(self.columns) - 1))
+
+
+class CellDelegate(QStyledItemDelegate):
+    # Formats browse grid values when they are painted (NULL in grey italics, numbers
+    # right-aligned, long text cut short) and edits cells with a line edit
+    LEFT = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+    RIGHT = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+
+    def initStyleOption(self, option, index):
+        # Fills the option straight from the model instead of asking it for one role at a
+        # time, which is most of the cost of painting a cell
+        model = index.model()
+        value = model.value(index.row(), index.column())
+        option.index = index
+        option.features |= QStyleOptionViewItem.ViewItemFeature.HasDisplay
+        if value is None:
+            option.text = "NULL"
+            option.font.setItalic(True)
+            option.palette.setColor(
+                QPalette.ColorRole.Text, option.palette.color(QPalette.ColorGroup.Disabled, QPalette.ColorRole.Text))
+        else:
+            text = str(value)
+            option.text = text if len(text) <= CELL_DISPLAY_CHARS else text[:CELL_DISPLAY_CHARS] + "..."
+        option.displayAlignment = self.RIGHT if model.numeric[index.column()] else self.LEFT
+
+    def createEditor(self, parent, option, index):
+        return QLineEdit(parent)
+
+    def setEditorData(self, widget, index):
+        widget.setText(index.model().edit_text(index.row(), index.column()))
+
+    def setModelData(self, widget, model, index):
+        text = widget.text()
+        error = self.editor.cell_error(index.column(), text)
+        if error:
+            # Shown once the line edit has closed, so the message box does not take the
+            # focus from it halfway through the commit
+            QTimer.singleShot(0, lambda: QMessageBox.warning(self.editor, "Validation Error", error))
+            return
+        self.editor.set_cell_text(index.row(), index.column(), text)
+
 
 
 class SQLiteEditor(QMainWindow):
@@ -20,10 +845,17 @@ class SQLiteEditor(QMainWindow):
         self.setGeometry(100, 100, 800, 600)
 
         self.db_path = None
+        self.connections = None
         self.conn = None
         self.cursor = None
-        self.active_editor = None
-        self.full_data = []
+        self.import_worker = None
+        self.storage_worker = None
+        self.profile_worker = None
+        self.read_only = False
+        self.row_store = None
+        self.key_columns = ["rowid"]
+        self.lazy_flags = []
+        self.page_cache = sqlite_core.PageCache(PAGE_CACHE_MB * 1024 * 1024)
 
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -37,6 +869,13 @@ class SQLiteEditor(QMainWindow):
         self.open_btn.clicked.connect(self.open_database)
         button_layout.addWidget(self.open_btn)
 
+        self.open_mode_combo = QComboBox()
+        for idx, name in enumerate(sqlite_connections.OPEN_MODES):
+            self.open_mode_combo.addItem(name)
+            self.open_mode_combo.setItemData(
+                idx, sqlite_connections.OPEN_MODE_DESCRIPTIONS[name], Qt.ItemDataRole.ToolTipRole)
+        button_layout.addWidget(self.open_mode_combo)
+
         self.save_btn = QPushButton("Save Changes")
         self.save_btn.clicked.connect(self.save_changes)
         button_layout.addWidget(self.save_btn)
@@ -45,6 +884,20 @@ class SQLiteEditor(QMainWindow):
         self.close_btn.clicked.connect(self.close_database)
         button_layout.addWidget(self.close_btn)
 
+        self.diagnostics_btn = QPushButton("Diagnostics")
+        self.diagnostics_btn.clicked.connect(lambda: sqlite_diagnostics.show_diagnostics(self))
+        button_layout.addWidget(self.diagnostics_btn)
+
+        button_layout.addStretch()
+        button_layout.addWidget(QLabel("Profile:"))
+        self.profile_combo = QComboBox()
+        for idx, name in enumerate(sqlite_profiles.CONNECTION_PROFILES):
+            self.profile_combo.addItem(name)
+            self.profile_combo.setItemData(idx, sqlite_profiles.PROFILE_DESCRIPTIONS[name], Qt.ItemDataRole.ToolTipRole)
+        self.profile_combo.setCurrentText(sqlite_profiles.DEFAULT_PROFILE)
+        self.profile_combo.currentTextChanged.connect(self.change_profile)
+        button_layout.addWidget(self.profile_combo)
+
         self.main_layout.addLayout(button_layout)
 
         self.tabs = QTabWidget()
@@ -68,6 +921,23 @@ class SQLiteEditor(QMainWindow):
         scroll_area1.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         tab1_layout.addWidget(scroll_area1)
 
+        # Storage tab, next to Database Structure
+        self.storage_tab = QWidget()
+        self.tabs.addTab(self.storage_tab, "Storage")
+        storage_layout = QVBoxLayout(self.storage_tab)
+        self.storage_label = QLabel("Click 'Analyze Storage' to measure tables and indexes.")
+        storage_layout.addWidget(self.storage_label)
+        self.storage_table = QTableWidget(0, 10)
+        self.storage_table.setHorizontalHeaderLabels([
+            "Name", "Type", "Table", "Rows", "Pages", "Size", "Payload", "Unused", "Overflow Pages", "Avg Row Size"
+        ])
+        self.storage_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        storage_layout.addWidget(self.storage_table)
+        self.storage_btn = QPushButton("Analyze Storage")
+        self.storage_btn.clicked.connect(self.analyze_storage)
+        self.storage_btn.setEnabled(False)
+        storage_layout.addWidget(self.storage_btn)
+
         # Tab 2: Browse Data
         self.tab2 = QWidget()
         self.tabs.addTab(self.tab2, "Browse Data")
@@ -77,9 +947,15 @@ class SQLiteEditor(QMainWindow):
         self.table_dropdown.currentIndexChanged.connect(self.load_table_data)
         tab2_layout.addWidget(self.table_dropdown)
 
-        self.table2 = QTableWidget()
-        self.table2.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table2.cellDoubleClicked.connect(self.edit_cell)
+        self.table2 = QTableView()
+        self.grid_model = BrowseModel()
+        self.grid_model.history_changed.connect(self.update_undo_buttons)
+        self.table2.setModel(self.grid_model)
+        self.table2.setItemDelegate(CellDelegate(self))
+        self.table2.setEditTriggers(
+            QAbstractItemView.EditTrigger.DoubleClicked | QAbstractItemView.EditTrigger.EditKeyPressed)
+        self.table2.doubleClicked.connect(self.open_cell_viewer)
+        self.table2.horizontalHeader().sectionClicked.connect(self.sort_by_column)
 
         scroll_area2 = QScrollArea()
         scroll_area2.setWidget(self.table2)
@@ -99,11 +975,50 @@ class SQLiteEditor(QMainWindow):
         self.remove_btn.setEnabled(False)
         button_layout2.addWidget(self.remove_btn)
 
+        self.paste_btn = QPushButton("Paste Rows")
+        self.paste_btn.setToolTip("Add the rows on the clipboard, copied from a spreadsheet or CSV, as new rows")
+        self.paste_btn.clicked.connect(lambda: self.paste_clipboard(as_new_rows=True))
+        self.paste_btn.setEnabled(False)
+        button_layout2.addWidget(self.paste_btn)
+
+        self.undo_btn = QPushButton("Undo")
+        self.undo_btn.clicked.connect(self.undo_change)
+        self.undo_btn.setEnabled(False)
+        button_layout2.addWidget(self.undo_btn)
+
+        self.redo_btn = QPushButton("Redo")
+        self.redo_btn.clicked.connect(self.redo_change)
+        self.redo_btn.setEnabled(False)
+        button_layout2.addWidget(self.redo_btn)
+
+        for keys, slot in (("Ctrl+Z", self.undo_change), ("Ctrl+Y", self.redo_change), ("Ctrl+Shift+Z", self.redo_change),
+                           ("Ctrl+V", self.paste_clipboard)):
+            QShortcut(QKeySequence(keys), self.table2, slot, context=Qt.ShortcutContext.WidgetWithChildrenShortcut)
+
         self.search_btn = QPushButton("Search")
         self.search_btn.clicked.connect(self.search_records)
         self.search_btn.setEnabled(False)
         button_layout2.addWidget(self.search_btn)
 
+        self.show_all_btn = QPushButton("Show All")
+        self.show_all_btn.clicked.connect(self.clear_search)
+        self.show_all_btn.setEnabled(False)
+        button_layout2.addWidget(self.show_all_btn)
+
+        self.advisor_btn = QPushButton("Index Advisor")
+        self.advisor_btn.clicked.connect(self.show_index_advisor)
+        button_layout2.addWidget(self.advisor_btn)
+
+        self.profile_btn = QPushButton("Profile")
+        self.profile_btn.clicked.connect(self.profile_table)
+        self.profile_btn.setEnabled(False)
+        button_layout2.addWidget(self.profile_btn)
+
+        self.bulk_btn = QPushButton("Bulk Edit")
+        self.bulk_btn.clicked.connect(self.bulk_edit)
+        self.bulk_btn.setEnabled(False)
+        button_layout2.addWidget(self.bulk_btn)
+
         button_layout2.addStretch()
 
         self.truncate_btn = QPushButton("Truncate All")
@@ -113,6 +1028,65 @@ class SQLiteEditor(QMainWindow):
 
         tab2_layout.addLayout(button_layout2)
 
+        # SQL console
+        self.sql_tab = QWidget()
+        self.tabs.addTab(self.sql_tab, "SQL")
+        sql_layout = QVBoxLayout(self.sql_tab)
+
+        history_layout = QHBoxLayout()
+        history_layout.addWidget(QLabel("History:"))
+        self.sql_history = QComboBox()
+        self.sql_history.setSizeAdjustPolicy(QComboBox.SizeAdjustPolicy.AdjustToMinimumContentsLengthWithIcon)
+        self.sql_history.activated.connect(self.load_sql_history)
+        history_layout.addWidget(self.sql_history, 1)
+        sql_layout.addLayout(history_layout)
+
+        sql_splitter = QSplitter(Qt.Orientation.Vertical)
+        self.sql_editor = QPlainTextEdit()
+        self.sql_editor.setPlaceholderText(
+            "Type SQL here. Ctrl+Enter runs the selection, or everything if nothing is selected.")
+        sql_splitter.addWidget(self.sql_editor)
+
+        self.sql_results = QTabWidget()
+        self.sql_model = QueryResultModel()
+        self.sql_grid = QTableView()
+        self.sql_grid.setModel(self.sql_model)
+        self.sql_results.addTab(self.sql_grid, "Results")
+        self.sql_messages = QPlainTextEdit()
+        self.sql_messages.setReadOnly(True)
+        self.sql_results.addTab(self.sql_messages, "Messages")
+        self.sql_plan = QTreeWidget()
+        self.sql_plan.setHeaderLabels(["Query Plan"])
+        self.sql_results.addTab(self.sql_plan, "Query Plan")
+        sql_splitter.addWidget(self.sql_results)
+        sql_splitter.setSizes([150, 350])
+        sql_layout.addWidget(sql_splitter)
+
+        sql_button_layout = QHBoxLayout()
+        self.sql_run_btn = QPushButton("Run")
+        self.sql_run_btn.clicked.connect(self.run_sql)
+        self.sql_run_btn.setEnabled(False)
+        sql_button_layout.addWidget(self.sql_run_btn)
+
+        self.sql_explain_btn = QPushButton("Explain")
+        self.sql_explain_btn.clicked.connect(self.explain_sql)
+        self.sql_explain_btn.setEnabled(False)
+        sql_button_layout.addWidget(self.sql_explain_btn)
+
+        self.sql_cancel_btn = QPushButton("Cancel")
+        self.sql_cancel_btn.clicked.connect(self.cancel_sql)
+        self.sql_cancel_btn.setEnabled(False)
+        sql_button_layout.addWidget(self.sql_cancel_btn)
+
+        sql_button_layout.addStretch()
+        self.sql_status = QLabel("")
+        sql_button_layout.addWidget(self.sql_status)
+        sql_layout.addLayout(sql_button_layout)
+
+        QShortcut(QKeySequence("Ctrl+Return"), self.sql_editor, self.run_sql)
+        self.console_conn = None
+        self.sql_worker = None
+
         # Tab 3: Import/Export
         self.tab3 = QWidget()
         self.tabs.addTab(self.tab3, "Import and Export")
@@ -126,36 +1100,138 @@ class SQLiteEditor(QMainWindow):
         self.export_btn.clicked.connect(self.export_csv)
         tab3_layout.addWidget(self.export_btn)
 
+        # Tab 4: Maintenance
+        self.tab4 = QWidget()
+        self.tabs.addTab(self.tab4, "Maintenance")
+        tab4_layout = QVBoxLayout(self.tab4)
+
+        stats_layout = QGridLayout()
+        self.maintenance_labels = {}
+        for row_idx, (key, caption) in enumerate([
+            ("file_size", "File size:"), ("page_size", "Page size:"), ("page_count", "Pages:"),
+            ("freelist", "Free pages:"), ("fragmentation", "Fragmentation:"), ("auto_vacuum", "Auto-vacuum:"),
+            ("journal_mode", "Journal mode:"),
+        ]):
+            stats_layout.addWidget(QLabel(caption), row_idx, 0)
+            self.maintenance_labels[key] = QLabel("-")
+            stats_layout.addWidget(self.maintenance_labels[key], row_idx, 1)
+        tab4_layout.addLayout(stats_layout)
+
+        self.maintenance_buttons = []
+        maintenance_layout = QGridLayout()
+        for idx, (caption, task, tooltip) in enumerate([
+            ("Refresh", None, "Re-read the page statistics"),
+            ("Analyze", "analyze", "Collect statistics so the query planner can choose good indexes"),
+            ("Optimize", "optimize", "Run PRAGMA optimize (re-analyzes only where it is likely to help)"),
+            ("Vacuum", "vacuum", "Rebuild the whole file, removing all free pages"),
+            ("Vacuum Into...", "vacuum_into", "Write a compacted copy of the database to a new file"),
+            ("Incremental Vacuum", "incremental_vacuum", "Return free pages to the file system in small steps"),
+            ("Enable Incremental Auto-Vacuum", "enable_incremental",
+             "Convert the database so free pages can later be reclaimed without a full rewrite"),
+        ]):
+            button = QPushButton(caption)
+            button.setToolTip(tooltip)
+            if task:
+                button.clicked.connect(lambda checked, t=task: self.run_maintenance(t))
+            else:
+                button.clicked.connect(self.refresh_maintenance_stats)
+            button.setEnabled(False)
+            self.maintenance_buttons.append(button)
+            maintenance_layout.addWidget(button, idx // 2, idx % 2)
+        tab4_layout.addLayout(maintenance_layout)
+        tab4_layout.addStretch()
+
+        self.profile_status = QLabel("Not connected")
+        self.statusBar().addPermanentWidget(self.profile_status)
+
+        self.change_timer = QTimer(self)
+        self.change_timer.setInterval(CHANGE_POLL_MS)
+        self.change_timer.timeout.connect(self.check_external_changes)
+
         self.changes_made = False
         self.current_table = None
         self.column_types = {}
         self.column_constraints = {}
+        self.current_filter = None
+        self.sort_column = None
+        self.sort_order = "ASC"
+        self.query_log = deque(maxlen=500)
 
     def open_database(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Open Database", "", "SQLite files (*.db *.sqlite *.sqlite3)"
         )
         if file_path:
+            op = sqlite_diagnostics.start_operation("open", path=file_path)
             try:
                 self.db_path = file_path
-                self.db_label.setText(f"Database: {os.path.basename(file_path)}")
-                self.conn = sqlite3.connect(file_path)
+                mode_name = self.open_mode_combo.currentText()
+                mode = sqlite_connections.OPEN_MODES[mode_name]
+                self.read_only = mode != "read_write"
+                self.grid_model.editable = not self.read_only
+                self.db_label.setText(
+                    f"Database: {os.path.basename(file_path)}" + (f" ({mode_name.lower()})" if self.read_only else ""))
+                # Browsing, searches and stats read from a pool of read-only connections;
+                # self.conn is the single writer, or None when the database is opened read-only
+                self.connections = sqlite_connections.ConnectionManager(
+                    file_path, self.profile_combo.currentText(), mode=mode)
+                self.conn = self.connections.writer
+                # The console runs on its own autocommit connection so it can be interrupted
+                # without touching the browse grid's pending changes
+                if self.read_only:
+                    self.console_conn = self.connections.connect_reader()
+                else:
+                    self.console_conn = sqlite_profiles.connect(
+                        file_path, self.profile_combo.currentText(), check_same_thread=False, isolation_level=None)
+                self.update_profile_status()
 
                 self.load_db_structure()
-
-                cursor = self.conn.cursor()
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                tables = [row[0] for row in cursor.fetchall()]
-                cursor.close()
+                self.refresh_maintenance_stats()
+                for button in self.maintenance_buttons:
+                    button.setEnabled(not self.read_only)
+                self.save_btn.setEnabled(not self.read_only)
+                self.import_btn.setEnabled(not self.read_only)
+                self.storage_btn.setEnabled(True)
+                self.sql_run_btn.setEnabled(True)
+                self.sql_explain_btn.setEnabled(True)
+
+                with self.connections.reader() as conn:
+                    tables = sqlite_core.list_tables(conn)
                 self.table_dropdown.clear()
                 self.table_dropdown.addItems(tables)
                 if tables:
                     self.table_dropdown.setCurrentIndex(0)
                     self.load_table_data()
+                self.change_timer.start()
+                op.finish()
             except Exception as e:
+                op.finish(error=str(e))
                 QMessageBox.critical(self, "Error", f"Failed to open database: {str(e)}")
                 self._reset()
 
+    def change_profile(self, profile_name):
+        if not self.connections:
+            return
+        try:
+            self.connections.set_profile(profile_name)
+            if self.console_conn and not self.sql_worker:
+                if self.read_only:
+                    sqlite_profiles.apply_read_only_profile(
+                        self.console_conn, profile_name, sqlite_profiles.READ_ONLY_MMAP_SIZE)
+                else:
+                    sqlite_profiles.apply_profile(self.console_conn, profile_name)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to apply profile '{profile_name}': {str(e)}")
+        self.update_profile_status()
+
+    def update_profile_status(self):
+        if not self.connections:
+            self.profile_status.setText("Not connected")
+            return
+        mode = f"{self.open_mode_combo.currentText()}, " if self.read_only else ""
+        self.profile_status.setText(
+            f"{mode}{self.profile_combo.currentText()}: {sqlite_profiles.describe_connection(self.connections.monitor)}")
+
     def format_schema(self, schema):
         if schema is None:
             return ""
@@ -164,51 +1240,65 @@ class SQLiteEditor(QMainWindow):
     def load_db_structure(self):
         self.tree1.clear()
 
-        cursor = self.conn.cursor() if self.conn else None
-        if not cursor:
+        if not self.connections:
             QMessageBox.critical(self, "Error", "No database connection available.")
             return
 
-        try:
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
-        except Exception as e:
-            cursor.close()
-            QMessageBox.critical(self, "Error", f"Failed to load database structure: {str(e)}")
-            return
-
-        for table in tables:
-            table_name = table[0]
-            parent = QTreeWidgetItem(self.tree1, [table_name, "", ""])
-            self.tree1.expandItem(parent)
-
+        with self.connections.reader() as conn:
             try:
-                sub_cursor = self.conn.cursor()
-                escaped_table_name = table_name.replace('"', '""')
-                sub_cursor.execute(f'PRAGMA table_info("{escaped_table_name}")')
-                columns = sub_cursor.fetchall()
-
-                for col in columns:
-                    col_name, col_type = col[1], col[2]
-                    QTreeWidgetItem(parent, [col_name, col_type, ""])
-
-                sub_cursor.execute(
-                    "SELECT sql FROM sqlite_master WHERE type='table' AND name=?",
-                    (table_name,)
-                )
-                schema_result = sub_cursor.fetchone()
-                schema = schema_result[0] if schema_result else ""
-                formatted_schema = self.format_schema(schema)
-                parent.setText(2, formatted_schema)
-                sub_cursor.close()
+                schemas = conn.execute(
+                    "SELECT name, sql FROM sqlite_master WHERE type='table' "
+                    "AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'").fetchall()
             except Exception as e:
-                sub_cursor.close()
-                QMessageBox.warning(
-                    self, "Warning",
-                    f"Failed to load structure for table '{table_name}': {str(e)}"
-                )
-                continue
-        cursor.close()
+                QMessageBox.critical(self, "Error", f"Failed to load database structure: {str(e)}")
+                return
+
+            for table_name, schema in schemas:
+                parent = QTreeWidgetItem(self.tree1, [table_name, "", ""])
+                try:
+                    self.fill_schema_node(conn, parent, table_name, schema)
+                except Exception as e:
+                    QMessageBox.warning(
+                        self, "Warning",
+                        f"Failed to load structure for table '{table_name}': {str(e)}"
+                    )
+                    continue
+
+    def fill_schema_node(self, conn, parent, table_name, schema):
+        for col in sqlite_core.table_info(conn, table_name):
+            col_name, col_type = col[1], col[2]
+            QTreeWidgetItem(parent, [col_name, col_type, ""])
+        parent.setText(2, self.format_schema(schema or ""))
+        self.tree1.expandItem(parent)
+
+    def refresh_schema_nodes(self):
+        # Rebuilds only the nodes of tables that were added, dropped or altered and
+        # returns their names
+        changed = set()
+        with self.connections.reader() as conn:
+            schemas = conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type='table' "
+                "AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'").fetchall()
+            nodes = {}
+            for i in range(self.tree1.topLevelItemCount()):
+                nodes[self.tree1.topLevelItem(i).text(0)] = self.tree1.topLevelItem(i)
+            names = {name for name, _ in schemas}
+            for name, item in nodes.items():
+                if name not in names:
+                    self.tree1.takeTopLevelItem(self.tree1.indexOfTopLevelItem(item))
+                    changed.add(name)
+            for position, (name, schema) in enumerate(schemas):
+                item = nodes.get(name)
+                if item is not None and item.text(2) == self.format_schema(schema or ""):
+                    continue
+                if item is None:
+                    item = QTreeWidgetItem([name, "", ""])
+                    self.tree1.insertTopLevelItem(position, item)
+                else:
+                    item.takeChildren()
+                self.fill_schema_node(conn, item, name, schema)
+                changed.add(name)
+        return changed
 
     def load_table_data(self):
         new_table = self.table_dropdown.currentText()
@@ -227,92 +1317,506 @@ class SQLiteEditor(QMainWindow):
                 self.table_dropdown.setCurrentText(self.current_table)
                 return
 
+        if new_table != self.current_table:
+            self.current_filter = None
+            self.sort_column = None
+            self.sort_order = "ASC"
         self.current_table = new_table
-        self.table2.blockSignals(True)
-        self.table2.clear()
-        self.table2.setHorizontalHeaderLabels([])
-        self.table2.setColumnCount(0)
-        self.table2.setRowCount(0)
-        self.table2.blockSignals(False)
+        self.grid_model.set_columns([], [])
 
         self.column_types = {}
         self.column_constraints = {}
-        self.full_data = []
+        self.row_store = None
 
-        cursor = self.conn.cursor() if self.conn else None
-        if not cursor:
+        if not self.connections:
             QMessageBox.critical(self, "Error", "No database connection available.")
             return
 
+        op = sqlite_diagnostics.start_operation("load", table=self.current_table)
         try:
-            escaped_table_name = self.current_table.replace('"', '""')
-            cursor.execute(f'PRAGMA table_info("{escaped_table_name}")')
-            columns_info = cursor.fetchall()
+            with self.connections.reader() as conn:
+                columns_info = sqlite_core.table_info(conn, self.current_table)
+                self.key_columns = sqlite_core.row_key_columns(conn, self.current_table)
             columns = [col[1] for col in columns_info]
             self.column_types = {col[1]: col[2] for col in columns_info}
-            self.column_constraints = {col[1]: self.parse_column_constraints(col) for col in columns_info}
+            self.column_constraints = {col[1]: sqlite_core.parse_column_constraints(col) for col in columns_info}
+            self.lazy_flags = sqlite_core.lazy_column_flags(self.column_types.values())
 
-            self.table2.setColumnCount(len(columns))
-            self.table2.setHorizontalHeaderLabels(columns)
+            self.grid_model.set_columns(columns, [self.column_types[col] for col in columns])
             for i in range(len(columns)):
                 self.table2.horizontalHeader().resizeSection(i, 100)
 
-            cursor.execute(f'SELECT * FROM "{escaped_table_name}"')
-            rows = cursor.fetchall()
-            self.table2.setRowCount(len(rows))
-            self.full_data = [list(row) for row in rows]
-
-            for row_idx, row in enumerate(rows):
-                for col_idx, value in enumerate(row):
-                    display_text = "Null" if value is None else str(value)
-                    actual_value = "" if value is None else str(value)
-                    item = QTableWidgetItem(display_text)
-                    item.setData(Qt.ItemDataRole.UserRole, actual_value)
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    self.table2.setItem(row_idx, col_idx, item)
-
-            self.insert_btn.setEnabled(True)
-            self.remove_btn.setEnabled(len(rows) > 0)
+            rows = self.run_browse_query("sort" if self.sort_column else "load")
+            self.populate_table(rows)
+
+            self.insert_btn.setEnabled(not self.read_only)
+            self.paste_btn.setEnabled(not self.read_only)
+            self.remove_btn.setEnabled(len(rows) > 0 and not self.read_only)
             self.search_btn.setEnabled(len(rows) > 0)
-            self.truncate_btn.setEnabled(True)
+            self.truncate_btn.setEnabled(not self.read_only)
+            self.profile_btn.setEnabled(True)
+            self.bulk_btn.setEnabled(not self.read_only)
+            op.finish(rows=len(rows))
         except Exception as e:
+            op.finish(error=str(e))
             QMessageBox.critical(self, "Error", f"Failed to load table data: {str(e)}")
             self._reset()
-        finally:
-            cursor.close()
 
-    def parse_column_constraints(self, column_info):
-        constraints = {}
-        col_type = column_info[2].upper() if column_info[2] else ""
+    def populate_table(self, store):
+        self.row_store = store
+        self.grid_model.set_store(store)
+
+    def check_external_changes(self):
+        if not self.connections or self.table2.state() == QAbstractItemView.State.EditingState:
+            return
+        try:
+            data_changed, schema_changed = self.connections.external_changes()
+            if schema_changed:
+                changed = self.refresh_table_list()
+                if self.current_table in changed and not self.changes_made:
+                    self.load_table_data()
+                    data_changed = False
+                    self.statusBar().showMessage(
+                        f"Table '{self.current_table}' was altered by another connection and has been reloaded", 5000)
+            if data_changed and self.current_table:
+                refreshed = self.refresh_visible_rows()
+                if refreshed:
+                    self.statusBar().showMessage(f"{refreshed} visible row(s) changed by another connection", 5000)
+        except Exception as e:
+            # Polling runs every second, so report failures without a dialog
+            self.statusBar().showMessage(f"Could not check for external changes: {str(e)}", 5000)
+
+    def refresh_visible_rows(self):
+        # Re-reads only the rows on screen. Rows with unsaved edits keep the user's values;
+        # rows another connection deleted are removed from the grid.
+        first = self.table2.rowAt(0)
+        if first < 0:
+            return 0
+        last = self.table2.rowAt(self.table2.viewport().height() - 1)
+        if last < 0:
+            last = self.grid_model.rowCount() - 1
+        return self.refresh_rows(range(first, last + 1))
+
+    def refresh_rows(self, rows):
+        untouched = {}
+        for row in rows:
+            index = self.row_index(row)
+            if index is not None and not self.grid_model.is_edited(row):
+                untouched[self.row_store.key(index)] = (row, index)
+        with self.connections.reader() as conn:
+            current = sqlite_core.fetch_rows_by_key(
+                conn, self.current_table, self.key_columns, untouched, list(self.column_types), self.lazy_flags)
+
+        refreshed = 0
+        for key, (row, index) in sorted(untouched.items(), key=lambda item: item[1][0], reverse=True):
+            if key not in current:
+                self.grid_model.remove_row(row)
+            elif list(current[key]) != self.row_store.row(index):
+                self.row_store.set_row(index, current[key])
+                self.grid_model.row_changed(row)
+            else:
+                continue
+            refreshed += 1
+        return refreshed
+
+    def build_browse_query(self):
+        return sqlite_core.browse_query(
+            self.current_table, self.key_columns, self.current_filter, self.sort_column, self.sort_order,
+            list(self.column_types), self.lazy_flags)
+
+    def run_browse_query(self, kind):
+        # Returns the rows as a RowStore, from the page cache if the same query ran since
+        # the database last changed
+        sql, params = self.build_browse_query()
+        cache_key = (self.current_table, sql, tuple(params))
+        self.page_cache.validate(self.connections.versions())
+        store = self.page_cache.get(cache_key)
+        if store is not None:
+            return store
+
+        with self.connections.reader() as conn:
+            start = time.perf_counter()
+            rows = conn.execute(sql, params).fetchall()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        if kind != "load":
+            self.record_query(kind, sql, params, elapsed_ms, len(rows))
+        key_types = ["INTEGER" if key == "rowid" else self.column_types[key] for key in self.key_columns]
+        store = sqlite_core.RowStore(key_types, self.column_types.values(), self.lazy_flags)
+        store.extend(rows)
+        self.page_cache.put(self.current_table, cache_key, store, store.memory_size())
+        return store
+
+    def table_written(self, table_name):
+        # Our own writes do not move data_version, so the pages they made stale are
+        # dropped here
+        self.page_cache.invalidate_table(table_name)
+        with self.connections.reader() as conn:
+            if sqlite_core.has_cascading_writes(conn):
+                self.page_cache.clear()
+
+    def record_query(self, kind, sql, params, elapsed_ms, row_count):
+        filter_field, filter_mode = (self.current_filter[0], self.current_filter[1]) if self.current_filter else (None, None)
+        self.query_log.append({
+            "kind": kind,
+            "table": self.current_table,
+            "sql": sql,
+            "params": list(params),
+            "elapsed_ms": elapsed_ms,
+            "rows": row_count,
+            "filter_field": filter_field,
+            "filter_mode": filter_mode,
+            "filter_affinity": sqlite_core.column_affinity(self.column_types.get(filter_field)) if filter_field else None,
+            "sort_field": self.sort_column,
+            "sort_order": self.sort_order,
+        })
+
+    def sort_by_column(self, column):
+        if not self.current_table or column < 0:
+            return
+        if self.changes_made:
+            QMessageBox.warning(self, "Unsaved Changes", "Please save your changes before sorting.")
+            return
+        column_name = self.grid_model.columns[column]
+        if self.sort_column == column_name:
+            self.sort_order = "DESC" if self.sort_order == "ASC" else "ASC"
+        else:
+            self.sort_column = column_name
+            self.sort_order = "ASC"
+        try:
+            self.populate_table(self.run_browse_query("sort"))
+            self.table2.horizontalHeader().setSortIndicatorShown(True)
+            self.table2.horizontalHeader().setSortIndicator(
+                column, Qt.SortOrder.AscendingOrder if self.sort_order == "ASC" else Qt.SortOrder.DescendingOrder)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to sort table: {str(e)}")
+
+    def clear_search(self):
+        if not self.current_table or not self.current_filter:
+            return
+        self.current_filter = None
+        try:
+            self.populate_table(self.run_browse_query("sort" if self.sort_column else "load"))
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to reload table: {str(e)}")
+        self.show_all_btn.setEnabled(False)
+        self.remove_btn.setEnabled(self.grid_model.rowCount() > 0 and not self.read_only)
+        self.search_btn.setEnabled(self.grid_model.rowCount() > 0)
+        self.changes_made = False
 
-        if 'CHAR' in col_type or 'TEXT' in col_type:
-            match = re.search(r'\((\d+)\)', column_info[2] or "")
-            if match:
-                constraints['max_length'] = int(match.group(1))
+    def explain_query(self, sql, params):
+        with self.connections.reader() as conn:
+            return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+    def recommend_index(self, entry, plan):
+        # Returns (index SQL or None, explanation) for a recorded browse query
+        # An ordered index scan is fine for a plain sort, but with a filter any SCAN reads every row
+        full_scan = any(step.startswith("SCAN") and (" USING " not in step or entry["filter_field"]) for step in plan)
+        temp_sort = any("USE TEMP B-TREE" in step for step in plan)
+        if not full_scan and not temp_sort:
+            return None, "Already uses an index"
+
+        key = []
+        indexed_fields = []
+        notes = []
+        mode = entry["filter_mode"]
+        if entry["filter_field"]:
+            escaped_field = entry["filter_field"].replace('"', '""')
+            if mode == "Equals":
+                key.append(f'"{escaped_field}"')
+                indexed_fields.append(entry["filter_field"])
+            elif mode == "Starts with" and entry["filter_affinity"] == "TEXT":
+                # LIKE is case-insensitive, so only a NOCASE index can serve the prefix range
+                key.append(f'"{escaped_field}" COLLATE NOCASE')
+                indexed_fields.append(entry["filter_field"] + "_nocase")
+            elif mode == "Starts with":
+                notes.append("'Starts with' can only use an index on text columns")
+            else:
+                notes.append("'Contains' searches cannot use an index; try 'Equals' or 'Starts with'")
+        sort_field = entry["sort_field"]
+        if sort_field and sort_field != entry["filter_field"] and (not entry["filter_field"] or mode == "Equals"):
+            escaped_sort = sort_field.replace('"', '""')
+            key.append(f'"{escaped_sort}"' + (" DESC" if entry["sort_order"] == "DESC" else ""))
+            indexed_fields.append(sort_field)
+        if not key:
+            return None, "; ".join(notes) or "No index would help"
+
+        index_name = "idx_" + "_".join(re.sub(r"\W+", "_", name) for name in [entry["table"]] + indexed_fields)
+        escaped_table = entry["table"].replace('"', '""')
+        index_sql = f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{escaped_table}" ({", ".join(key)})'
+        reasons = []
+        if full_scan:
+            reasons.append("full table scan")
+        if temp_sort:
+            reasons.append("temporary sort")
+        return index_sql, f"Avoids the {' and '.join(reasons)}" + (f" ({'; '.join(notes)})" if notes else "")
+
+    def show_index_advisor(self):
+        if not self.connections:
+            QMessageBox.warning(self, "Warning", "Open a database first.")
+            return
 
-        constraints['not_null'] = bool(column_info[3])
-        return constraints
+        # Aggregate the recorded queries by statement shape
+        grouped = {}
+        for entry in self.query_log:
+            key = (entry["sql"], entry["filter_mode"])
+            group = grouped.setdefault(key, {"entry": entry, "runs": 0, "total_ms": 0.0, "max_ms": 0.0})
+            group["entry"] = entry
+            group["runs"] += 1
+            group["total_ms"] += entry["elapsed_ms"]
+            group["max_ms"] = max(group["max_ms"], entry["elapsed_ms"])
+        groups = sorted(grouped.values(), key=lambda g: g["max_ms"], reverse=True)
+
+        advisor_dialog = QDialog(self)
+        advisor_dialog.setWindowTitle("Index Advisor")
+        advisor_dialog.setGeometry(200, 200, 900, 500)
+        dialog_layout = QVBoxLayout(advisor_dialog)
+        dialog_layout.addWidget(QLabel(
+            f"Searches and sorts run in this session. Queries slower than {SLOW_QUERY_MS} ms are checked with "
+            "EXPLAIN QUERY PLAN."))
+
+        advice_table = QTableWidget(len(groups), 7)
+        advice_table.setHorizontalHeaderLabels(["Table", "Operation", "Runs", "Avg ms", "Max ms", "Plan", "Recommendation"])
+        advice_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        advice_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        advice_table.horizontalHeader().setStretchLastSection(True)
+        recommendations = []
+        for row_idx, group in enumerate(groups):
+            entry = group["entry"]
+            operation = entry["kind"]
+            if entry["filter_field"]:
+                operation += f": {entry['filter_field']} {entry['filter_mode'].lower()}"
+            if entry["sort_field"]:
+                operation += f", order by {entry['sort_field']} {entry['sort_order']}"
+            plan, index_sql, advice = [], None, "Fast enough"
+            if group["max_ms"] >= SLOW_QUERY_MS:
+                try:
+                    plan = self.explain_query(entry["sql"], entry["params"])
+                    index_sql, advice = self.recommend_index(entry, plan)
+                except Exception as e:
+                    advice = f"Could not explain query: {str(e)}"
+            recommendations.append((group, plan, index_sql))
+            values = [entry["table"], operation, str(group["runs"]), f"{group['total_ms'] / group['runs']:.1f}",
+                      f"{group['max_ms']:.1f}", "; ".join(plan), index_sql or advice]
+            for col_idx, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if index_sql:
+                    item.setToolTip(advice)
+                advice_table.setItem(row_idx, col_idx, item)
+        advice_table.resizeColumnsToContents()
+        dialog_layout.addWidget(advice_table)
+
+        create_btn = QPushButton("Create Recommended Index")
+        create_btn.setEnabled(not self.read_only)
+        create_btn.clicked.connect(
+            lambda: self.create_recommended_index(advisor_dialog, advice_table, recommendations))
+        dialog_layout.addWidget(create_btn)
+        advisor_dialog.exec()
+
+    def create_recommended_index(self, dialog, advice_table, recommendations):
+        selected_rows = advice_table.selectionModel().selectedRows()
+        if not selected_rows:
+            QMessageBox.warning(dialog, "Warning", "Please select a query with a recommendation.")
+            return
+        group, plan, index_sql = recommendations[selected_rows[0].row()]
+        if not index_sql:
+            QMessageBox.information(dialog, "Index Advisor", "There is no index to create for this query.")
+            return
+        entry = group["entry"]
+        if self.changes_made:
+            QMessageBox.warning(dialog, "Unsaved Changes", "Please save your changes before creating an index.")
+            return
+
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            with self.connections.writing() as conn:
+                with sqlite_core.transaction(conn):
+                    conn.execute(index_sql)
+                    conn.execute(f'ANALYZE "{entry["table"].replace(chr(34), chr(34) * 2)}"')
+            # Re-measure the query: best of three runs
+            timings = []
+            with self.connections.reader() as conn:
+                for _ in range(3):
+                    start = time.perf_counter()
+                    conn.execute(entry["sql"], entry["params"]).fetchall()
+                    timings.append((time.perf_counter() - start) * 1000)
+            new_plan = self.explain_query(entry["sql"], entry["params"])
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(dialog, "Error", f"Failed to create index: {str(e)}")
+            return
+        QApplication.restoreOverrideCursor()
+
+        before_ms = group["total_ms"] / group["runs"]
+        after_ms = min(timings)
+        self.query_log.append(dict(entry, elapsed_ms=after_ms))
+        self.load_db_structure()
+        QMessageBox.information(
+            dialog, "Index Created",
+            f"{index_sql}\n\nBefore: {before_ms:.1f} ms ({'; '.join(plan)})\n"
+            f"After: {after_ms:.1f} ms ({'; '.join(new_plan)})"
+        )
+        dialog.accept()
+
+    def profile_table(self):
+        if not self.current_table or self.profile_worker:
+            return
+        # Profiles are cached with the browse results, so they are dropped when the table
+        # is written or another connection changes the database
+        self.page_cache.validate(self.connections.versions())
+        profiles = self.page_cache.get(("profile", self.current_table))
+        if profiles is not None:
+            self.show_profile(self.current_table, profiles, "cached")
+            return
+        self.profile_token = self.page_cache.token
+        self.profile_worker = ProfileWorker(self.connections, self.current_table)
+        self.profile_progress = QProgressDialog(f"Scanning {self.current_table}...", "Cancel", 0, 0, self)
+        self.profile_progress.setWindowTitle("Profile")
+        self.profile_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.profile_progress.setMinimumDuration(500)
+        self.profile_progress.canceled.connect(self.profile_worker.cancel)
+        self.profile_worker.progress.connect(self.profile_progress.setLabelText)
+        self.profile_worker.results.connect(self.finish_profile)
+        self.profile_worker.failed.connect(self.fail_profile)
+        self.profile_btn.setEnabled(False)
+        self.profile_worker.start()
+
+    def finish_profile(self, profiles, seconds):
+        if not self.profile_worker:
+            # The database was closed while the scan was finishing
+            return
+        table_name = self.profile_worker.table_name
+        self.profile_worker = None
+        self.profile_progress.reset()
+        self.profile_btn.setEnabled(self.current_table is not None)
+        self.page_cache.validate(self.connections.versions())
+        if self.profile_token is not None and self.page_cache.token == self.profile_token:
+            self.page_cache.put(table_name, ("profile", table_name), profiles, len(repr(profiles)))
+        self.show_profile(table_name, profiles, f"scanned in {seconds:.1f} s")
+
+    def fail_profile(self, error):
+        if not self.profile_worker:
+            return
+        self.profile_worker = None
+        self.profile_progress.reset()
+        self.profile_btn.setEnabled(self.current_table is not None)
+        if error == "Cancelled.":
+            return
+        QMessageBox.critical(self, "Error", f"Profile failed: {error}")
+
+    def show_profile(self, table_name, profiles, source):
+        profile_dialog = QDialog(self)
+        profile_dialog.setWindowTitle(f"Profile: {table_name}")
+        profile_dialog.setGeometry(200, 200, 1000, 450)
+        dialog_layout = QVBoxLayout(profile_dialog)
+        rows = profiles[0]["rows"] if profiles else 0
+        summary = QLabel(
+            f"{rows:,} rows, {source}. Values marked ~ are estimates: distinct counts of columns with more than "
+            f"{sqlite_core.PROFILE_EXACT_VALUES:,} different values, and the counts of their most common values.")
+        summary.setWordWrap(True)
+        dialog_layout.addWidget(summary)
+
+        profile_grid = QTableWidget(len(profiles), 9)
+        profile_grid.setHorizontalHeaderLabels(
+            ["Column", "Type", "Nulls", "Null %", "Distinct", "Min", "Max", "Avg Length", "Most Common"])
+        profile_grid.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        profile_grid.horizontalHeader().setStretchLastSection(True)
+        for row_idx, info in enumerate(profiles):
+            approx = "" if info["distinct_exact"] else "~"
+            top = ", ".join(f"{value} ({'~' if info['top_undercount'] else ''}{count:,})" for value, count in info["top"])
+            null_pct = 100 * info["nulls"] / rows if rows else 0
+            profile_grid.setItem(row_idx, 0, QTableWidgetItem(info["column"]))
+            profile_grid.setItem(row_idx, 1, QTableWidgetItem(info["type"]))
+            profile_grid.setItem(row_idx, 2, SortableItem(f"{info['nulls']:,}", info["nulls"]))
+            profile_grid.setItem(row_idx, 3, SortableItem(f"{null_pct:.1f}", null_pct))
+            profile_grid.setItem(row_idx, 4, SortableItem(f"{approx}{info['distinct']:,}", info["distinct"]))
+            profile_grid.setItem(row_idx, 5, QTableWidgetItem("" if info["min"] is None else info["min"]))
+            profile_grid.setItem(row_idx, 6, QTableWidgetItem("" if info["max"] is None else info["max"]))
+            avg_length = info["avg_length"]
+            profile_grid.setItem(row_idx, 7, SortableItem("" if avg_length is None else f"{avg_length:.1f}", avg_length))
+            profile_grid.setItem(row_idx, 8, QTableWidgetItem(top))
+        profile_grid.resizeColumnsToContents()
+        for col_idx in (5, 6):
+            profile_grid.setColumnWidth(col_idx, min(profile_grid.columnWidth(col_idx), 200))
+        dialog_layout.addWidget(profile_grid)
+        profile_dialog.exec()
 
     def insert_record(self):
-        if self.table2.columnCount() == 0:
+        if self.grid_model.columnCount() == 0:
             QMessageBox.warning(self, "Warning", "No columns available to insert a record.")
             return
 
-        row_count = self.table2.rowCount()
-        self.table2.blockSignals(True)
-        self.table2.setRowCount(row_count + 1)
-        new_row = [""] * self.table2.columnCount()
-        for col_idx in range(self.table2.columnCount()):
-            item = QTableWidgetItem("Null")
-            item.setData(Qt.ItemDataRole.UserRole, "")
-            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.table2.setItem(row_count, col_idx, item)
-        self.table2.blockSignals(False)
+        row = self.grid_model.add_row()
+        self.table2.scrollTo(self.grid_model.index(row, 0))
+
+        self.changes_made = True
+        self.remove_btn.setEnabled(True)
+        self.search_btn.setEnabled(True)
+
+    def paste_clipboard(self, as_new_rows=False):
+        # Ctrl+V pastes over the selected cells, or adds new rows when nothing is selected.
+        # Everything is checked before the grid changes, and the grid then updates once.
+        if not self.current_table or self.read_only or self.table2.state() == QAbstractItemView.State.EditingState:
+            return
+        columns = self.grid_model.columns
+        rows = sqlite_core.parse_pasted_rows(QApplication.clipboard().text())
+        if not rows or not columns:
+            QMessageBox.warning(self, "Warning", "The clipboard holds no rows to paste.")
+            return
+
+        selection = [] if as_new_rows else self.table2.selectionModel().selectedIndexes()
+        row_count = self.grid_model.rowCount()
+        cells = []
+        new_rows = []
+        checked = []
+        if len(selection) > 1 and len(rows) == 1 and len(rows[0]) == 1:
+            # One value fills every selected cell
+            cells = [(index.row(), index.column(), rows[0][0]) for index in selection]
+        else:
+            if selection:
+                top = min(index.row() for index in selection)
+                positions = range(min(index.column() for index in selection), len(columns))
+            else:
+                # New rows are matched to the columns by a header row when there is one
+                top = row_count
+                positions = sqlite_core.pasted_header(rows[0], columns)
+                if positions is None:
+                    positions = range(len(columns))
+                else:
+                    rows = rows[1:]
+            width = max(len(row) for row in rows) if rows else 0
+            if width > len(positions):
+                QMessageBox.warning(self, "Warning", f"The pasted rows have {width} values, but only {len(positions)} columns can take them.")
+                return
+            for offset, row in enumerate(rows):
+                grid_row = top + offset
+                if grid_row < row_count:
+                    cells += [(grid_row, column, text) for column, text in zip(positions, row)]
+                    continue
+                texts = [""] * len(columns)
+                for column, text in zip(positions, row):
+                    texts[column] = text
+                    checked.append((f"Row {grid_row + 1}", column, text))
+                new_rows.append(texts)
+        if not cells and not new_rows:
+            QMessageBox.warning(self, "Warning", "The clipboard holds no rows to paste.")
+            return
 
-        self.full_data.append(new_row)
+        for row, column, _ in cells:
+            if isinstance(self.grid_model.value(row, column), sqlite_core.LazyCell):
+                QMessageBox.warning(self, "Warning", f"Row {row + 1}, column '{columns[column]}' holds a large value. Replace it from the cell viewer instead.")
+                return
+        problems = sqlite_core.check_pasted_values(
+            columns, self.column_constraints, [(f"Row {row + 1}", column, text) for row, column, text in cells] + checked)
+        if problems:
+            QMessageBox.warning(self, "Validation Error", "Nothing was pasted. These values break the table's constraints:\n\n" + "\n".join(problems))
+            return
+
+        self.grid_model.set_cells(cells, new_rows)
+        self.table2.scrollTo(self.grid_model.index(min([row for row, _, _ in cells] or [row_count]), 0))
         self.changes_made = True
         self.remove_btn.setEnabled(True)
         self.search_btn.setEnabled(True)
+        self.statusBar().showMessage(f"Pasted {len(cells):,} cells and {len(new_rows):,} new rows. Save to write them.", 5000)
 
     def remove_record(self):
         selected_rows = self.table2.selectionModel().selectedRows()
@@ -320,20 +1824,164 @@ class SQLiteEditor(QMainWindow):
             QMessageBox.warning(self, "Warning", "Please select a row to remove.")
             return
 
-        row = selected_rows[0].row()
-        displayed_row = [self.table2.item(row, i).data(Qt.ItemDataRole.UserRole) if self.table2.item(row, i) else "" for
-                         i in range(self.table2.columnCount())]
-        for i, full_row in enumerate(self.full_data):
-            if all(str(full_row[j]) == str(displayed_row[j]) for j in range(len(displayed_row))):
-                del self.full_data[i]
-                break
-
-        self.table2.removeRow(row)
+        self.grid_model.delete_rows([selected_rows[0].row()])
         self.changes_made = True
-        if self.table2.rowCount() == 0:
+        if self.grid_model.rowCount() == 0:
             self.remove_btn.setEnabled(False)
             self.search_btn.setEnabled(False)
 
+    def undo_change(self):
+        self.replay_change(self.grid_model.undo)
+
+    def redo_change(self):
+        self.replay_change(self.grid_model.redo)
+
+    def replay_change(self, replay):
+        if self.read_only or self.table2.state() == QAbstractItemView.State.EditingState:
+            return
+        row = replay()
+        if row is not None:
+            self.table2.scrollTo(self.grid_model.index(row, 0))
+        self.changes_made = self.grid_model.has_changes()
+        self.remove_btn.setEnabled(self.grid_model.rowCount() > 0)
+        self.search_btn.setEnabled(self.grid_model.rowCount() > 0)
+
+    def update_undo_buttons(self):
+        self.undo_btn.setEnabled(self.grid_model.journal.can_undo())
+        self.redo_btn.setEnabled(self.grid_model.journal.can_redo())
+
+    def bulk_edit(self):
+        if not self.current_table or self.read_only:
+            return
+        if self.changes_made:
+            QMessageBox.warning(self, "Unsaved Changes", "Please save or undo your changes before a bulk edit.")
+            return
+
+        bulk_dialog = QDialog(self)
+        bulk_dialog.setWindowTitle(f"Bulk Edit: {self.current_table}")
+        bulk_dialog.setGeometry(250, 250, 600, 400)
+        dialog_layout = QVBoxLayout(bulk_dialog)
+
+        form_layout = QGridLayout()
+        form_layout.addWidget(QLabel("Column:"), 0, 0)
+        self.bulk_column_combo = QComboBox()
+        self.bulk_column_combo.addItems(self.grid_model.columns)
+        if self.table2.currentIndex().isValid():
+            self.bulk_column_combo.setCurrentIndex(self.table2.currentIndex().column())
+        form_layout.addWidget(self.bulk_column_combo, 0, 1)
+        form_layout.addWidget(QLabel("Operation:"), 1, 0)
+        self.bulk_operation_combo = QComboBox()
+        for operation, (label, _, _) in BULK_OPERATION_LABELS.items():
+            self.bulk_operation_combo.addItem(label, operation)
+        form_layout.addWidget(self.bulk_operation_combo, 1, 1)
+        self.bulk_find_label = QLabel()
+        self.bulk_find_input = QLineEdit()
+        form_layout.addWidget(self.bulk_find_label, 2, 0)
+        form_layout.addWidget(self.bulk_find_input, 2, 1)
+        self.bulk_replacement_label = QLabel()
+        self.bulk_replacement_input = QLineEdit()
+        form_layout.addWidget(self.bulk_replacement_label, 3, 0)
+        form_layout.addWidget(self.bulk_replacement_input, 3, 1)
+        dialog_layout.addLayout(form_layout)
+
+        if self.current_filter:
+            field_name, mode, term = self.current_filter
+            scope = f"Only rows where {field_name} {mode.lower()} '{term}' are changed, as in the grid."
+        else:
+            scope = "Every row of the table can be changed."
+        if self.sort_column:
+            scope += f" Fill down follows the grid's order by {self.sort_column}."
+        scope_label = QLabel(scope)
+        scope_label.setWordWrap(True)
+        dialog_layout.addWidget(scope_label)
+
+        self.bulk_preview_label = QLabel("Preview to see how many rows will change.")
+        self.bulk_preview_label.setWordWrap(True)
+        dialog_layout.addWidget(self.bulk_preview_label)
+        self.bulk_preview_grid = QTableWidget(0, 2)
+        self.bulk_preview_grid.setHorizontalHeaderLabels(["Before", "After"])
+        self.bulk_preview_grid.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.bulk_preview_grid.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        dialog_layout.addWidget(self.bulk_preview_grid)
+
+        bulk_button_layout = QHBoxLayout()
+        preview_btn = QPushButton("Preview")
+        preview_btn.clicked.connect(self.preview_bulk_edit)
+        bulk_button_layout.addWidget(preview_btn)
+        self.bulk_apply_btn = QPushButton("Apply")
+        self.bulk_apply_btn.clicked.connect(lambda: self.apply_bulk_edit(bulk_dialog))
+        bulk_button_layout.addWidget(self.bulk_apply_btn)
+        dialog_layout.addLayout(bulk_button_layout)
+
+        # Any change to the inputs needs a new preview before it can be applied
+        self.bulk_plan = None
+        self.bulk_operation_combo.currentIndexChanged.connect(self.update_bulk_inputs)
+        self.bulk_column_combo.currentIndexChanged.connect(self.reset_bulk_preview)
+        self.bulk_find_input.textChanged.connect(self.reset_bulk_preview)
+        self.bulk_replacement_input.textChanged.connect(self.reset_bulk_preview)
+        self.update_bulk_inputs()
+        bulk_dialog.exec()
+        self.bulk_plan = None
+
+    def update_bulk_inputs(self):
+        _, find_label, replacement_label = BULK_OPERATION_LABELS[self.bulk_operation_combo.currentData()]
+        for label, widget, text in ((self.bulk_find_label, self.bulk_find_input, find_label),
+                                    (self.bulk_replacement_label, self.bulk_replacement_input, replacement_label)):
+            label.setText(text or "")
+            label.setVisible(text is not None)
+            widget.setVisible(text is not None)
+        self.reset_bulk_preview()
+
+    def reset_bulk_preview(self):
+        self.bulk_plan = None
+        self.bulk_apply_btn.setEnabled(False)
+        self.bulk_preview_grid.setRowCount(0)
+        self.bulk_preview_label.setText("Preview to see how many rows will change.")
+
+    def preview_bulk_edit(self):
+        column = self.bulk_column_combo.currentText()
+        order_columns = [(self.sort_column, self.sort_order)] if self.sort_column else []
+        try:
+            plan = sqlite_core.plan_bulk_change(
+                self.current_table, column, self.column_types.get(column, ""), self.bulk_operation_combo.currentData(),
+                self.bulk_find_input.text(), self.bulk_replacement_input.text(), self.current_filter, order_columns,
+                self.key_columns)
+            with self.connections.reader() as conn:
+                count, sample = sqlite_core.preview_bulk_change(conn, self.current_table, plan)
+        except (ValueError, sqlite3.Error) as e:
+            self.reset_bulk_preview()
+            QMessageBox.warning(self, "Bulk Edit", str(e))
+            return
+
+        self.bulk_preview_grid.setRowCount(len(sample))
+        for row_idx, (old, new) in enumerate(sample):
+            for col_idx, value in enumerate((old, new)):
+                self.bulk_preview_grid.setItem(row_idx, col_idx, QTableWidgetItem(sqlite_core.profile_text(value) if value is not None else "NULL"))
+        if count:
+            self.bulk_preview_label.setText(f"{count:,} rows will change in one transaction. The first {len(sample)}:")
+        else:
+            self.bulk_preview_label.setText("No rows would change.")
+        self.bulk_plan = plan if count else None
+        self.bulk_apply_btn.setEnabled(bool(count))
+
+    def apply_bulk_edit(self, dialog):
+        if self.bulk_plan is None:
+            return
+        column = self.bulk_column_combo.currentText()
+        op = sqlite_diagnostics.start_operation("bulk_edit", table=self.current_table)
+        try:
+            with self.connections.writing() as conn:
+                count = sqlite_core.apply_bulk_change(conn, self.current_table, column, self.key_columns, self.bulk_plan)
+            op.finish(rows=count)
+        except Exception as e:
+            op.finish(error=str(e))
+            QMessageBox.critical(self, "Error", f"Bulk edit failed: {str(e)}")
+            return
+        self.table_written(self.current_table)
+        dialog.accept()
+        self.load_table_data()
+        QMessageBox.information(self, "Success", f"Updated {count:,} rows in column '{column}'.")
+
     def search_records(self):
         if not self.current_table:
             return
@@ -353,12 +2001,19 @@ class SQLiteEditor(QMainWindow):
         field_layout = QHBoxLayout()
         field_label = QLabel("Field:")
         self.field_combo = QComboBox()
-        columns = [self.table2.horizontalHeaderItem(i).text() for i in range(self.table2.columnCount())]
-        self.field_combo.addItems(columns)
+        self.field_combo.addItems(self.grid_model.columns)
         field_layout.addWidget(field_label)
         field_layout.addWidget(self.field_combo)
         dialog_layout.addLayout(field_layout)
 
+        match_layout = QHBoxLayout()
+        match_label = QLabel("Match:")
+        self.match_combo = QComboBox()
+        self.match_combo.addItems(["Contains", "Equals", "Starts with"])
+        match_layout.addWidget(match_label)
+        match_layout.addWidget(self.match_combo)
+        dialog_layout.addLayout(match_layout)
+
         search_btn = QPushButton("Search")
         search_btn.clicked.connect(lambda: self.perform_search(search_dialog))
         dialog_layout.addWidget(search_btn)
@@ -373,201 +2028,117 @@ class SQLiteEditor(QMainWindow):
             QMessageBox.warning(self, "Warning", "Please enter a search term.")
             return
 
-        # Get current displayed rows in table2
-        displayed_rows = []
-        for row in range(self.table2.rowCount()):
-            displayed_row = [
-                self.table2.item(row, col).data(Qt.ItemDataRole.UserRole) if self.table2.item(row, col) else "" for col
-                in range(self.table2.columnCount())]
-            displayed_rows.append(displayed_row)
-
-        # Find the column index for the field to search
-        columns = [self.table2.horizontalHeaderItem(i).text() for i in range(self.table2.columnCount())]
-        field_idx = columns.index(field_name) if field_name in columns else -1
-        if field_idx == -1:
+        if field_name not in self.grid_model.columns:
             QMessageBox.warning(self, "Error", f"Field '{field_name}' not found.")
             return
 
-        # Filter displayed rows based on the search term
-        filtered_rows = [
-            row for row in displayed_rows
-            if search_term.lower() in str(row[field_idx]).lower()
-        ]
+        previous_filter = self.current_filter
+        self.current_filter = (field_name, self.match_combo.currentText(), search_term)
+        op = sqlite_diagnostics.start_operation(
+            "search", table=self.current_table, field=field_name, mode=self.match_combo.currentText())
+        try:
+            filtered_rows = self.run_browse_query("search")
+        except Exception as e:
+            op.finish(error=str(e))
+            self.current_filter = previous_filter
+            QMessageBox.critical(self, "Error", f"Search failed: {str(e)}")
+            return
 
         if not filtered_rows:
-            QMessageBox.warning(self, "No Matches", f"No records found where {field_name} contains '{search_term}'.")
+            op.finish(rows=0)
+            self.current_filter = previous_filter
+            QMessageBox.warning(self, "No Matches", f"No records found where {field_name} {self.match_combo.currentText().lower()} '{search_term}'.")
             dialog.accept()
             return
 
-        # Update table2 with filtered rows
-        self.table2.blockSignals(True)
-        self.table2.clearContents()
-        self.table2.setRowCount(len(filtered_rows))
-
-        for row_idx, row in enumerate(filtered_rows):
-            for col_idx, value in enumerate(row):
-                display_text = "Null" if value in (None, "", "NULL") else str(value)
-                actual_value = "" if value in (None, "", "NULL") else str(value)
-                item = QTableWidgetItem(display_text)
-                item.setData(Qt.ItemDataRole.UserRole, actual_value)
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.table2.setItem(row_idx, col_idx, item)
-
-        self.table2.blockSignals(False)
-        self.remove_btn.setEnabled(len(filtered_rows) > 0)
+        self.populate_table(filtered_rows)
+        op.finish(rows=len(filtered_rows))
+        self.show_all_btn.setEnabled(True)
+        self.remove_btn.setEnabled(len(filtered_rows) > 0 and not self.read_only)
         self.search_btn.setEnabled(len(filtered_rows) > 0)
         self.changes_made = False
         dialog.accept()
 
-    def edit_cell(self, row, column):
-        if self.active_editor:
-            try:
-                self.active_editor.returnPressed.disconnect()
-                self.active_editor.editingFinished.disconnect()
-            except TypeError:
-                pass
-            self.active_editor.deleteLater()
-            self.active_editor = None
-
-        column_name = self.table2.horizontalHeaderItem(column).text()
-        constraints = self.column_constraints.get(column_name, {}) or {}
-        current_item = self.table2.item(row, column)
-        current_value = current_item.data(Qt.ItemDataRole.UserRole) if current_item else ""
-        if current_value is None:
-            current_value = ""
-
-        self.active_editor = QLineEdit(self.table2)
-        self.active_editor.setText(current_value)
-
-        rect = self.table2.visualItemRect(current_item)
-        self.active_editor.setGeometry(rect)
-        self.active_editor.show()
-        self.active_editor.setFocus()
+    def open_cell_viewer(self, index):
+        # Large values are not edited in the grid; the viewer pages through them instead
+        if isinstance(self.grid_model.value(index.row(), index.column()), sqlite_core.LazyCell):
+            CellViewer(self, index.row(), index.column()).exec()
 
-        def handle_edit():
-            if not self.active_editor:
-                return
-
-            new_value = self.active_editor.text()
-            error = None
-
-            max_length = constraints.get('max_length')
-            not_null = constraints.get('not_null', False)
+    def cell_error(self, column, text):
+        column_name = self.grid_model.columns[column]
+        constraints = self.column_constraints.get(column_name, {}) or {}
+        max_length = constraints.get('max_length')
+        if constraints.get('not_null', False) and not text.strip():
+            return f"Column '{column_name}' cannot be empty (NOT NULL constraint)."
+        if max_length is not None and len(text) > max_length:
+            return f"Value in column '{column_name}' exceeds maximum length of {max_length} characters."
+        return None
+
+    def set_cell_text(self, row, column, text):
+        # Called by the grid's delegate once the text has passed cell_error
+        self.grid_model.setData(self.grid_model.index(row, column), text)
+        self.changes_made = True
 
-            if not_null and not new_value.strip():
-                error = f"Column '{column_name}' cannot be empty (NOT NULL constraint)."
-            elif max_length is not None and len(new_value) > max_length:
-                error = f"Value in column '{column_name}' exceeds maximum length of {max_length} characters."
+    def row_index(self, row):
+        return self.grid_model.store_index(row)
 
-            if error:
-                QMessageBox.warning(self, "Validation Error", error)
-            else:
-                display_text = "Null" if not new_value else new_value
-                item = QTableWidgetItem(display_text)
-                item.setData(Qt.ItemDataRole.UserRole, new_value)
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.table2.setItem(row, column, item)
-
-                displayed_row = [
-                    self.table2.item(row, i).data(Qt.ItemDataRole.UserRole) if self.table2.item(row, i) else "" for i in
-                    range(self.table2.columnCount())]
-                for i, full_row in enumerate(self.full_data):
-                    if all(str(full_row[j]) == str(displayed_row[j]) for j in range(len(displayed_row)) if j != column):
-                        self.full_data[i][column] = new_value
-                        break
-                self.changes_made = True
-
-            try:
-                self.active_editor.returnPressed.disconnect()
-                self.active_editor.editingFinished.disconnect()
-            except TypeError:
-                pass
-            self.active_editor.deleteLater()
-            self.active_editor = None
-
-        self.active_editor.returnPressed.connect(handle_edit)
-        self.active_editor.editingFinished.connect(handle_edit)
-
-    def convert_value(self, value, col_type):
-        if value in (None, "", "NULL"):
-            return None
-        try:
-            if "INTEGER" in col_type.upper():
-                return int(value)
-            elif "FLOAT" in col_type.upper() or "REAL" in col_type.upper():
-                return float(value)
-            elif "CHAR" in col_type.upper() or "TEXT" in col_type.upper():
-                return str(value)
-            else:
-                return value
-        except (ValueError, TypeError):
-            return None
+    def row_key(self, row):
+        index = self.row_index(row)
+        return self.row_store.key(index) if index is not None else None
 
     def save_changes(self):
         if not self.current_table or not self.changes_made:
             return
 
-        cursor = self.conn.cursor() if self.conn else None
-        if not cursor:
+        if not self.conn:
             QMessageBox.critical(self, "Error", "No database connection available.")
             return
 
+        op = sqlite_diagnostics.start_operation("save", table=self.current_table)
         try:
-            displayed_rows = []
-            for row in range(self.table2.rowCount()):
-                displayed_row = [
-                    self.table2.item(row, col).data(Qt.ItemDataRole.UserRole) if self.table2.item(row, col) else "" for
-                    col in range(self.table2.columnCount())]
-                displayed_rows.append(displayed_row)
-
-            for displayed_row in displayed_rows:
-                found = False
-                for i, full_row in enumerate(self.full_data):
-                    if all(str(full_row[j]) == str(displayed_row[j]) for j in range(len(displayed_row))):
-                        self.full_data[i] = displayed_row
-                        found = True
-                        break
-                if not found:
-                    pass
-
-            columns = [self.table2.horizontalHeaderItem(i).text() for i in range(self.table2.columnCount())]
-            student_id_idx = columns.index("Student_ID") if "Student_ID" in columns else -1
-            if student_id_idx != -1:
-                student_ids = [row[student_id_idx] for row in self.full_data]
-                if any(not sid.strip() for sid in student_ids):
-                    raise ValueError("Student_ID cannot be empty (NOT NULL constraint).")
-                if len(student_ids) != len(set(student_ids)):
-                    raise ValueError("Duplicate Student_ID found. Student_ID must be unique.")
-
-            escaped_table_name = self.current_table.replace('"', '""')
-            cursor.execute(f'DELETE FROM "{escaped_table_name}"')
-            placeholders = ",".join(["?"] * len(columns))
-
-            for row in self.full_data:
-                values = row
-                for col_idx, col_name in enumerate(columns):
-                    constraints = self.column_constraints.get(col_name, {})
-                    max_length = constraints.get('max_length')
-                    not_null = constraints.get('not_null', False)
-                    value = values[col_idx]
-
-                    if not_null and not value.strip():
-                        raise ValueError(f"Column '{col_name}' cannot be empty (NOT NULL constraint).")
-                    if max_length is not None and len(value) > max_length:
-                        raise ValueError(
-                            f"Value in column '{col_name}' exceeds maximum length of {max_length} characters.")
-
-                converted_values = [self.convert_value(val, self.column_types[columns[i]]) for i, val in
-                                    enumerate(values)]
-                cursor.execute(f'INSERT INTO "{escaped_table_name}" VALUES ({placeholders})', converted_values)
-
-            self.conn.commit()
+            columns = list(self.grid_model.columns)
+            model_rows = self.grid_model.edited_rows()
+            edited_rows = [(row_id if row_id >= 0 else None, texts) for row_id, texts in model_rows]
+
+            # Only rows that were added, edited or removed are validated and written
+            deleted_keys = [self.row_store.key(index) for index in self.grid_model.removed]
+            changes = sqlite_core.diff_rows(self.row_store, edited_rows, deleted_keys)
+            sqlite_core.validate_changes(columns, self.column_constraints, changes)
+            with self.connections.writing() as conn:
+                # UNIQUE, CHECK and NOT NULL conflicts are all reported before anything is written
+                inserted_keys, written, rekeyed = sqlite_core.save_row_changes(
+                    conn, self.current_table, columns, self.column_types, self.key_columns, changes)
+            self.table_written(self.current_table)
+
+            # Store what was written, as converted, and show the saved rows from the store
+            new_keys = iter(inserted_keys)
+            committed = []
+            for (row_id, texts), (index, _) in zip(model_rows, edited_rows):
+                if index is None:
+                    key = next(new_keys)
+                    index = self.row_store.append(key, [None] * len(columns))
+                else:
+                    key = self.row_store.key(index)
+                    if key in rekeyed:
+                        key = rekeyed[key]
+                        self.row_store.set_key(index, key)
+                for column, value in written.get(key, {}).items():
+                    self.row_store.set_value(index, column, value)
+                committed.append((row_id, index))
+            self.grid_model.commit_rows(committed)
+            self.grid_model.refresh()
+            self.grid_model.saved()
             self.changes_made = False
+            op.finish(rows=len(changes["updates"]) + len(changes["inserts"]) + len(changes["deletes"]))
             QMessageBox.information(self, "Success", "Changes saved successfully!")
+        except sqlite_core.ConstraintConflicts as e:
+            op.finish(error="constraint conflicts")
+            QMessageBox.warning(self, "Validation Error", f"Nothing was saved. These rows conflict with the table's constraints:\n\n{e}")
         except Exception as e:
+            op.finish(error=str(e))
             QMessageBox.critical(self, "Error", f"Failed to save changes: {str(e)}")
         finally:
-            cursor.close()
+            op.finish()
 
     def truncate_records(self):
         if not self.current_table:
@@ -592,137 +2163,342 @@ class SQLiteEditor(QMainWindow):
         confirm_box.exec()
 
         if confirm_box.clickedButton() == yes_button:
-            cursor = self.conn.cursor() if self.conn else None
-            if not cursor:
+            if not self.conn:
                 QMessageBox.critical(self, "Error", "No database connection available.")
                 return
 
             try:
-                escaped_table_name = self.current_table.replace('"', '""')
-                cursor.execute(f'DELETE FROM "{escaped_table_name}"')
-                self.conn.commit()
+                with self.connections.writing() as conn:
+                    sqlite_core.truncate_table(conn, self.current_table)
+                self.table_written(self.current_table)
+                self.changes_made = False
                 self.load_table_data()
                 QMessageBox.information(self, "Success", "All records deleted")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Truncate failed: {str(e)}")
-            finally:
-                cursor.close()
-
-    def normalize_date(self, date_str):
-        # Remove extra spaces and handle various date formats
-        date_str = date_str.strip().replace(" ", "")
-        # Try parsing common formats
-        for fmt in ["%d-%m-%Y", "%d/%m/%Y", "%d-%m-%y", "%d/%m/%y"]:
-            try:
-                from datetime import datetime
-                date_obj = datetime.strptime(date_str, fmt)
-                return date_obj.strftime("%d-%m-%Y")
-            except ValueError:
-                continue
-        # If parsing fails, return the original (will fail validation if too long)
-        return date_str
 
     def import_csv(self):
         if not self.current_table:
             return
 
+        if not self.connections:
+            QMessageBox.critical(self, "Error", "No database connection available.")
+            return
+        if self.import_worker or self.connections.writer_busy():
+            QMessageBox.warning(self, "Import Running", "Please wait for the current import to finish.")
+            return
+
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Import CSV", "", "CSV files (*.csv)"
         )
         if file_path:
-            cursor = self.conn.cursor() if self.conn else None
-            if not cursor:
-                QMessageBox.critical(self, "Error", "No database connection available.")
+            # Non-modal, so the table can still be browsed and searched while the rows are written
+            self.import_worker = ImportWorker(self.connections, self.current_table, file_path)
+            self.import_progress = QProgressDialog(f"Importing into '{self.current_table}'...", "Cancel", 0, 0, self)
+            self.import_progress.setWindowTitle("Import CSV")
+            self.import_progress.setWindowModality(Qt.WindowModality.NonModal)
+            self.import_progress.setMinimumDuration(0)
+            self.import_progress.canceled.connect(self.import_worker.cancel)
+            self.import_worker.progress.connect(
+                lambda count: self.import_progress.setLabelText(f"Imported {count:,} rows..."))
+            self.import_worker.succeeded.connect(self.finish_import)
+            self.import_worker.failed.connect(self.fail_import)
+            self.import_worker.start()
+
+    def end_import(self):
+        self.import_worker.wait()
+        table_name = self.import_worker.table_name
+        self.import_worker = None
+        self.import_progress.reset()
+        self.table_written(table_name)
+        return table_name
+
+    def finish_import(self, count):
+        table_name = self.end_import()
+        if table_name == self.current_table:
+            if self.changes_made:
+                QMessageBox.information(
+                    self, "Success", f"Imported {count} records. Save or discard your changes and reload the table to see them.")
                 return
+            self.load_table_data()
+        QMessageBox.information(self, "Success", f"Imported {count} records")
 
-            try:
-                with open(file_path, "r") as f:
-                    reader = csv.reader(f)
-                    header = next(reader)
-
-                    escaped_table_name = self.current_table.replace('"', '""')
-                    cursor.execute(f'PRAGMA table_info("{escaped_table_name}")')
-                    db_columns = [col[1] for col in cursor.fetchall()]
-
-                    if header != db_columns:
-                        QMessageBox.critical(self, "Error", "CSV header doesn't match table columns")
-                        return
-
-                    placeholders = ",".join(["?"] * len(db_columns))
-                    current_data = [list(row) for row in self.full_data]
-                    birthdate_idx = db_columns.index("Birthdate") if "Birthdate" in db_columns else -1
-
-                    for row in reader:
-                        for col_idx, col_name in enumerate(db_columns):
-                            constraints = self.column_constraints.get(col_name, {})
-                            max_length = constraints.get('max_length')
-                            not_null = constraints.get('not_null', False)
-                            value = row[col_idx]
-
-                            if col_name == "Birthdate":
-                                value = self.normalize_date(value)
-                                row[col_idx] = value
-
-                            if not_null and not value.strip():
-                                raise ValueError(f"Column '{col_name}' cannot be empty (NOT NULL constraint).")
-                            if max_length is not None and len(value) > max_length:
-                                raise ValueError(
-                                    f"Value in column '{col_name}' exceeds maximum length of {max_length} characters.")
-
-                        converted_row = [
-                            self.convert_value(row[i], self.column_types[db_columns[i]])
-                            for i in range(len(row))
-                        ]
-                        cursor.execute(
-                            f'INSERT INTO "{escaped_table_name}" VALUES ({placeholders})',
-                            converted_row
-                        )
-                        row_count = self.table2.rowCount()
-                        self.table2.setRowCount(row_count + 1)
-                        for col_idx, value in enumerate(row):
-                            display_text = "Null" if value in (None, "", "NULL") else str(value)
-                            actual_value = "" if value in (None, "", "NULL") else str(value)
-                            item = QTableWidgetItem(display_text)
-                            item.setData(Qt.ItemDataRole.UserRole, actual_value)
-                            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                            self.table2.setItem(row_count, col_idx, item)
-                        current_data.append(row)
-
-                    self.full_data = current_data
-                    self.conn.commit()
-                    self.changes_made = False
-                    QMessageBox.information(self, "Success", f"Imported {reader.line_num - 1} records")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"CSV import failed: {str(e)}")
-            finally:
-                cursor.close()
+    def fail_import(self, error):
+        self.end_import()
+        if error == "Cancelled.":
+            QMessageBox.information(self, "Import Cancelled", "The import was cancelled; no rows were added.")
+        else:
+            QMessageBox.critical(self, "Error", f"CSV import failed: {error}")
 
     def export_csv(self):
         if not self.current_table:
             return
+        if self.changes_made:
+            QMessageBox.warning(self, "Unsaved Changes", "Please save your changes before exporting.")
+            return
 
         file_path, _ = QFileDialog.getSaveFileName(
             self, "Export to CSV", "", "CSV files (*.csv)"
         )
         if file_path:
+            op = sqlite_diagnostics.start_operation("export", table=self.current_table, path=file_path)
             try:
-                with open(file_path, "w", newline="") as f:
-                    writer = csv.writer(f)
-                    columns = [self.table2.horizontalHeaderItem(i).text() for i in range(self.table2.columnCount())]
-                    writer.writerow(columns)
-
-                    for row in range(self.table2.rowCount()):
-                        row_data = []
-                        for col in range(self.table2.columnCount()):
-                            item = self.table2.item(row, col)
-                            value = item.data(Qt.ItemDataRole.UserRole) if item else ""
-                            row_data.append(value)
-                        writer.writerow(row_data)
-
-                    QMessageBox.information(self, "Success", "Data exported successfully")
+                # Streams the rows shown in the grid (same filter and sort) from a reader
+                with self.connections.reader() as conn:
+                    count = sqlite_core.export_table_csv(
+                        conn, self.current_table, file_path, self.current_filter, self.sort_column, self.sort_order)
+                op.finish(rows=count)
+                QMessageBox.information(self, "Success", "Data exported successfully")
             except Exception as e:
+                op.finish(error=str(e))
                 QMessageBox.critical(self, "Error", f"Export failed: {str(e)}")
 
+    def analyze_storage(self):
+        if not self.connections:
+            return
+        self.storage_btn.setEnabled(False)
+        self.storage_label.setText("Analyzing storage...")
+        self.storage_worker = StorageWorker(self.connections)
+        self.storage_worker.results.connect(self.show_storage)
+        self.storage_worker.failed.connect(self.fail_storage)
+        self.storage_worker.start()
+
+    def show_storage(self, rows, source):
+        self.storage_btn.setEnabled(self.connections is not None)
+        self.storage_table.setSortingEnabled(False)
+        self.storage_table.setRowCount(len(rows))
+        for row_idx, info in enumerate(rows):
+            self.storage_table.setItem(row_idx, 0, QTableWidgetItem(info["name"]))
+            self.storage_table.setItem(row_idx, 1, QTableWidgetItem(info["type"]))
+            self.storage_table.setItem(row_idx, 2, QTableWidgetItem(info["table"]))
+            for col_idx, key in ((3, "rows"), (4, "pages"), (8, "overflow")):
+                value = info[key]
+                self.storage_table.setItem(row_idx, col_idx, SortableItem("n/a" if value is None else f"{value:,}", value))
+            for col_idx, key in ((5, "size"), (6, "payload"), (7, "unused"), (9, "avg_row")):
+                value = info[key]
+                self.storage_table.setItem(row_idx, col_idx, SortableItem("n/a" if value is None else sqlite_core.format_bytes(value), value))
+        self.storage_table.setSortingEnabled(True)
+        self.storage_table.sortItems(5, Qt.SortOrder.DescendingOrder)
+        self.storage_table.resizeColumnsToContents()
+        total = sum(info["size"] for info in rows)
+        if source == "dbstat":
+            self.storage_label.setText(f"Measured with dbstat: {sqlite_core.format_bytes(total)} in tables and indexes.")
+        else:
+            self.storage_label.setText(
+                f"dbstat is not available in this SQLite build; sizes are estimated from sampled rows "
+                f"(about {sqlite_core.format_bytes(total)}).")
+
+    def fail_storage(self, error):
+        self.storage_btn.setEnabled(self.connections is not None)
+        self.storage_label.setText("Storage analysis failed.")
+        QMessageBox.critical(self, "Error", f"Storage analysis failed: {error}")
+
+    def refresh_maintenance_stats(self):
+        if not self.connections:
+            return
+        stats = {}
+        with self.connections.reader() as conn:
+            for pragma in ("page_size", "page_count", "freelist_count", "auto_vacuum", "journal_mode"):
+                stats[pragma] = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+        page_count = stats["page_count"] or 1
+        self.maintenance_labels["file_size"].setText(sqlite_core.format_bytes(os.path.getsize(self.db_path)))
+        self.maintenance_labels["page_size"].setText(sqlite_core.format_bytes(stats["page_size"]))
+        self.maintenance_labels["page_count"].setText(f"{stats['page_count']:,}")
+        self.maintenance_labels["freelist"].setText(
+            f"{stats['freelist_count']:,} ({sqlite_core.format_bytes(stats['freelist_count'] * stats['page_size'])} reclaimable)")
+        self.maintenance_labels["fragmentation"].setText(f"{100 * stats['freelist_count'] / page_count:.1f}% of pages free")
+        self.maintenance_labels["auto_vacuum"].setText({0: "NONE", 1: "FULL", 2: "INCREMENTAL"}.get(stats["auto_vacuum"], "?"))
+        self.maintenance_labels["journal_mode"].setText(str(stats["journal_mode"]).upper())
+
+    def run_maintenance(self, task):
+        if not self.conn:
+            return
+        if self.changes_made:
+            QMessageBox.warning(self, "Unsaved Changes", "Please save your changes before running maintenance.")
+            return
+        if self.connections.writer_busy():
+            QMessageBox.warning(self, "Import Running", "Please wait for the current import to finish.")
+            return
+        target_path = None
+        if task == "vacuum_into":
+            target_path, _ = QFileDialog.getSaveFileName(
+                self, "Vacuum Into", "", "SQLite files (*.db *.sqlite *.sqlite3)"
+            )
+            if not target_path:
+                return
+            if os.path.exists(target_path):
+                QMessageBox.warning(self, "Warning", "VACUUM INTO needs a new file. Please choose a file name that does not exist.")
+                return
+        self.conn.commit()
+
+        self.maintenance_worker = MaintenanceWorker(self.db_path, task, target_path, self.profile_combo.currentText())
+        self.maintenance_progress = QProgressDialog("Starting...", "Cancel", 0, 0, self)
+        self.maintenance_progress.setWindowTitle("Maintenance")
+        self.maintenance_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.maintenance_progress.setMinimumDuration(0)
+        self.maintenance_progress.canceled.connect(self.maintenance_worker.cancel)
+        self.maintenance_worker.progress.connect(self.update_maintenance_progress)
+        self.maintenance_worker.succeeded.connect(self.finish_maintenance)
+        self.maintenance_worker.failed.connect(self.fail_maintenance)
+        for button in self.maintenance_buttons:
+            button.setEnabled(False)
+        self.maintenance_worker.start()
+
+    def update_maintenance_progress(self, done, total, message):
+        self.maintenance_progress.setMaximum(total)
+        if total:
+            self.maintenance_progress.setValue(done)
+        self.maintenance_progress.setLabelText(message)
+
+    def finish_maintenance(self, message):
+        self.maintenance_progress.reset()
+        for button in self.maintenance_buttons:
+            button.setEnabled(True)
+        self.refresh_maintenance_stats()
+        QMessageBox.information(self, "Maintenance", message)
+
+    def fail_maintenance(self, error):
+        self.maintenance_progress.reset()
+        for button in self.maintenance_buttons:
+            button.setEnabled(True)
+        self.refresh_maintenance_stats()
+        QMessageBox.critical(self, "Error", f"Maintenance failed: {error}")
+
+    def selected_sql(self):
+        selection = self.sql_editor.textCursor().selectedText()
+        # QTextCursor returns paragraph separators instead of newlines
+        text = selection.replace("\u2029", "\n") if selection else self.sql_editor.toPlainText()
+        return split_sql_statements(text)
+
+    def add_sql_history(self, text):
+        text = text.strip()
+        idx = self.sql_history.findData(text)
+        if idx >= 0:
+            self.sql_history.removeItem(idx)
+        self.sql_history.insertItem(0, " ".join(text.split())[:200], text)
+        while self.sql_history.count() > CONSOLE_HISTORY_SIZE:
+            self.sql_history.removeItem(self.sql_history.count() - 1)
+        self.sql_history.setCurrentIndex(0)
+
+    def load_sql_history(self, index):
+        text = self.sql_history.itemData(index)
+        if text:
+            self.sql_editor.setPlainText(text)
+
+    def log_sql_message(self, message):
+        self.sql_messages.appendPlainText(message)
+
+    def run_sql(self):
+        if not self.console_conn or self.sql_worker:
+            return
+        statements = self.selected_sql()
+        if not statements:
+            return
+        self.add_sql_history(";\n".join(statements))
+        self.sql_model.close()
+        self.sql_model = QueryResultModel()
+        self.sql_grid.setModel(self.sql_model)
+        self.sql_messages.clear()
+        self.sql_status.setText("Running...")
+        self.sql_run_btn.setEnabled(False)
+        self.sql_explain_btn.setEnabled(False)
+        self.sql_cancel_btn.setEnabled(True)
+        self.sql_start = time.perf_counter()
+
+        self.sql_worker = SqlConsoleWorker(self.console_conn, statements)
+        self.sql_worker.statement_done.connect(self.show_sql_statement)
+        self.sql_worker.result_ready.connect(self.show_sql_result)
+        self.sql_worker.succeeded.connect(self.finish_sql)
+        self.sql_worker.failed.connect(self.fail_sql)
+        self.sql_worker.start()
+
+    def cancel_sql(self):
+        if self.sql_worker:
+            self.sql_worker.cancel()
+
+    def show_sql_statement(self, sql, elapsed_ms, row_count, note):
+        summary = " ".join(sql.split())
+        if len(summary) > 120:
+            summary = summary[:117] + "..."
+        if note:
+            result = f"{row_count:,} {note}"
+        elif row_count >= 0:
+            result = f"{row_count:,} rows affected"
+        else:
+            result = "OK"
+        self.log_sql_message(f"{summary}\n    {result} in {elapsed_ms:.1f} ms")
+
+    def show_sql_result(self, cursor, columns, rows, more):
+        self.sql_model = QueryResultModel(columns, rows, cursor)
+        self.sql_grid.setModel(self.sql_model)
+        self.sql_results.setCurrentWidget(self.sql_grid)
+
+    def end_sql_run(self):
+        self.sql_worker = None
+        self.sql_run_btn.setEnabled(self.console_conn is not None)
+        self.sql_explain_btn.setEnabled(self.console_conn is not None)
+        self.sql_cancel_btn.setEnabled(False)
+
+    def finish_sql(self, schema_changed):
+        self.end_sql_run()
+        elapsed = time.perf_counter() - self.sql_start
+        more = " (scroll for more)" if self.sql_model.canFetchMore() else ""
+        self.sql_status.setText(f"Done in {elapsed:.2f} s, {self.sql_model.rowCount():,} rows shown{more}")
+        if self.console_conn.in_transaction:
+            self.log_sql_message("A transaction is still open. Run COMMIT or ROLLBACK to finish it.")
+        if self.sql_model.rowCount() == 0:
+            self.sql_results.setCurrentWidget(self.sql_messages)
+        if schema_changed:
+            self.refresh_table_list()
+
+    def fail_sql(self, sql, error):
+        self.end_sql_run()
+        self.sql_status.setText("Cancelled" if error == "Cancelled." else "Failed")
+        self.log_sql_message(f"{' '.join(sql.split())}\n    Error: {error}")
+        self.sql_results.setCurrentWidget(self.sql_messages)
+
+    def refresh_table_list(self):
+        changed = self.refresh_schema_nodes()
+        with self.connections.reader() as conn:
+            tables = sqlite_core.list_tables(conn)
+        if tables == [self.table_dropdown.itemText(i) for i in range(self.table_dropdown.count())]:
+            return changed
+        self.table_dropdown.blockSignals(True)
+        self.table_dropdown.clear()
+        self.table_dropdown.addItems(tables)
+        self.table_dropdown.blockSignals(False)
+        if self.current_table in tables:
+            self.table_dropdown.setCurrentText(self.current_table)
+        elif tables:
+            self.current_table = None
+            self.changes_made = False
+            self.table_dropdown.setCurrentIndex(0)
+            self.load_table_data()
+        return changed
+
+    def explain_sql(self):
+        if not self.console_conn or self.sql_worker:
+            return
+        statements = self.selected_sql()
+        if not statements:
+            return
+        self.sql_plan.clear()
+        cursor = self.console_conn.cursor()
+        try:
+            for sql in statements:
+                top = QTreeWidgetItem(self.sql_plan, [" ".join(sql.split())])
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                # Rows are (id, parent, notused, detail); parent 0 is the statement itself
+                nodes = {0: top}
+                for node_id, parent_id, _, detail in cursor.fetchall():
+                    nodes[node_id] = QTreeWidgetItem(nodes.get(parent_id, top), [detail])
+            self.sql_plan.expandAll()
+        except Exception as e:
+            QTreeWidgetItem(self.sql_plan, [f"Error: {str(e)}"])
+        finally:
+            cursor.close()
+        self.sql_results.setCurrentWidget(self.sql_plan)
+
     def close_database(self):
         if self.changes_made:
             if QMessageBox.question(
@@ -734,29 +2510,77 @@ class SQLiteEditor(QMainWindow):
 
     def _reset(self):
         self.db_path = None
-        if self.conn:
-            self.conn.close()
+        self.change_timer.stop()
+        if self.import_worker:
+            self.import_worker.cancel()
+            self.import_worker.wait()
+            self.import_worker = None
+            self.import_progress.reset()
+        if self.storage_worker:
+            self.storage_worker.wait()
+        if self.profile_worker:
+            self.profile_worker.cancel()
+            self.profile_worker.wait()
+            self.profile_worker = None
+            self.profile_progress.reset()
+        if self.sql_worker:
+            self.sql_worker.cancel()
+            self.sql_worker.wait()
+            self.sql_worker = None
+        self.sql_model.close()
+        self.sql_model = QueryResultModel()
+        self.sql_grid.setModel(self.sql_model)
+        if self.console_conn:
+            self.console_conn.close()
+        self.console_conn = None
+        if self.connections:
+            self.connections.close()
+        self.connections = None
         self.conn = None
         self.cursor = None
+        self.read_only = False
+        self.grid_model.editable = True
+        self.save_btn.setEnabled(True)
+        self.import_btn.setEnabled(True)
         self.db_label.setText("No database selected")
-        self.full_data = []
-
-        self.table2.blockSignals(True)
-        self.table2.clear()
-        self.table2.setHorizontalHeaderLabels([])
-        self.table2.setColumnCount(0)
-        self.table2.setRowCount(0)
-        self.table2.blockSignals(False)
+        self.row_store = None
+        self.key_columns = ["rowid"]
+        self.lazy_flags = []
+        self.page_cache.clear()
+
+        self.grid_model.set_columns([], [])
         self.tree1.clear()
         self.table_dropdown.clear()
         self.insert_btn.setEnabled(False)
+        self.paste_btn.setEnabled(False)
         self.remove_btn.setEnabled(False)
         self.search_btn.setEnabled(False)
         self.truncate_btn.setEnabled(False)
+        self.profile_btn.setEnabled(False)
+        self.bulk_btn.setEnabled(False)
         self.changes_made = False
         self.current_table = None
         self.column_types = {}
         self.column_constraints = {}
+        self.current_filter = None
+        self.sort_column = None
+        self.sort_order = "ASC"
+        self.show_all_btn.setEnabled(False)
+        self.table2.horizontalHeader().setSortIndicatorShown(False)
+        for button in self.maintenance_buttons:
+            button.setEnabled(False)
+        for label in self.maintenance_labels.values():
+            label.setText("-")
+        self.profile_status.setText("Not connected")
+        self.storage_btn.setEnabled(False)
+        self.storage_table.setRowCount(0)
+        self.storage_label.setText("Click 'Analyze Storage' to measure tables and indexes.")
+        self.sql_run_btn.setEnabled(False)
+        self.sql_explain_btn.setEnabled(False)
+        self.sql_cancel_btn.setEnabled(False)
+        self.sql_messages.clear()
+        self.sql_plan.clear()
+        self.sql_status.setText("")
 
 
 if __name__ == "__main__":
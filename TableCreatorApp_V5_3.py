@@ -2,11 +2,108 @@ import sys
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
     QLabel, QLineEdit, QComboBox, QPushButton, QCheckBox, QTextEdit, QTreeWidget,
-    QTreeWidgetItem, QFrame, QFileDialog, QMessageBox, QDialog, QTextBrowser
+    QTreeWidgetItem, QFrame, QFileDialog, QMessageBox, QDialog, QTextBrowser, QProgressDialog
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
 import sqlite3
 import os
+import html
+import time
+import sqlite_profiles
+import sqlite_diagnostics
+import sqlite_core
+
+
+class StatementWorker(QThread):
+    # Runs a list of statements in one transaction on its own connection. SQLite gives no
+    # completion estimate for a single statement, so progress reports elapsed time only.
+    progress = pyqtSignal(float)
+    succeeded = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_path, statements, profile_name=sqlite_profiles.DEFAULT_PROFILE):
+        super().__init__()
+        self.db_path = db_path
+        self.profile_name = profile_name
+        self.statements = statements
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        conn = sqlite_profiles.connect(self.db_path, self.profile_name, isolation_level=None)
+        start = time.perf_counter()
+
+        def on_progress():
+            self.progress.emit(time.perf_counter() - start)
+            return 1 if self.cancelled else 0
+
+        conn.set_progress_handler(on_progress, 200000)
+        op = sqlite_diagnostics.start_operation("statements", count=len(self.statements))
+        try:
+            conn.execute("BEGIN IMMEDIATE;")
+            try:
+                for statement in self.statements:
+                    conn.execute(statement)
+                conn.execute("COMMIT;")
+            except BaseException:
+                conn.execute("ROLLBACK;")
+                raise
+            op.finish()
+            self.succeeded.emit()
+        except sqlite3.OperationalError as e:
+            op.finish(error=str(e))
+            self.failed.emit("Cancelled." if self.cancelled else str(e))
+        except Exception as e:
+            op.finish(error=str(e))
+            self.failed.emit(str(e))
+        finally:
+            conn.close()
+
+
+class TableRebuildWorker(QThread):
+    # Runs sqlite_core.rebuild_table on its own connection, reporting rows copied
+    progress = pyqtSignal(int, int)
+    succeeded = pyqtSignal(list)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_path, table_name, temp_table, create_sql, col_map, chunk_size=50000,
+                 profile_name=sqlite_profiles.DEFAULT_PROFILE, new_name=None):
+        super().__init__()
+        self.db_path = db_path
+        self.profile_name = profile_name
+        self.table_name = table_name
+        self.new_name = new_name
+        self.temp_table = temp_table
+        self.create_sql = create_sql
+        self.col_map = col_map
+        self.chunk_size = chunk_size
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        conn = sqlite_profiles.connect(self.db_path, self.profile_name, isolation_level=None)
+        # Same as the app's own connection, so the rebuild ends with foreign keys enforced
+        conn.execute("PRAGMA foreign_keys = ON;")
+        op = sqlite_diagnostics.start_operation("rebuild", table=self.table_name)
+        try:
+            warnings = sqlite_core.rebuild_table(
+                conn, self.table_name, self.temp_table, self.create_sql, self.col_map, self.chunk_size,
+                progress=self.progress.emit, cancelled=lambda: self.cancelled, new_name=self.new_name)
+            op.finish()
+            self.succeeded.emit(warnings)
+        except sqlite_core.RebuildCancelled:
+            op.finish(error="cancelled")
+            self.failed.emit("Rebuild cancelled. The table was left unchanged.")
+        except Exception as e:
+            op.finish(error=str(e))
+            self.failed.emit(str(e))
+        finally:
+            conn.close()
+
 
 class TableCreatorApp(QMainWindow):
     def __init__(self):
@@ -45,6 +142,19 @@ class TableCreatorApp(QMainWindow):
         self.help_button.setToolTip("View help information for using the application")
         self.help_button.clicked.connect(self.show_help_dialog)
         db_button_layout.addWidget(self.help_button)
+        self.diagnostics_button = QPushButton("Diagnostics")
+        self.diagnostics_button.setToolTip("Show statement and operation timings, the statement trace and slow operations")
+        self.diagnostics_button.clicked.connect(lambda: sqlite_diagnostics.show_diagnostics(self))
+        db_button_layout.addWidget(self.diagnostics_button)
+        db_button_layout.addWidget(QLabel("Profile:"))
+        self.profile_combo = QComboBox()
+        self.profile_combo.setToolTip("Connection PRAGMA profile applied to every database connection")
+        for idx, name in enumerate(sqlite_profiles.CONNECTION_PROFILES):
+            self.profile_combo.addItem(name)
+            self.profile_combo.setItemData(idx, sqlite_profiles.PROFILE_DESCRIPTIONS[name], Qt.ItemDataRole.ToolTipRole)
+        self.profile_combo.setCurrentText(sqlite_profiles.DEFAULT_PROFILE)
+        self.profile_combo.currentTextChanged.connect(self.change_profile)
+        db_button_layout.addWidget(self.profile_combo)
         self.main_layout.addLayout(db_button_layout)
 
         # Table selection
@@ -60,6 +170,10 @@ class TableCreatorApp(QMainWindow):
         self.new_table_button.setToolTip("Create a new table")
         self.new_table_button.clicked.connect(self.add_new_table)
         table_select_layout.addWidget(self.new_table_button)
+        self.indexes_button = QPushButton("Indexes")
+        self.indexes_button.setToolTip("Create or drop indexes on the selected table")
+        self.indexes_button.clicked.connect(self.show_index_manager)
+        table_select_layout.addWidget(self.indexes_button)
         self.main_layout.addLayout(table_select_layout)
 
         # Table name entry
@@ -246,12 +360,20 @@ class TableCreatorApp(QMainWindow):
         self.ok_button.setToolTip("Apply changes to the database")
         self.ok_button.clicked.connect(self.apply_table_changes)
         button_layout.addWidget(self.ok_button)
+        self.dry_run_button = QPushButton("Dry Run")
+        self.dry_run_button.setToolTip("Show the migration plan and its estimated cost without changing the database")
+        self.dry_run_button.clicked.connect(self.dry_run_table_changes)
+        button_layout.addWidget(self.dry_run_button)
         self.cancel_button = QPushButton("Cancel")
         self.cancel_button.setToolTip("Close without saving")
         self.cancel_button.clicked.connect(self.close_app)
         button_layout.addWidget(self.cancel_button)
         self.main_layout.addLayout(button_layout)
 
+        # Status bar readout of the active connection settings
+        self.profile_status = QLabel("Not connected")
+        self.statusBar().addPermanentWidget(self.profile_status)
+
         # Initial update
         self.update_sql_display()
         self.select_database_file()
@@ -275,7 +397,12 @@ class TableCreatorApp(QMainWindow):
         </ul>
         </p>
         <p><b>Foreign Keys:</b> FK checkbox enables when a field matches another table’s primary key field in name and type. Select reference table and column.</p>
-        <p><b>Applying Changes:</b> Click 'Apply Changes' to save to the database.</p>
+        <p><b>Indexes:</b> Click 'Indexes' to create composite, partial (Where), expression or covering indexes
+        on the selected table, or to drop them. Sizes and selectivity are shown for each index.</p>
+        <p><b>Applying Changes:</b> Click 'Apply Changes' to save to the database. Adding, renaming or dropping
+        fields is done in place when SQLite allows it; other changes rebuild the table.</p>
+        <p><b>Diagnostics:</b> Shows how long each kind of statement and operation took, a trace of recent
+        statements, and operations slow enough to be written to the slow log.</p>
         """)
         layout.addWidget(help_text)
         ok_button = QPushButton("OK")
@@ -288,18 +415,39 @@ class TableCreatorApp(QMainWindow):
         self.create_db_button.setEnabled(True)
         self.open_db_button.setEnabled(True)
 
+    def change_profile(self, profile_name):
+        print(f"change_profile: {profile_name}")
+        if not self.conn:
+            return
+        try:
+            self.conn.commit()
+            sqlite_profiles.apply_profile(self.conn, profile_name)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to apply profile '{profile_name}': {str(e)}")
+            print(f"change_profile: Error - {str(e)}")
+        self.update_profile_status()
+
+    def update_profile_status(self):
+        if not self.conn:
+            self.profile_status.setText("Not connected")
+            return
+        self.profile_status.setText(
+            f"{self.profile_combo.currentText()}: {sqlite_profiles.describe_connection(self.conn)}")
+
     def create_new_database(self):
         file_path, _ = QFileDialog.getSaveFileName(self, "Create New SQLite Database", "", "SQLite Database (*.db);;All Files (*.*)")
         if file_path:
             print(f"create_new_database: Creating {file_path}")
+            op = sqlite_diagnostics.start_operation("create", path=file_path)
             try:
                 os.makedirs(os.path.dirname(file_path), exist_ok=True)
                 if self.conn:
                     self.conn.close()
                 self.db_path = file_path
-                self.conn = sqlite3.connect(self.db_path)
+                self.conn = sqlite_profiles.connect(self.db_path, self.profile_combo.currentText(), new_database=True)
                 self.cursor = self.conn.cursor()
                 self.cursor.execute("PRAGMA foreign_keys = ON;")
+                self.update_profile_status()
                 self.db_label.setText(f"Database in use: {self.db_path}")
                 self.tables = {}
                 self.current_table = None
@@ -312,32 +460,36 @@ class TableCreatorApp(QMainWindow):
                 self.clear_table_ui()
                 self.create_db_button.setEnabled(False)
                 self.open_db_button.setEnabled(False)
+                op.finish()
                 print("create_new_database: Success")
             except Exception as e:
+                op.finish(error=str(e))
                 QMessageBox.critical(self, "Error", f"Failed to create database: {str(e)}")
                 self.db_label.setText("Database in use: (not selected)")
                 self.conn = None
                 self.cursor = None
+                self.update_profile_status()
                 print(f"create_new_database: Error - {str(e)}")
 
     def open_existing_database(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Open SQLite Database", "", "SQLite Database (*.db);;All Files (*.*)")
         if file_path:
             print(f"open_existing_database: Opening {file_path}")
+            op = sqlite_diagnostics.start_operation("open", path=file_path)
             try:
                 if self.conn:
                     self.conn.close()
                 self.db_path = file_path
-                self.conn = sqlite3.connect(self.db_path)
+                self.conn = sqlite_profiles.connect(self.db_path, self.profile_combo.currentText())
                 self.cursor = self.conn.cursor()
                 self.cursor.execute("PRAGMA foreign_keys = ON;")
+                self.update_profile_status()
                 self.db_label.setText(f"Database in use: {self.db_path}")
                 self.tables = {}
                 self.current_table = None
                 self.table_combo.blockSignals(True)
                 self.table_combo.clear()
-                self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-                tables = [row[0] for row in self.cursor.fetchall()]
+                tables = sqlite_core.list_tables(self.conn)
                 self.table_combo.addItems(tables)
                 self.table_combo.blockSignals(False)
                 self.table_name_entry.blockSignals(True)
@@ -345,99 +497,22 @@ class TableCreatorApp(QMainWindow):
                 self.table_name_entry.blockSignals(False)
 
                 for table_name in tables:
-                    self.tables[table_name] = []
-                    self.cursor.execute(f"PRAGMA table_info('{table_name}');")
-                    columns = self.cursor.fetchall()
-                    self.cursor.execute(f"PRAGMA foreign_key_list('{table_name}');")
-                    fk_list = self.cursor.fetchall()
-                    self.cursor.execute(f"PRAGMA index_list('{table_name}');")
-                    indexes = self.cursor.fetchall()
-                    pk_fields = []
-                    for col in columns:
-                        cid, name, col_type, notnull, default, pk = col
-                        range_val = ""
-                        display_type = col_type
-                        if col_type.startswith(("CHAR", "VCHAR", "NCHAR", "NVCHAR")):
-                            if "(" in col_type and ")" in col_type:
-                                display_type = col_type[:col_type.index("(")]
-                                range_val = col_type[col_type.index("(")+1:col_type.index(")")]
-                        elif col_type.upper() in ("DATE", "BOOLEAN"):
-                            display_type = col_type.upper()
-                            col_type = "TEXT" if col_type.upper() == "DATE" else "INTEGER"
-                        field = {
-                            "name": name,
-                            "type": col_type,
-                            "range": range_val,
-                            "display_type": display_type,
-                            "not_null": bool(notnull),
-                            "primary_key": bool(pk),
-                            "autoincrement": False,
-                            "unique": False,
-                            "default": default or "",
-                            "check": "",
-                            "foreign_key": {"table": "", "column": "", "on_delete": "NO ACTION", "on_update": "NO ACTION"}
-                        }
-                        if pk:
-                            pk_fields.append(field)
-                        self.tables[table_name].append(field)
-                    self.cursor.execute(f"SELECT sql FROM sqlite_master WHERE type='table' AND name='{table_name}';")
-                    create_sql = self.cursor.fetchone()
-                    if create_sql:
-                        create_sql = create_sql[0].upper()
-                        if "AUTOINCREMENT" in create_sql:
-                            for field in pk_fields:
-                                if field["type"].startswith("INTEGER"):
-                                    field["autoincrement"] = True
-                        if "CHECK" in create_sql:
-                            check_start = create_sql.find("CHECK")
-                            check_end = create_sql.find(")", check_start)
-                            check_expr = create_sql[check_start+6:check_end]
-                            for field in self.tables[table_name]:
-                                if field["name"] in check_expr:
-                                    field["check"] = check_expr
-                    for idx in indexes:
-                        idx_name = idx[1]
-                        is_unique = idx[2]
-                        if is_unique:
-                            self.cursor.execute(f"PRAGMA index_info('{idx_name}');")
-                            idx_cols = self.cursor.fetchall()
-                            for idx_col in idx_cols:
-                                cid = idx_col[2]
-                                for col in columns:
-                                    if col[0] == cid:
-                                        col_name = col[1]
-                                        for field in self.tables[table_name]:
-                                            if field["name"] == col_name:
-                                                field["unique"] = True
-                                                break
-                                        break
-                    for fk in fk_list:
-                        col_name = fk[3]
-                        ref_table = fk[2]
-                        ref_column = fk[4]
-                        on_delete = fk[5] or "NO ACTION"
-                        on_update = fk[6] or "NO ACTION"
-                        for field in self.tables[table_name]:
-                            if field["name"] == col_name:
-                                field["foreign_key"] = {
-                                    "table": ref_table,
-                                    "column": ref_column,
-                                    "on_delete": on_delete,
-                                    "on_update": on_update
-                                }
-                                break
+                    self.tables[table_name] = sqlite_core.load_table_fields(self.conn, table_name)
                 self.clear_table_ui()
                 if tables:
                     self.table_combo.setCurrentText(tables[0])
                     self.switch_table(tables[0])
                 self.create_db_button.setEnabled(False)
                 self.open_db_button.setEnabled(False)
+                op.finish()
                 print("open_existing_database: Success")
             except Exception as e:
+                op.finish(error=str(e))
                 QMessageBox.critical(self, "Error", f"Failed to open database: {str(e)}")
                 self.db_label.setText("Database in use: (not selected)")
                 self.conn = None
                 self.cursor = None
+                self.update_profile_status()
                 print(f"open_existing_database: Error - {str(e)}")
 
     def add_new_table(self):
@@ -830,7 +905,8 @@ class TableCreatorApp(QMainWindow):
                 "unique": self.u_check.isChecked(),
                 "default": default_val,
                 "check": check_val,
-                "foreign_key": fk_data
+                "foreign_key": fk_data,
+                "original_name": self.tables[self.current_table][index].get("original_name")
             }
 
             item = QTreeWidgetItem([
@@ -1022,48 +1098,7 @@ class TableCreatorApp(QMainWindow):
         print("update_sql_display: Starting")
         try:
             table_name = self.table_name_entry.text().strip() or ""
-            sql = f'CREATE TABLE "{table_name}" (\n'
-            fields = self.tables.get(self.current_table, [])
-            pk_fields = [field for field in fields if field["primary_key"]]
-            fk_fields = [field for field in fields if field["foreign_key"]["table"]]
-
-            column_defs = []
-            for field in fields:
-                col_def = f'    "{field["name"]}" {field["type"]}'
-                if field["not_null"] and not field["primary_key"]:
-                    col_def += " NOT NULL"
-                if field["unique"] and not field["primary_key"]:
-                    col_def += " UNIQUE"
-                if field["default"]:
-                    col_def += f" DEFAULT '{field['default']}'"
-                if field["check"]:
-                    col_def += f" CHECK({field['check']})"
-                column_defs.append(col_def)
-
-            if pk_fields:
-                if len(pk_fields) == 1:
-                    pk_field = pk_fields[0]
-                    pk_name = pk_field["name"]
-                    if pk_field["autoincrement"] and field["type"].startswith("INTEGER"):
-                        pk_clause = f'    PRIMARY KEY("{pk_name}" AUTOINCREMENT)'
-                    else:
-                        pk_clause = f'    PRIMARY KEY("{pk_name}")'
-                else:
-                    pk_names = ", ".join(f'"{field["name"]}"' for field in pk_fields)
-                    pk_clause = f"    PRIMARY KEY({pk_names})"
-                column_defs.append(pk_clause)
-
-            for fk_field in fk_fields:
-                fk = fk_field["foreign_key"]
-                fk_clause = f'    FOREIGN KEY("{fk_field["name"]}") REFERENCES "{fk["table"]}"("{fk["column"]}")'
-                if fk["on_delete"] != "NO ACTION":
-                    fk_clause += f" ON DELETE {fk['on_delete']}"
-                if fk["on_update"] != "NO ACTION":
-                    fk_clause += f" ON UPDATE {fk['on_update']}"
-                column_defs.append(fk_clause)
-
-            sql += ",\n".join(column_defs)
-            sql += "\n);"
+            sql = sqlite_core.generate_create_sql(table_name, self.tables.get(self.current_table, []))
             self.sql_display.setText(sql)
             print("update_sql_display: Completed")
         except Exception as e:
@@ -1091,25 +1126,27 @@ class TableCreatorApp(QMainWindow):
                 sql = self.generate_sql()
                 self.cursor.execute(sql)
                 self.conn.commit()
+                self.tables[table_name] = sqlite_core.load_table_fields(self.conn, table_name)
                 QMessageBox.information(self, "Success", f"Table '{table_name}' created!")
             else:
-                new_sql = self.generate_sql()
-                temp_table = f"temp_{table_name}"
-                temp_sql = new_sql.replace(f'CREATE TABLE "{table_name}"', f'CREATE TABLE "{temp_table}"')
-                self.cursor.execute(temp_sql)
-                old_cols = []
-                self.cursor.execute(f"PRAGMA table_info('{table_name}');")
-                for col in self.cursor.fetchall():
-                    old_cols.append(col[1])
-                new_cols = [f["name"] for f in fields]
-                common_cols = [col for col in old_cols if col in new_cols]
-                if common_cols:
-                    cols_str = ", ".join(f'"{col}"' for col in common_cols)
-                    self.cursor.execute(f'INSERT INTO "{temp_table}" ({cols_str}) SELECT {cols_str} FROM "{table_name}";')
-                self.cursor.execute(f'DROP TABLE "{table_name}";')
-                self.cursor.execute(f'ALTER TABLE "{temp_table}" RENAME TO "{table_name}";')
-                self.conn.commit()
-                QMessageBox.information(self, "Success", f"Table '{table_name}' modified!")
+                plan = self.build_migration_plan(table_name)
+                if plan["mode"] == "none":
+                    QMessageBox.information(self, "No Changes", f"Table '{table_name}' is already up to date.")
+                    print("apply_table_changes: No changes")
+                    return
+                if not self.show_migration_plan(plan, allow_apply=True):
+                    print("apply_table_changes: Cancelled")
+                    return
+                if plan["mode"] == "in_place" and self.apply_in_place_changes(plan["statements"]):
+                    table_name = self.rename_table_entry(table_name, plan["new_name"])
+                    QMessageBox.information(self, "Success", f"Table '{table_name}' modified in place!")
+                    self.update_fk_check_state()
+                    print("apply_table_changes: Success (in place)")
+                    return
+                self.start_table_rebuild(table_name, plan["temp_table"], plan["temp_sql"], plan["col_map"],
+                                         plan["new_name"])
+                print("apply_table_changes: Rebuild started")
+                return
 
             if table_name not in [self.table_combo.itemText(i) for i in range(self.table_combo.count())]:
                 self.table_combo.blockSignals(True)
@@ -1123,51 +1160,335 @@ class TableCreatorApp(QMainWindow):
             print(f"apply_table_changes: Error - {str(e)}")
             raise
 
+    def dry_run_table_changes(self):
+        print("dry_run_table_changes: Starting")
+        if not self.current_table or not self.tables.get(self.current_table) or not self.conn:
+            QMessageBox.critical(self, "Error", "Select a database and a table with fields first")
+            return
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?;", (self.current_table,))
+        if self.cursor.fetchone() is None:
+            plan = {"table": self.current_table, "mode": "create", "statements": [self.generate_sql()]}
+        else:
+            plan = self.build_migration_plan(self.current_table)
+        self.show_migration_plan(plan, allow_apply=False)
+        print("dry_run_table_changes: Completed")
+
+    def build_migration_plan(self, table_name):
+        print(f"build_migration_plan: Planning {table_name}")
+        plan = sqlite_core.build_migration_plan(
+            self.conn, table_name, self.tables[table_name], self.table_name_entry.text().strip() or table_name)
+        print(f"build_migration_plan: Mode {plan['mode']}")
+        return plan
+
+    def show_migration_plan(self, plan, allow_apply):
+        print(f"show_migration_plan: Mode {plan['mode']}")
+        modes = {
+            "create": "Create new table",
+            "none": "No changes",
+            "in_place": "In place (ALTER TABLE)",
+            "rebuild": "Copy rebuild",
+        }
+        lines = [f"<h3>Migration plan for '{plan['table']}'</h3>", f"<p><b>Mode:</b> {modes[plan['mode']]}"]
+        if plan["mode"] in ("in_place", "rebuild"):
+            size = plan["bytes"]
+            size_text = "n/a" if size is None else sqlite_core.format_bytes(size)
+            if plan["pages"] is None:
+                size_text += " (estimated, dbstat unavailable)"
+            else:
+                size_text += f" in {plan['pages']:,} pages (table and {plan['index_count']} index(es))"
+            if not plan["rewrites_rows"]:
+                time_text = "instant (schema change only)"
+                temp_text = "none"
+            else:
+                time_text = sqlite_core.format_duration(plan["est_seconds"]) if plan["throughput"] else "n/a"
+                if plan["throughput"]:
+                    time_text += f" at a measured {plan['throughput']:,.0f} rows/s"
+                # New copy of the rows plus roughly the same again in the journal or WAL
+                temp_text = "n/a" if size is None else f"about {sqlite_core.format_bytes(2 * size)}"
+            lines += [
+                f"<br><b>Rows:</b> {plan['rows']:,}",
+                f"<br><b>Size:</b> {size_text}",
+                f"<br><b>Estimated time:</b> {time_text}",
+                f"<br><b>Temporary disk space:</b> {temp_text}</p>",
+            ]
+            if plan["mode"] == "in_place":
+                lines.append("<p>If SQLite rejects an ALTER TABLE statement the table is rebuilt instead.</p>")
+        lines.append("<pre>" + html.escape("\n".join(plan["statements"])) + "</pre>")
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Dry Run" if not allow_apply else "Confirm Changes")
+        dialog.setGeometry(250, 250, 600, 450)
+        layout = QVBoxLayout(dialog)
+        plan_text = QTextBrowser()
+        plan_text.setHtml("".join(lines))
+        layout.addWidget(plan_text)
+        button_layout = QHBoxLayout()
+        if allow_apply:
+            apply_button = QPushButton("Apply")
+            apply_button.clicked.connect(dialog.accept)
+            button_layout.addWidget(apply_button)
+        close_button = QPushButton("Cancel" if allow_apply else "Close")
+        close_button.clicked.connect(dialog.reject)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+        return dialog.exec() == QDialog.DialogCode.Accepted
+
+    def show_index_manager(self):
+        print("show_index_manager: Starting")
+        if not self.conn or not self.current_table:
+            QMessageBox.critical(self, "Error", "Select a database and a table first")
+            return
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?;", (self.current_table,))
+        if self.cursor.fetchone() is None:
+            QMessageBox.critical(self, "Error", "Apply the table to the database before adding indexes")
+            return
+
+        self.index_dialog = QDialog(self)
+        self.index_dialog.setWindowTitle(f"Indexes - {self.current_table}")
+        self.index_dialog.setGeometry(200, 200, 800, 500)
+        layout = QVBoxLayout(self.index_dialog)
+
+        self.index_tree = QTreeWidget()
+        self.index_tree.setHeaderLabels(["Name", "Unique", "Columns", "Where", "Size", "Selectivity", "SQL"])
+        for i, width in enumerate([140, 50, 160, 120, 80, 160, 300]):
+            self.index_tree.setColumnWidth(i, width)
+        layout.addWidget(self.index_tree)
+
+        index_button_layout = QHBoxLayout()
+        drop_button = QPushButton("Drop Index")
+        drop_button.setToolTip("Drop the selected index")
+        drop_button.clicked.connect(self.drop_index)
+        index_button_layout.addWidget(drop_button)
+        analyze_button = QPushButton("Analyze")
+        analyze_button.setToolTip("Refresh the selectivity statistics of this table's indexes")
+        analyze_button.clicked.connect(lambda: self.run_index_statements(
+            [f"ANALYZE {sqlite_core.quote_identifier(self.current_table)};"]))
+        index_button_layout.addWidget(analyze_button)
+        layout.addLayout(index_button_layout)
+
+        create_frame = QFrame()
+        create_frame.setFrameShape(QFrame.Shape.Box)
+        create_layout = QGridLayout(create_frame)
+        create_layout.addWidget(QLabel("New Index"), 0, 0)
+        create_layout.addWidget(QLabel("Name:"), 1, 0)
+        self.index_name_entry = QLineEdit()
+        self.index_name_entry.setToolTip("Name of the new index (e.g., idx_staff_name)")
+        create_layout.addWidget(self.index_name_entry, 1, 1)
+        create_layout.addWidget(QLabel("Columns:"), 2, 0)
+        self.index_columns_entry = QLineEdit()
+        self.index_columns_entry.setToolTip("Comma separated columns or expressions, e.g. Surname, lower(Email), Age DESC")
+        create_layout.addWidget(self.index_columns_entry, 2, 1)
+        create_layout.addWidget(QLabel("Covering:"), 3, 0)
+        self.index_covering_entry = QLineEdit()
+        self.index_covering_entry.setToolTip("Extra columns appended to the key so queries can be answered from the index alone")
+        create_layout.addWidget(self.index_covering_entry, 3, 1)
+        create_layout.addWidget(QLabel("Where:"), 4, 0)
+        self.index_where_entry = QLineEdit()
+        self.index_where_entry.setToolTip("Optional condition for a partial index, e.g. Active = 1")
+        create_layout.addWidget(self.index_where_entry, 4, 1)
+        self.index_unique_check = QCheckBox("Unique")
+        self.index_unique_check.setToolTip("Reject rows with duplicate key values")
+        create_layout.addWidget(self.index_unique_check, 5, 0)
+        create_button = QPushButton("Create Index")
+        create_button.clicked.connect(self.create_index)
+        create_layout.addWidget(create_button, 5, 1)
+        layout.addWidget(create_frame)
+
+        self.refresh_index_list()
+        self.index_dialog.exec()
+        print("show_index_manager: Completed")
+
+    def refresh_index_list(self):
+        print("refresh_index_list: Starting")
+        table_name = self.current_table
+        self.index_tree.clear()
+        sizes = {}
+        try:
+            self.cursor.execute(
+                "SELECT name, sum(pgsize) FROM dbstat WHERE name IN "
+                "(SELECT name FROM sqlite_master WHERE tbl_name = ? AND type = 'index') GROUP BY name;",
+                (table_name,))
+            sizes = dict(self.cursor.fetchall())
+        except sqlite3.OperationalError:
+            pass
+        stats = {}
+        try:
+            self.cursor.execute("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = ?;", (table_name,))
+            stats = dict(self.cursor.fetchall())
+        except sqlite3.OperationalError:
+            pass
+        self.cursor.execute(f"PRAGMA index_list({sqlite_core.quote_identifier(table_name)});")
+        for seq, name, unique, origin, partial in self.cursor.fetchall():
+            self.cursor.execute("SELECT sql FROM sqlite_master WHERE type='index' AND name=?;", (name,))
+            row = self.cursor.fetchone()
+            sql = row[0] if row and row[0] else ""
+            self.cursor.execute(f"PRAGMA index_xinfo({sqlite_core.quote_identifier(name)});")
+            columns = [col[2] if col[2] is not None else "<expr>" for col in self.cursor.fetchall() if col[5]]
+            where = sql[sql.upper().rfind(" WHERE ") + 7:] if partial and " WHERE " in sql.upper() else ""
+            selectivity = "n/a (run Analyze)"
+            if name in stats:
+                parts = stats[name].split()
+                if len(parts) > 1 and int(parts[0]):
+                    selectivity = f"~{parts[1]} row(s) per key of {int(parts[0]):,}"
+            item = QTreeWidgetItem([
+                name,
+                "✓" if unique else "",
+                ", ".join(columns),
+                where,
+                sqlite_core.format_bytes(sizes[name]) if name in sizes else "n/a",
+                selectivity,
+                " ".join(sql.split()) if sql else f"(automatic, from {'PRIMARY KEY' if origin == 'pk' else 'UNIQUE'})"
+            ])
+            item.setData(0, Qt.ItemDataRole.UserRole, bool(sql))
+            self.index_tree.addTopLevelItem(item)
+        print("refresh_index_list: Completed")
+
+    def create_index(self):
+        print("create_index: Starting")
+        name = self.index_name_entry.text().strip()
+        columns = self.index_columns_entry.text().strip()
+        covering = self.index_covering_entry.text().strip()
+        where = self.index_where_entry.text().strip()
+        if not name or not columns:
+            QMessageBox.critical(self.index_dialog, "Error", "Index name and columns are required")
+            print("create_index: Error - Missing name or columns")
+            return
+        key = ", ".join(part for part in (columns, covering) if part)
+        sql = (f'CREATE {"UNIQUE " if self.index_unique_check.isChecked() else ""}INDEX {sqlite_core.quote_identifier(name)} '
+               f'ON {sqlite_core.quote_identifier(self.current_table)} ({key})')
+        if where:
+            sql += f" WHERE {where}"
+        self.run_index_statements([sql + ";", f"ANALYZE {sqlite_core.quote_identifier(name)};"])
+
+    def drop_index(self):
+        print("drop_index: Starting")
+        selected_items = self.index_tree.selectedItems()
+        if not selected_items:
+            QMessageBox.critical(self.index_dialog, "Error", "No index selected")
+            return
+        name = selected_items[0].text(0)
+        if not selected_items[0].data(0, Qt.ItemDataRole.UserRole):
+            QMessageBox.critical(self.index_dialog, "Error",
+                                 f"'{name}' enforces a PRIMARY KEY or UNIQUE field and cannot be dropped here")
+            return
+        if QMessageBox.question(self.index_dialog, "Drop Index", f"Drop index '{name}'?",
+                                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+                                ) != QMessageBox.StandardButton.Yes:
+            return
+        self.run_index_statements([f"DROP INDEX {sqlite_core.quote_identifier(name)};"])
+
+    def run_index_statements(self, statements):
+        print(f"run_index_statements: {statements[0]}")
+        self.conn.commit()
+        self.index_worker = StatementWorker(self.db_path, statements, self.profile_combo.currentText())
+        self.index_progress = QProgressDialog("Building index...", "Cancel", 0, 0, self.index_dialog)
+        self.index_progress.setWindowTitle("Indexes")
+        self.index_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.index_progress.setMinimumDuration(0)
+        self.index_progress.canceled.connect(self.index_worker.cancel)
+        self.index_worker.progress.connect(
+            lambda elapsed: self.index_progress.setLabelText(f"Working... {elapsed:.1f} s elapsed"))
+        self.index_worker.succeeded.connect(self.finish_index_statements)
+        self.index_worker.failed.connect(self.fail_index_statements)
+        self.index_worker.start()
+
+    def finish_index_statements(self):
+        print("finish_index_statements: Success")
+        self.index_progress.reset()
+        self.index_name_entry.clear()
+        self.index_columns_entry.clear()
+        self.index_covering_entry.clear()
+        self.index_where_entry.clear()
+        self.index_unique_check.setChecked(False)
+        self.tables[self.current_table] = sqlite_core.load_table_fields(self.conn, self.current_table)
+        self.refresh_index_list()
+
+    def fail_index_statements(self, error):
+        print(f"fail_index_statements: Error - {error}")
+        self.index_progress.reset()
+        QMessageBox.critical(self.index_dialog, "Error", f"Index operation failed: {error}")
+
+    def start_table_rebuild(self, table_name, temp_table, temp_sql, col_map, new_name=None):
+        print(f"start_table_rebuild: Rebuilding {table_name}")
+        self.conn.commit()
+        self.rebuild_worker = TableRebuildWorker(
+            self.db_path, table_name, temp_table, temp_sql, col_map, profile_name=self.profile_combo.currentText(),
+            new_name=new_name)
+        self.rebuild_progress = QProgressDialog(f"Rebuilding table '{table_name}'...", "Cancel", 0, 0, self)
+        self.rebuild_progress.setWindowTitle("Applying Changes")
+        self.rebuild_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.rebuild_progress.setMinimumDuration(0)
+        self.rebuild_progress.canceled.connect(self.rebuild_worker.cancel)
+        self.rebuild_worker.progress.connect(self.update_rebuild_progress)
+        self.rebuild_worker.succeeded.connect(
+            lambda warnings: self.finish_table_rebuild(table_name, warnings, new_name))
+        self.rebuild_worker.failed.connect(self.fail_table_rebuild)
+        self.ok_button.setEnabled(False)
+        self.rebuild_worker.start()
+
+    def update_rebuild_progress(self, copied, total):
+        self.rebuild_progress.setMaximum(max(total, 1))
+        self.rebuild_progress.setValue(min(copied, max(total, 1)))
+        self.rebuild_progress.setLabelText(f"Copied {copied:,} of {total:,} rows...")
+
+    def finish_table_rebuild(self, table_name, warnings, new_name=None):
+        print("finish_table_rebuild: Starting")
+        self.rebuild_progress.reset()
+        self.ok_button.setEnabled(True)
+        table_name = self.rename_table_entry(table_name, new_name)
+        message = f"Table '{table_name}' modified!"
+        if warnings:
+            message += "\n\n" + "\n".join(warnings)
+        QMessageBox.information(self, "Success", message)
+        self.update_fk_check_state()
+        print("finish_table_rebuild: Success")
+
+    def rename_table_entry(self, table_name, new_name):
+        # Reloads the stored fields, moving the table to new_name in the field cache and combo box
+        new_name = new_name or table_name
+        self.tables.pop(table_name, None)
+        self.tables[new_name] = sqlite_core.load_table_fields(self.conn, new_name)
+        if new_name != table_name:
+            print(f"rename_table_entry: {table_name} -> {new_name}")
+            # SQLite rewrote the references to the table, so follow them in the cached fields too
+            for fields in self.tables.values():
+                for field in fields:
+                    if field["foreign_key"]["table"] == table_name:
+                        field["foreign_key"]["table"] = new_name
+            index = self.table_combo.findText(table_name)
+            self.table_combo.blockSignals(True)
+            if index >= 0:
+                self.table_combo.setItemText(index, new_name)
+            else:
+                self.table_combo.addItem(new_name)
+            self.table_combo.blockSignals(False)
+            if self.current_table == table_name:
+                self.current_table = new_name
+                self.table_combo.blockSignals(True)
+                self.table_combo.setCurrentText(new_name)
+                self.table_combo.blockSignals(False)
+        return new_name
+
+    def fail_table_rebuild(self, error):
+        print(f"fail_table_rebuild: Error - {error}")
+        self.rebuild_progress.reset()
+        self.ok_button.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Failed to apply changes: {error}")
+
     def generate_sql(self):
         table_name = self.table_name_entry.text().strip() or self.current_table
-        sql = f'CREATE TABLE "{table_name}" (\n'
-        fields = self.tables.get(self.current_table, [])
-        pk_fields = [field for field in fields if field["primary_key"]]
-        fk_fields = [field for field in fields if field["foreign_key"]["table"]]
-
-        column_defs = []
-        for field in fields:
-            col_def = f'    "{field["name"]}" {field["type"]}'
-            if field["not_null"] and not field["primary_key"]:
-                col_def += " NOT NULL"
-            if field["unique"] and not field["primary_key"]:
-                col_def += " UNIQUE"
-            if field["default"]:
-                col_def += f" DEFAULT '{field['default']}'"
-            if field["check"]:
-                col_def += f" CHECK({field['check']})"
-            column_defs.append(col_def)
-
-        if pk_fields:
-            if len(pk_fields) == 1:
-                pk_field = pk_fields[0]
-                pk_name = pk_field["name"]
-                if pk_field["autoincrement"] and pk_field["type"].startswith("INTEGER"):
-                    pk_clause = f'    PRIMARY KEY("{pk_name}" AUTOINCREMENT)'
-                else:
-                    pk_clause = f'    PRIMARY KEY("{pk_name}")'
-            else:
-                pk_names = ", ".join(f'"{field["name"]}"' for field in pk_fields)
-                pk_clause = f"    PRIMARY KEY({pk_names})"
-            column_defs.append(pk_clause)
-
-        for fk_field in fk_fields:
-            fk = fk_field["foreign_key"]
-            fk_clause = f'    FOREIGN KEY("{fk_field["name"]}") REFERENCES "{fk["table"]}"("{fk["column"]}")'
-            if fk["on_delete"] != "NO ACTION":
-                fk_clause += f" ON DELETE {fk['on_delete']}"
-            if fk["on_update"] != "NO ACTION":
-                fk_clause += f" ON UPDATE {fk['on_update']}"
-            column_defs.append(fk_clause)
-
-        sql += ",\n".join(column_defs)
-        sql += "\n);"
-        return sql
+        return sqlite_core.generate_create_sql(table_name, self.tables.get(self.current_table, []))
+
+    def apply_in_place_changes(self, statements):
+        print("apply_in_place_changes: Starting")
+        op = sqlite_diagnostics.start_operation("alter", count=len(statements))
+        if sqlite_core.apply_in_place_changes(self.conn, statements):
+            op.finish()
+            print("apply_in_place_changes: Success")
+            return True
+        op.finish(error="rejected by SQLite")
+        print("apply_in_place_changes: Falling back to rebuild")
+        return False
 
     def close_app(self):
         print("close_app: Starting")
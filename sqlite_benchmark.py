@@ -0,0 +1,422 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+# Runs the editors' core operations without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import sqlite_core
+import sqlite_profiles
+
+# Bump when the generated schema or data changes so cached databases are rebuilt
+GENERATOR_VERSION = 1
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+# Operations that put every row of a table into the grid are skipped above this
+GUI_ROW_LIMIT = 250_000
+# Customers is browsed, searched and saved in the grid at every size, so keep it small
+CUSTOMER_LIMIT = 2_000
+IMPORT_ROWS = 20_000
+BATCH_SIZE = 10_000
+REGRESSION_THRESHOLD = 1.25
+
+CITIES = ["London", "Berlin", "Madrid", "Lyon", "Seattle", "Osaka", "Sydney", "Toronto", "Lisbon", "Oslo",
+          "Graz", "Lima", "Cork", "Porto", "Bergen", "Kobe", "Perth", "Quebec", "Turin", "Tampere"]
+WORDS = ["Alpha", "Northwind", "Trading", "Foods", "Import", "Export", "Traders", "Market", "Supplies", "Holdings",
+         "Coastal", "Pacific", "Atlantic", "Golden", "Valley", "Summit", "River", "Harbor", "Central", "United"]
+FIRST_NAMES = ["Maria", "Ana", "Thomas", "Hanna", "Elizabeth", "Yang", "Pedro", "Laurence", "Karl", "Sven"]
+LAST_NAMES = ["Anders", "Trujillo", "Moreno", "Hardy", "Berglund", "Moos", "Lincoln", "Wang", "Afonso", "Ottlieb"]
+
+# Access-style declarations: CHAR(n), DATE stored as TEXT, BOOLEAN stored as INTEGER, BLOB attachments
+SCHEMA = [
+    """CREATE TABLE "Customers" (
+    "CustomerID" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "CompanyName" CHAR(40) NOT NULL,
+    "ContactName" VARCHAR(30),
+    "City" CHAR(15),
+    "Phone" CHAR(24),
+    "Active" BOOLEAN NOT NULL DEFAULT 1
+)""",
+    """CREATE TABLE "Orders" (
+    "OrderID" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "CustomerID" INTEGER NOT NULL REFERENCES "Customers"("CustomerID"),
+    "OrderDate" DATE NOT NULL,
+    "ShippedDate" DATE,
+    "Freight" REAL,
+    "Paid" BOOLEAN NOT NULL DEFAULT 0,
+    "Notes" TEXT,
+    "Attachment" BLOB
+)""",
+    'CREATE INDEX "idx_Orders_CustomerID" ON "Orders" ("CustomerID")',
+    # No keys or constraints, so the CSV import can append freely
+    """CREATE TABLE "ImportTarget" (
+    "CompanyName" CHAR(40),
+    "ContactName" VARCHAR(30),
+    "City" CHAR(15),
+    "Phone" CHAR(24)
+)""",
+]
+
+
+def customer_rows(rng, count):
+    for _ in range(count):
+        yield (
+            f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(['Ltd', 'GmbH', 'S.A.', 'Inc.', 'AB'])}",
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            rng.choice(CITIES),
+            f"({rng.randint(100, 999)}) 555-{rng.randint(1000, 9999)}",
+            1 if rng.random() < 0.9 else 0,
+        )
+
+
+def order_rows(rng, count, customers):
+    first_day = date(1995, 1, 1).toordinal()
+    for _ in range(count):
+        ordered = first_day + rng.randint(0, 30 * 365)
+        shipped = None if rng.random() < 0.1 else date.fromordinal(ordered + rng.randint(1, 30)).isoformat()
+        notes = " ".join(rng.choice(WORDS).lower() for _ in range(rng.randint(0, 12))) or None
+        # About one order in a hundred carries a small scanned attachment
+        attachment = rng.randbytes(rng.randint(256, 4096)) if rng.random() < 0.01 else None
+        yield (
+            rng.randint(1, customers),
+            date.fromordinal(ordered).isoformat(),
+            shipped,
+            round(rng.uniform(0, 500), 2),
+            1 if rng.random() < 0.7 else 0,
+            notes,
+            attachment,
+        )
+
+
+def insert_batches(conn, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def generate_database(path, rows, seed=0):
+    rng = random.Random(seed)
+    customers = max(100, min(rows // 10, CUSTOMER_LIMIT))
+    conn = sqlite_profiles.connect(path, "Bulk", new_database=True)
+    try:
+        for statement in SCHEMA:
+            conn.execute(statement)
+        insert_batches(conn, 'INSERT INTO "Customers" ("CompanyName", "ContactName", "City", "Phone", "Active") '
+                             'VALUES (?, ?, ?, ?, ?)', customer_rows(rng, customers))
+        insert_batches(conn, 'INSERT INTO "Orders" ("CustomerID", "OrderDate", "ShippedDate", "Freight", "Paid", '
+                             '"Notes", "Attachment") VALUES (?, ?, ?, ?, ?, ?, ?)', order_rows(rng, rows, customers))
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    finally:
+        conn.close()
+
+
+def ensure_database(cache_dir, size_name, seed):
+    path = os.path.join(cache_dir, f"bench_{size_name}_seed{seed}_v{GENERATOR_VERSION}.db")
+    if not os.path.exists(path):
+        print(f"Generating {size_name} database at {path}...", file=sys.stderr)
+        start = time.perf_counter()
+        generate_database(path + ".tmp", SIZES[size_name], seed)
+        os.replace(path + ".tmp", path)
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(path + ".tmp" + suffix):
+                os.remove(path + ".tmp" + suffix)
+        print(f"Generated in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return path
+
+
+def write_import_csv(path, rows, seed):
+    rng = random.Random(seed + 1)
+    with open(path, "w", newline="") as f:
+        f.write("CompanyName,ContactName,City,Phone\n")
+        for company, contact, city, phone, _ in customer_rows(rng, rows):
+            f.write(f'"{company}",{contact},{city},{phone}\n')
+
+
+class Dialogs:
+    # Stands in for the modal dialogs the editors open, and records any error they report
+    def __init__(self):
+        self.open_path = None
+        self.save_path = None
+        self.errors = []
+        from PyQt6.QtWidgets import QMessageBox, QFileDialog, QDialog
+        self.patches = [
+            (QMessageBox, "information", staticmethod(lambda *args, **kwargs: QMessageBox.StandardButton.Ok)),
+            (QMessageBox, "warning", staticmethod(self.report)),
+            (QMessageBox, "critical", staticmethod(self.report)),
+            (QMessageBox, "question", staticmethod(lambda *args, **kwargs: QMessageBox.StandardButton.No)),
+            (QFileDialog, "getOpenFileName", staticmethod(lambda *args, **kwargs: (self.open_path, ""))),
+            (QFileDialog, "getSaveFileName", staticmethod(lambda *args, **kwargs: (self.save_path, ""))),
+            (QDialog, "exec", lambda dialog: 0),
+        ]
+        self.saved = [(owner, name, owner.__dict__.get(name)) for owner, name, _ in self.patches]
+
+    def report(self, parent, title, text, *args, **kwargs):
+        self.errors.append(f"{title}: {text}")
+        from PyQt6.QtWidgets import QMessageBox
+        return QMessageBox.StandardButton.Ok
+
+    def __enter__(self):
+        for owner, name, replacement in self.patches:
+            setattr(owner, name, replacement)
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, original in self.saved:
+            setattr(owner, name, original)
+        return False
+
+
+def timed(results, name, dialogs, func, rows=None):
+    dialogs.errors.clear()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    elapsed = time.perf_counter() - start
+    entry = results.setdefault(name, {"runs": []})
+    if dialogs.errors:
+        entry["error"] = dialogs.errors[0]
+    entry["runs"].append(elapsed)
+    if rows is not None:
+        entry["rows"] = rows
+
+
+def skip(results, name, reason):
+    results[name] = {"skipped": reason}
+
+
+def run_editor_operations(app, db_path, work_dir, results, row_count):
+    import SQLite_Editor_V1_51 as editor_module
+
+    with Dialogs() as dialogs:
+        editor = editor_module.SQLiteEditor()
+        dialogs.open_path = db_path
+        timed(results, "open", dialogs, editor.open_database)
+        timed(results, "schema_load", dialogs, editor.load_db_structure)
+
+        if row_count <= GUI_ROW_LIMIT:
+            timed(results, "table_load", dialogs, lambda: editor.table_dropdown.setCurrentText("Orders"), row_count)
+            # Size of the editor's own copy of the rows, excluding the grid widgets
+            results["table_load"]["cache_bytes_per_row"] = round(
+                editor.row_store.memory_size() / max(1, len(editor.row_store)))
+        else:
+            skip(results, "table_load", f"the grid would hold {row_count:,} rows (limit {GUI_ROW_LIMIT:,})")
+        editor.table_dropdown.setCurrentText("Customers")
+        app.processEvents()
+        if row_count <= GUI_ROW_LIMIT:
+            # Both tables are in the page cache by now
+            def table_switch():
+                editor.table_dropdown.setCurrentText("Orders")
+                editor.table_dropdown.setCurrentText("Customers")
+            timed(results, "table_switch", dialogs, table_switch, row_count)
+        else:
+            skip(results, "table_switch", f"the grid would hold {row_count:,} rows (limit {GUI_ROW_LIMIT:,})")
+
+        def search():
+            editor.search_records()
+            editor.search_input.setText("Lisbon")
+            editor.field_combo.setCurrentText("City")
+            editor.match_combo.setCurrentText("Equals")
+            editor.perform_search(editor_module.QDialog())
+        timed(results, "search", dialogs, search)
+        editor.clear_search()
+
+        def single_cell_save():
+            # Goes through the same call the grid's cell delegate makes
+            editor.set_cell_text(0, 3, "Reykjavik")
+            editor.save_changes()
+        timed(results, "single_cell_save", dialogs, single_cell_save, editor.grid_model.rowCount())
+
+        dialogs.save_path = os.path.join(work_dir, "export.csv")
+        timed(results, "csv_export", dialogs, editor.export_csv, editor.grid_model.rowCount())
+
+        def column_profile():
+            # The scan behind the Profile button, without its cache
+            with editor.connections.reader() as conn:
+                sqlite_core.profile_table(conn, "Orders")
+        timed(results, "column_profile", dialogs, column_profile, row_count)
+
+        def bulk_update():
+            # Preview and apply of a Bulk Edit expression; flipping Paid changes every row on
+            # every run
+            plan = sqlite_core.plan_bulk_change("Orders", "Paid", "BOOLEAN", "expression", "1 - Paid",
+                                                key_columns=["OrderID"])
+            with editor.connections.reader() as conn:
+                sqlite_core.preview_bulk_change(conn, "Orders", plan)
+            with editor.connections.writing() as conn:
+                sqlite_core.apply_bulk_change(conn, "Orders", "Paid", ["OrderID"], plan)
+        timed(results, "bulk_update", dialogs, bulk_update, row_count)
+
+        import_path = os.path.join(work_dir, "import.csv")
+        write_import_csv(import_path, IMPORT_ROWS, 0)
+        editor.table_dropdown.setCurrentText("ImportTarget")
+        dialogs.open_path = import_path
+
+        def csv_import():
+            # The import runs on a worker thread; time it until the grid has reloaded
+            editor.import_csv()
+            editor.import_worker.wait()
+            app.processEvents()
+        timed(results, "csv_import", dialogs, csv_import, IMPORT_ROWS)
+
+        with open(import_path, newline="") as f:
+            # The same rows as a spreadsheet copy, header included
+            editor_module.QApplication.clipboard().setText(
+                "".join("\t".join(row) + "\r\n" for row in csv.reader(f)))
+
+        def clipboard_paste():
+            editor.paste_clipboard(as_new_rows=True)
+            editor.save_changes()
+        timed(results, "clipboard_paste", dialogs, clipboard_paste, IMPORT_ROWS)
+
+        editor.changes_made = False
+        editor.close_database()
+        editor.deleteLater()
+        app.processEvents()
+
+
+def run_rebuild(app, db_path, results, row_count):
+    import TableCreatorApp_V5_3 as creator_module
+
+    with Dialogs() as dialogs:
+        with contextlib.redirect_stdout(io.StringIO()):
+            creator = creator_module.TableCreatorApp()
+            dialogs.open_path = db_path
+            creator.open_existing_database()
+            creator.table_combo.setCurrentText("Orders")
+            creator.switch_table("Orders")
+            # A type change cannot be done with ALTER TABLE, so this forces the full rebuild path
+            freight = next(field for field in creator.tables["Orders"] if field["name"] == "Freight")
+            freight["type"] = "NUMERIC"
+            plan = creator.build_migration_plan("Orders")
+            creator.conn.close()
+            creator.conn = None
+
+        outcome = {}
+        worker = creator_module.TableRebuildWorker(
+            db_path, "Orders", plan["temp_table"], plan["temp_sql"], plan["col_map"])
+        worker.succeeded.connect(lambda warnings: outcome.setdefault("warnings", warnings))
+        worker.failed.connect(lambda error: dialogs.errors.append(error))
+        # run() on this thread keeps the timing free of thread scheduling
+        timed(results, "table_rebuild", dialogs, worker.run, row_count)
+        creator.deleteLater()
+        app.processEvents()
+
+
+def run_size(app, size_name, source_path, work_root, repeat):
+    row_count = SIZES[size_name]
+    results = {}
+    for _ in range(repeat):
+        # Each run gets a fresh copy because save, import and rebuild change the file
+        work_dir = tempfile.mkdtemp(dir=work_root)
+        db_path = os.path.join(work_dir, "bench.db")
+        shutil.copyfile(source_path, db_path)
+        run_editor_operations(app, db_path, work_dir, results, row_count)
+        run_rebuild(app, db_path, results, row_count)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    for entry in results.values():
+        if "runs" in entry:
+            entry["median_s"] = statistics.median(entry["runs"])
+            entry["min_s"] = min(entry["runs"])
+    return results
+
+
+def compare_with_baseline(report, baseline, threshold=REGRESSION_THRESHOLD):
+    # Returns (lines, regressions) comparing median times operation by operation
+    lines = []
+    regressions = []
+    for size_name, operations in report["results"].items():
+        base_operations = baseline.get("results", {}).get(size_name, {})
+        for name, entry in operations.items():
+            base = base_operations.get(name, {})
+            if "median_s" not in entry or "median_s" not in base or not base["median_s"]:
+                continue
+            ratio = entry["median_s"] / base["median_s"]
+            entry["baseline_s"] = base["median_s"]
+            entry["ratio"] = round(ratio, 3)
+            flag = ""
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{size_name}/{name}")
+            lines.append(f"{size_name:>4} {name:<18} {base['median_s']:>9.3f} s -> {entry['median_s']:>9.3f} s  "
+                         f"x{ratio:.2f}{flag}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite Editor and Table Creator core operations.")
+    parser.add_argument("--sizes", default="10k", help="comma separated sizes from: " + ", ".join(SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size; the median is reported")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the generated data")
+    parser.add_argument("--cache-dir", default=os.path.join(tempfile.gettempdir(), "sqlite_editor_bench"),
+                        help="where generated databases are kept between runs")
+    parser.add_argument("--output", help="write the JSON report here instead of standard output")
+    parser.add_argument("--baseline", help="JSON report from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="slowdown ratio reported as a regression (default %(default)s)")
+    parser.add_argument("--generate-only", action="store_true", help="create the databases and exit")
+    args = parser.parse_args(argv)
+
+    size_names = [name.strip().lower() for name in args.sizes.split(",") if name.strip()]
+    unknown = [name for name in size_names if name not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+    os.makedirs(args.cache_dir, exist_ok=True)
+    sources = {name: ensure_database(args.cache_dir, name, args.seed) for name in size_names}
+    if args.generate_only:
+        return 0
+
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "generator_version": GENERATOR_VERSION,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    for name in size_names:
+        print(f"Running {name}...", file=sys.stderr)
+        report["results"][name] = run_size(app, name, sources[name], args.cache_dir, args.repeat)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines, regressions = compare_with_baseline(report, baseline, args.threshold)
+        report["regressions"] = regressions
+        print("\n".join(lines), file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+import argparse
+import json
+import sys
+import time
+
+import sqlite_core
+import sqlite_profiles
+
+# Command-line front end for batch jobs. Uses the same engine as the two GUIs but never
+# imports Qt, so it starts quickly and several runs can be scripted side by side.
+
+MATCH_MODES = {"equals": "Equals", "starts": "Starts with", "contains": "Contains"}
+
+
+def open_connection(args):
+    return sqlite_profiles.connect(args.database, args.profile, isolation_level=None)
+
+
+def cmd_tables(conn, args):
+    for name in sqlite_core.list_tables(conn):
+        count = conn.execute(f"SELECT COUNT(*) FROM {sqlite_core.quote_identifier(name)}").fetchone()[0]
+        print(f"{name}\t{count}")
+
+
+def cmd_schema(conn, args):
+    for name in [args.table] if args.table else sqlite_core.list_tables(conn):
+        fields = sqlite_core.load_table_fields(conn, name)
+        if args.json:
+            print(json.dumps({"table": name, "fields": fields}, indent=2))
+        else:
+            print(sqlite_core.generate_create_sql(name, fields))
+            print()
+
+
+def where_filter(args):
+    if not args.where:
+        return None
+    field_name, mode, term = args.where
+    if mode not in MATCH_MODES:
+        raise ValueError(f"Match mode must be one of: {', '.join(MATCH_MODES)}")
+    return (field_name, MATCH_MODES[mode], term)
+
+
+def cmd_export(conn, args):
+    count = sqlite_core.export_table_csv(
+        conn, args.table, args.csv, where_filter(args), args.sort, "DESC" if args.desc else "ASC")
+    print(f"Exported {count} records to {args.csv}")
+
+
+def cmd_update(conn, args):
+    column_types = {col[1]: col[2] for col in sqlite_core.table_info(conn, args.table)}
+    if args.column not in column_types:
+        raise ValueError(f"Table '{args.table}' has no column '{args.column}'")
+    order_columns = [(args.sort, "DESC" if args.desc else "ASC")] if args.sort else []
+    key_columns = sqlite_core.row_key_columns(conn, args.table)
+    plan = sqlite_core.plan_bulk_change(
+        args.table, args.column, column_types[args.column], args.operation, args.find, args.value,
+        where_filter(args), order_columns, key_columns)
+    count, sample = sqlite_core.preview_bulk_change(conn, args.table, plan)
+    for old, new in sample:
+        print(f"{sqlite_core.display_value(old)}\t->\t{sqlite_core.display_value(new)}")
+    if args.dry_run:
+        print(f"{count} records would change")
+        return
+    count = sqlite_core.apply_bulk_change(conn, args.table, args.column, key_columns, plan)
+    print(f"Updated {count} records")
+
+
+def cmd_import(conn, args):
+    count = sqlite_core.import_csv(conn, args.table, args.csv, batch_size=args.batch_size)
+    print(f"Imported {count} records into {args.table}")
+
+
+def cmd_stats(conn, args):
+    for name in [args.table] if args.table else sqlite_core.list_tables(conn):
+        profiles = sqlite_core.profile_table(conn, name)
+        if args.json:
+            print(json.dumps({"table": name, "columns": profiles}, indent=2))
+            continue
+        print(f"{name}: {profiles[0]['rows'] if profiles else 0} rows")
+        for info in profiles:
+            distinct = ("" if info["distinct_exact"] else "~") + str(info["distinct"])
+            top = ", ".join(f"{value} ({count})" for value, count in info["top"])
+            print(f"  {info['column']}\tnulls={info['nulls']}\tdistinct={distinct}\tmin={info['min']}\t"
+                  f"max={info['max']}\tavg_length={info['avg_length'] or 0:.1f}\ttop={top}")
+        print()
+
+
+def read_fields(path):
+    with open(path, "r") as f:
+        data = json.load(f)
+    # Accepts the output of "schema --json" as well as a bare list of field dicts
+    return data["fields"] if isinstance(data, dict) else data
+
+
+def cmd_plan(conn, args):
+    fields = read_fields(args.fields)
+    plan = sqlite_core.build_migration_plan(conn, args.table, fields)
+    print(f"Mode: {plan['mode']}")
+    if plan["mode"] != "none":
+        print(f"Rows: {plan['rows']:,}" if plan.get("rows") is not None else "Rows: n/a")
+        if plan.get("est_seconds") is not None and plan["rewrites_rows"]:
+            print(f"Estimated time: {sqlite_core.format_duration(plan['est_seconds'])}")
+    for statement in plan["statements"]:
+        print(statement)
+    return plan
+
+
+def cmd_apply(conn, args):
+    plan = cmd_plan(conn, args)
+    if args.dry_run or plan["mode"] == "none":
+        return
+    start = time.perf_counter()
+    if plan["mode"] == "in_place" and sqlite_core.apply_in_place_changes(conn, plan["statements"]):
+        print(f"Applied in place in {sqlite_core.format_duration(time.perf_counter() - start)}")
+        return
+    # ALTER TABLE was refused or the change needs a copy: fall back to a rebuild
+    def progress(done, total):
+        print(f"\rCopied {done:,} of {total:,} rows", end="", file=sys.stderr)
+
+    warnings = sqlite_core.rebuild_table(
+        conn, args.table, plan["temp_table"], plan["temp_sql"], plan["col_map"], args.chunk_size, progress=progress)
+    print(file=sys.stderr)
+    for warning in warnings:
+        print(f"Warning: {warning}", file=sys.stderr)
+    print(f"Rebuilt in {sqlite_core.format_duration(time.perf_counter() - start)}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless SQLite Editor operations")
+    parser.add_argument("database", help="SQLite database file")
+    parser.add_argument("--profile", choices=list(sqlite_profiles.CONNECTION_PROFILES),
+                        default=sqlite_profiles.DEFAULT_PROFILE, help="connection PRAGMA profile")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("tables", help="list tables and row counts").set_defaults(func=cmd_tables)
+
+    schema = commands.add_parser("schema", help="print CREATE TABLE statements or field JSON")
+    schema.add_argument("table", nargs="?")
+    schema.add_argument("--json", action="store_true", help="print the Table Creator field dicts")
+    schema.set_defaults(func=cmd_schema)
+
+    export = commands.add_parser("export", help="export a table to CSV")
+    export.add_argument("table")
+    export.add_argument("csv")
+    export.add_argument("--where", nargs=3, metavar=("FIELD", "MODE", "TERM"),
+                        help=f"filter rows; MODE is one of {', '.join(MATCH_MODES)}")
+    export.add_argument("--sort", metavar="COLUMN")
+    export.add_argument("--desc", action="store_true")
+    export.set_defaults(func=cmd_export)
+
+    update = commands.add_parser("update", help="change one column of many rows with a single UPDATE")
+    update.add_argument("table")
+    update.add_argument("column")
+    update.add_argument("operation", choices=sqlite_core.BULK_OPERATIONS)
+    update.add_argument("--find", default="", help="text or pattern to replace, or the SQL expression")
+    update.add_argument("--value", default="", help="replacement text, or the value for set")
+    update.add_argument("--where", nargs=3, metavar=("FIELD", "MODE", "TERM"),
+                        help=f"only change matching rows; MODE is one of {', '.join(MATCH_MODES)}")
+    update.add_argument("--sort", metavar="COLUMN", help="row order for fill-down")
+    update.add_argument("--desc", action="store_true")
+    update.add_argument("--dry-run", action="store_true", help="show how many rows would change")
+    update.set_defaults(func=cmd_update)
+
+    stats = commands.add_parser("stats", help="profile columns: nulls, distinct values, min/max and most common values")
+    stats.add_argument("table", nargs="?")
+    stats.add_argument("--json", action="store_true")
+    stats.set_defaults(func=cmd_stats)
+
+    imp = commands.add_parser("import", help="validate and append a CSV to a table")
+    imp.add_argument("table")
+    imp.add_argument("csv")
+    imp.add_argument("--batch-size", type=int, default=sqlite_core.IMPORT_BATCH_SIZE)
+    imp.set_defaults(func=cmd_import)
+
+    for name, func, help_text in (("plan", cmd_plan, "show the migration plan for edited fields"),
+                                  ("apply", cmd_apply, "apply edited fields to an existing table")):
+        sub = commands.add_parser(name, help=help_text)
+        sub.add_argument("table")
+        sub.add_argument("fields", help="JSON file in the format printed by schema --json")
+        sub.set_defaults(func=func)
+        if name == "apply":
+            sub.add_argument("--dry-run", action="store_true")
+            sub.add_argument("--chunk-size", type=int, default=50000)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        conn = open_connection(args)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    try:
+        args.func(conn, args)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+import sqlite_profiles
+
+# One writer connection and a pool of read-only reader connections on the same database.
+# Every profile uses WAL, so readers see the last committed state and never wait for a
+# long write; writes queue behind each other on the writer lock.
+
+READER_POOL_SIZE = 4
+
+# Read-only opens have no writer. An immutable snapshot also takes no locks and cannot
+# notice changes made by other processes.
+OPEN_MODES = {"Read-write": "read_write", "Read-only": "read_only", "Immutable snapshot": "immutable"}
+OPEN_MODE_DESCRIPTIONS = {
+    "Read-write": "Browse and edit; WAL lets other programs read while you write",
+    "Read-only": "Browse without any chance of writing; changes by other programs still show up",
+    "Immutable snapshot": "Fastest browsing of a file nothing else is writing to; no locks and no change detection",
+}
+
+
+class WriterBusy(Exception):
+    pass
+
+
+class ReadOnlyDatabase(WriterBusy):
+    pass
+
+
+class ConnectionManager:
+    def __init__(self, db_path, profile_name=sqlite_profiles.DEFAULT_PROFILE, pool_size=READER_POOL_SIZE,
+                 mode="read_write"):
+        self.db_path = db_path
+        self.profile_name = profile_name
+        self.mode = mode
+        self.read_only = mode != "read_write"
+        if self.read_only:
+            self.writer = None
+            # Used for change polling and the status bar, like the writer in read-write mode
+            self.monitor = self.connect_reader()
+        else:
+            self.writer = sqlite_profiles.connect(db_path, profile_name, check_same_thread=False)
+            self.monitor = self.writer
+        self.writer_lock = threading.Lock()
+        self.idle_readers = queue.LifoQueue()
+        self.reader_slots = threading.BoundedSemaphore(pool_size)
+        self.readers = []
+        self.readers_lock = threading.Lock()
+        self.reader_schema = {}
+        self.data_version = self.monitor.execute("PRAGMA data_version").fetchone()[0]
+        self.schema_version = self.monitor.execute("PRAGMA schema_version").fetchone()[0]
+
+    def versions(self):
+        # (data_version, schema_version) on the writer, or None while a background write
+        # holds it. data_version only moves when another connection commits, so our own
+        # saves and imports do not change it; schema_version moves for any DDL.
+        if not self.writer_lock.acquire(blocking=False):
+            return None
+        try:
+            return (self.monitor.execute("PRAGMA data_version").fetchone()[0],
+                    self.monitor.execute("PRAGMA schema_version").fetchone()[0])
+        finally:
+            self.writer_lock.release()
+
+    def external_changes(self):
+        # Returns (data changed, schema changed) since the last call
+        versions = None if self.mode == "immutable" else self.versions()
+        if versions is None:
+            return False, False
+        data_version, schema_version = versions
+        changes = (data_version != self.data_version, schema_version != self.schema_version)
+        self.data_version, self.schema_version = data_version, schema_version
+        return changes
+
+    def connect_reader(self, **kwargs):
+        return sqlite_profiles.connect_read_only(
+            self.db_path, self.profile_name, immutable=self.mode == "immutable",
+            mmap_size=sqlite_profiles.READ_ONLY_MMAP_SIZE if self.read_only else None,
+            check_same_thread=False, isolation_level=None, **kwargs)
+
+    def open_reader(self):
+        conn = self.connect_reader()
+        with self.readers_lock:
+            self.readers.append(conn)
+        self.reader_schema[conn] = conn.execute("PRAGMA schema_version").fetchone()[0]
+        return conn
+
+    @contextmanager
+    def reader(self):
+        # Blocks while every pooled reader is in use
+        self.reader_slots.acquire()
+        try:
+            try:
+                conn = self.idle_readers.get_nowait()
+                # Cached EXPLAIN statements are never re-prepared after another connection
+                # changes the schema, so a reader that has seen a schema change is replaced
+                if conn.execute("PRAGMA schema_version").fetchone()[0] != self.reader_schema[conn]:
+                    self.close_reader(conn)
+                    conn = self.open_reader()
+            except queue.Empty:
+                conn = self.open_reader()
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self.idle_readers.put(conn)
+        finally:
+            self.reader_slots.release()
+
+    @contextmanager
+    def writing(self, wait=False):
+        # The main thread passes wait=False so it reports a running background write
+        # instead of freezing the window until it commits
+        if self.read_only:
+            raise ReadOnlyDatabase("The database is open read-only.")
+        if not self.writer_lock.acquire(blocking=wait):
+            raise WriterBusy("A background write is still running. Please wait for it to finish.")
+        try:
+            yield self.writer
+        finally:
+            self.writer_lock.release()
+
+    def writer_busy(self):
+        return self.writer_lock.locked()
+
+    def set_profile(self, profile_name):
+        if self.read_only:
+            sqlite_profiles.apply_read_only_profile(self.monitor, profile_name, sqlite_profiles.READ_ONLY_MMAP_SIZE)
+        else:
+            with self.writing():
+                self.writer.commit()
+                sqlite_profiles.apply_profile(self.writer, profile_name)
+        self.profile_name = profile_name
+        # Idle readers are reopened with the new settings; busy ones keep theirs until closed
+        while True:
+            try:
+                conn = self.idle_readers.get_nowait()
+            except queue.Empty:
+                break
+            self.close_reader(conn)
+
+    def close_reader(self, conn):
+        with self.readers_lock:
+            if conn in self.readers:
+                self.readers.remove(conn)
+        self.reader_schema.pop(conn, None)
+        conn.close()
+
+    def close(self):
+        with self.readers_lock:
+            readers, self.readers = self.readers, []
+        self.reader_schema = {}
+        for conn in readers:
+            conn.close()
+        while not self.idle_readers.empty():
+            self.idle_readers.get_nowait()
+        self.monitor.close()
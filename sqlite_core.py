@@ -0,0 +1,1786 @@
+import csv
+import heapq
+import io
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from operator import itemgetter
+
+# Schema, data and migration logic shared by the SQLite Editor, the Table Creator and
+# sqlite_cli.py. Nothing here imports Qt; errors are raised, never shown.
+
+# Field attributes that can only be changed by rebuilding the table
+REBUILD_FIELD_KEYS = ("type", "not_null", "primary_key", "autoincrement", "unique", "default", "check", "foreign_key")
+DATE_FORMATS = ["%d-%m-%Y", "%d/%m/%Y", "%d-%m-%y", "%d/%m/%y"]
+# Columns the CSV import normalises to DD-MM-YYYY
+DATE_COLUMNS = ("Birthdate",)
+IMPORT_BATCH_SIZE = 10000
+# BLOBs and longer text values are browsed as a prefix and their length; the cell viewer
+# reads the rest in chunks
+PREVIEW_CHARS = 100
+CELL_CHUNK_SIZE = 65536
+# Conflicts listed when a save is refused
+CONFLICT_REPORT_LIMIT = 20
+# Temp table that holds the rows a save is about to write
+STAGING_TABLE = "editor_staged_rows"
+# Temp table of a bulk change's rows, used when UPDATE ... FROM is not available
+BULK_TABLE = "editor_bulk_rows"
+# UPDATE ... FROM needs SQLite 3.33; older versions update from a correlated subquery
+UPDATE_FROM = sqlite3.sqlite_version_info >= (3, 33, 0)
+# Values sampled per list column when estimating a RowStore's size
+MEMORY_SAMPLE = 1000
+# Column profiles count distinct values exactly up to this many per column, then keep
+# only the most frequent ones and estimate the distinct count
+PROFILE_EXACT_VALUES = 10000
+PROFILE_TOP_K = 5
+# HyperLogLog uses 2 ** HLL_BITS registers: about 0.8% error on the distinct estimate
+HLL_BITS = 14
+# Bulk column changes, and the before/after pairs their preview shows
+BULK_OPERATIONS = ("replace", "regex", "fill-down", "set", "null", "expression")
+BULK_PREVIEW_ROWS = 5
+# Undo operations kept in memory; older ones move to a temporary database on disk
+JOURNAL_MEMORY_OPS = 20000
+
+
+class RebuildCancelled(Exception):
+    pass
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+class ConstraintConflicts(ValueError):
+    # Raised before a save writes anything; the message lists one conflict per line
+    pass
+
+
+def quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:,.0f} {unit}" if unit == "B" else f"{size:,.1f} {unit}"
+        size /= 1024
+    return f"{size:,.1f} TB"
+
+
+def format_duration(seconds):
+    if seconds < 1:
+        return "under a second"
+    if seconds < 120:
+        return f"about {seconds:.0f} seconds"
+    if seconds < 7200:
+        return f"about {seconds / 60:.0f} minutes"
+    return f"about {seconds / 3600:.1f} hours"
+
+
+def column_affinity(col_type):
+    # SQLite's column affinity rules (https://www.sqlite.org/datatype3.html#determination_of_column_affinity)
+    col_type = (col_type or "").upper()
+    if "INT" in col_type:
+        return "INTEGER"
+    if "CHAR" in col_type or "CLOB" in col_type or "TEXT" in col_type:
+        return "TEXT"
+    if "BLOB" in col_type or not col_type:
+        return "BLOB"
+    if "REAL" in col_type or "FLOA" in col_type or "DOUB" in col_type:
+        return "REAL"
+    return "NUMERIC"
+
+
+def escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@contextmanager
+def transaction(conn, mode=""):
+    # Works on both autocommit and legacy-transaction connections
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute(f"BEGIN {mode}")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+# Schema introspection
+
+def list_tables(conn):
+    # Leaves out SQLite's own tables such as sqlite_sequence and the sqlite_stat1 that ANALYZE creates
+    return [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'").fetchall()]
+
+
+def table_info(conn, table_name):
+    return conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})").fetchall()
+
+
+def parse_column_constraints(column_info):
+    constraints = {}
+    col_type = column_info[2].upper() if column_info[2] else ""
+
+    if 'CHAR' in col_type or 'TEXT' in col_type:
+        match = re.search(r'\((\d+)\)', column_info[2] or "")
+        if match:
+            constraints['max_length'] = int(match.group(1))
+
+    constraints['not_null'] = bool(column_info[3])
+    return constraints
+
+
+def create_table_sql(conn, table_name):
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table_name,)).fetchone()
+    return (row[0] or "") if row else ""
+
+
+def is_without_rowid(conn, table_name):
+    return re.search(r"\)\s*WITHOUT\s+ROWID", create_table_sql(conn, table_name), re.IGNORECASE) is not None
+
+
+def row_key_columns(conn, table_name):
+    # Columns that identify a row for updates and deletes: the primary key of a
+    # WITHOUT ROWID table, an INTEGER PRIMARY KEY (which is the rowid), or rowid
+    columns = sorted((col for col in table_info(conn, table_name) if col[5]), key=lambda col: col[5])
+    if is_without_rowid(conn, table_name):
+        return [col[1] for col in columns]
+    if len(columns) == 1 and columns[0][2].upper() == "INTEGER":
+        return [columns[0][1]]
+    return ["rowid"]
+
+
+def load_table_fields(conn, table_name):
+    # Reads a table back into the field dicts the Table Creator edits
+    quoted = quote_identifier(table_name)
+    fields = []
+    columns = conn.execute(f"PRAGMA table_info({quoted});").fetchall()
+    fk_list = conn.execute(f"PRAGMA foreign_key_list({quoted});").fetchall()
+    indexes = conn.execute(f"PRAGMA index_list({quoted});").fetchall()
+    pk_fields = []
+    for col in columns:
+        cid, name, col_type, notnull, default, pk = col
+        if default and len(default) >= 2 and default[0] == default[-1] == "'":
+            # PRAGMA table_info reports the quoted SQL literal; keep the bare value
+            default = default[1:-1].replace("''", "'")
+        range_val = ""
+        display_type = col_type
+        if col_type.startswith(("CHAR", "VCHAR", "NCHAR", "NVCHAR")):
+            if "(" in col_type and ")" in col_type:
+                display_type = col_type[:col_type.index("(")]
+                range_val = col_type[col_type.index("(")+1:col_type.index(")")]
+        elif col_type.upper() in ("DATE", "BOOLEAN"):
+            display_type = col_type.upper()
+            col_type = "TEXT" if col_type.upper() == "DATE" else "INTEGER"
+        field = {
+            "name": name,
+            "type": col_type,
+            "range": range_val,
+            "display_type": display_type,
+            "not_null": bool(notnull),
+            "primary_key": bool(pk),
+            "autoincrement": False,
+            "unique": False,
+            "default": default or "",
+            "check": "",
+            "foreign_key": {"table": "", "column": "", "on_delete": "NO ACTION", "on_update": "NO ACTION"},
+            "original_name": name
+        }
+        if pk:
+            pk_fields.append(field)
+        fields.append(field)
+    create_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?;", (table_name,)).fetchone()
+    if create_sql:
+        create_sql = create_sql[0].upper()
+        if "AUTOINCREMENT" in create_sql:
+            for field in pk_fields:
+                if field["type"].startswith("INTEGER"):
+                    field["autoincrement"] = True
+        if "CHECK" in create_sql:
+            check_start = create_sql.find("CHECK")
+            check_end = create_sql.find(")", check_start)
+            check_expr = create_sql[check_start+6:check_end]
+            for field in fields:
+                if field["name"] in check_expr:
+                    field["check"] = check_expr
+    for idx in indexes:
+        idx_name = idx[1]
+        is_unique = idx[2]
+        if is_unique:
+            idx_cols = conn.execute(f"PRAGMA index_info({quote_identifier(idx_name)});").fetchall()
+            for idx_col in idx_cols:
+                cid = idx_col[2]
+                for col in columns:
+                    if col[0] == cid:
+                        col_name = col[1]
+                        for field in fields:
+                            if field["name"] == col_name:
+                                field["unique"] = True
+                                break
+                        break
+    for fk in fk_list:
+        col_name = fk[3]
+        ref_table = fk[2]
+        ref_column = fk[4]
+        on_delete = fk[5] or "NO ACTION"
+        on_update = fk[6] or "NO ACTION"
+        for field in fields:
+            if field["name"] == col_name:
+                field["foreign_key"] = {
+                    "table": ref_table,
+                    "column": ref_column,
+                    "on_delete": on_delete,
+                    "on_update": on_update
+                }
+                break
+    return fields
+
+
+# DDL generation and migration planning
+
+def column_definition(field, inline_fk=False):
+    col_def = f'"{field["name"]}" {field["type"]}'
+    if field["not_null"] and not field["primary_key"]:
+        col_def += " NOT NULL"
+    if field["unique"] and not field["primary_key"]:
+        col_def += " UNIQUE"
+    if field["default"]:
+        default = field["default"].replace("'", "''")
+        col_def += f" DEFAULT '{default}'"
+    if field["check"]:
+        col_def += f" CHECK({field['check']})"
+    fk = field["foreign_key"]
+    if inline_fk and fk["table"]:
+        col_def += f' REFERENCES "{fk["table"]}"("{fk["column"]}")'
+        if fk["on_delete"] != "NO ACTION":
+            col_def += f" ON DELETE {fk['on_delete']}"
+        if fk["on_update"] != "NO ACTION":
+            col_def += f" ON UPDATE {fk['on_update']}"
+    return col_def
+
+
+def generate_create_sql(table_name, fields):
+    sql = f'CREATE TABLE "{table_name}" (\n'
+    pk_fields = [field for field in fields if field["primary_key"]]
+    fk_fields = [field for field in fields if field["foreign_key"]["table"]]
+
+    column_defs = [f"    {column_definition(field)}" for field in fields]
+
+    if pk_fields:
+        if len(pk_fields) == 1:
+            pk_field = pk_fields[0]
+            pk_name = pk_field["name"]
+            if pk_field["autoincrement"] and pk_field["type"].startswith("INTEGER"):
+                pk_clause = f'    PRIMARY KEY("{pk_name}" AUTOINCREMENT)'
+            else:
+                pk_clause = f'    PRIMARY KEY("{pk_name}")'
+        else:
+            pk_names = ", ".join(f'"{field["name"]}"' for field in pk_fields)
+            pk_clause = f"    PRIMARY KEY({pk_names})"
+        column_defs.append(pk_clause)
+
+    for fk_field in fk_fields:
+        fk = fk_field["foreign_key"]
+        fk_clause = f'    FOREIGN KEY("{fk_field["name"]}") REFERENCES "{fk["table"]}"("{fk["column"]}")'
+        if fk["on_delete"] != "NO ACTION":
+            fk_clause += f" ON DELETE {fk['on_delete']}"
+        if fk["on_update"] != "NO ACTION":
+            fk_clause += f" ON UPDATE {fk['on_update']}"
+        column_defs.append(fk_clause)
+
+    sql += ",\n".join(column_defs)
+    sql += "\n);"
+    return sql
+
+
+def can_add_column(field):
+    if field["primary_key"] or field["unique"]:
+        return False
+    if field["not_null"] and not field["default"]:
+        return False
+    if field["foreign_key"]["table"] and field["default"]:
+        return False
+    return True
+
+
+def can_drop_column(conn, table_name, field):
+    if sqlite3.sqlite_version_info < (3, 35, 0):
+        return False
+    if field["primary_key"] or field["unique"] or field["check"] or field["foreign_key"]["table"]:
+        return False
+    for idx in conn.execute(f"PRAGMA index_list({quote_identifier(table_name)});").fetchall():
+        index_columns = conn.execute(f"PRAGMA index_xinfo({quote_identifier(idx[1])});").fetchall()
+        if any(col[2] == field["name"] or col[2] is None for col in index_columns if col[5]):
+            return False
+    return True
+
+
+def plan_table_changes(conn, table_name, fields, new_name=None):
+    # Returns the ALTER TABLE statements that turn the stored table into the edited
+    # one, or None when SQLite can only make the change by rebuilding the table.
+    old_fields = load_table_fields(conn, table_name)
+    old_by_name = {field["name"]: field for field in old_fields}
+
+    kept = []
+    renamed = []
+    added = []
+    for position, field in enumerate(fields):
+        origin = field.get("original_name") or field["name"]
+        if origin not in old_by_name:
+            added.append((position, field))
+            continue
+        if origin in kept:
+            return None
+        old = old_by_name[origin]
+        if any(old[key] != field[key] for key in REBUILD_FIELD_KEYS):
+            return None
+        if added:
+            # ADD COLUMN can only append, so new fields must come after existing ones
+            return None
+        kept.append(origin)
+        if field["name"] != origin:
+            renamed.append((origin, field["name"]))
+
+    if kept != [field["name"] for field in old_fields if field["name"] in kept]:
+        return None
+
+    statements = []
+    columns = {field["name"] for field in old_fields}
+    for field in old_fields:
+        if field["name"] in kept:
+            continue
+        if not can_drop_column(conn, table_name, field):
+            return None
+        statements.append(f'ALTER TABLE "{table_name}" DROP COLUMN "{field["name"]}";')
+        columns.discard(field["name"])
+    for origin, name in renamed:
+        if sqlite3.sqlite_version_info < (3, 25, 0) or name in columns:
+            return None
+        statements.append(f'ALTER TABLE "{table_name}" RENAME COLUMN "{origin}" TO "{name}";')
+        columns.discard(origin)
+        columns.add(name)
+    for position, field in added:
+        if not can_add_column(field) or field["name"] in columns:
+            return None
+        statements.append(f'ALTER TABLE "{table_name}" ADD COLUMN {column_definition(field, inline_fk=True)};')
+        columns.add(field["name"])
+    if new_name and new_name != table_name:
+        # Last, so the column statements above still find the table under its old name
+        statements.append(f"ALTER TABLE {quote_identifier(table_name)} RENAME TO {quote_identifier(new_name)};")
+    return statements
+
+
+def unused_table_name(conn, base):
+    # base, or base_2, base_3... whichever no table, index, view or trigger is named
+    name, suffix = base, 1
+    while conn.execute("SELECT 1 FROM sqlite_master WHERE name = ? COLLATE NOCASE;", (name,)).fetchone():
+        suffix += 1
+        name = f"{base}_{suffix}"
+    return name
+
+
+def estimate_table_cost(conn, table_name, col_map, sample_copy=True):
+    # sample_copy=False skips timing a copy, for changes that do not rewrite any rows
+    rows = conn.execute(f'SELECT count(*) FROM "{table_name}";').fetchone()[0]
+    index_count = conn.execute(
+        "SELECT count(*) FROM sqlite_master WHERE type='index' AND tbl_name=?;", (table_name,)).fetchone()[0]
+    try:
+        pages, size = conn.execute(
+            "SELECT count(*), sum(pgsize) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE tbl_name = ?);", (table_name,)).fetchone()
+        size = size or 0
+    except sqlite3.OperationalError:
+        # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+        pages = size = None
+
+    if size is None and rows and col_map:
+        lengths = " + ".join(f'ifnull(length("{old}"), 0)' for old, new in col_map)
+        size = int((conn.execute(
+            f'SELECT avg({lengths}) FROM (SELECT * FROM "{table_name}" LIMIT 1000);').fetchone()[0] or 0) * rows)
+
+    throughput = None
+    if sample_copy and rows and col_map:
+        src_str = ", ".join(f'"{old}"' for old, new in col_map)
+        sample = min(rows, 20000)
+        sample_table = quote_identifier(unused_table_name(conn, f"migration_sample_{table_name}"))
+        # Time a real copy of a sample inside a savepoint that is always rolled back
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("SAVEPOINT migration_estimate;")
+        try:
+            conn.execute(f'CREATE TABLE {sample_table} AS SELECT {src_str} FROM "{table_name}" LIMIT 0;')
+            start = time.perf_counter()
+            conn.execute(f'INSERT INTO {sample_table} SELECT {src_str} FROM "{table_name}" LIMIT {sample};')
+            throughput = sample / max(time.perf_counter() - start, 1e-6)
+        finally:
+            conn.execute("ROLLBACK TO migration_estimate;")
+            conn.execute("RELEASE migration_estimate;")
+    return {
+        "rows": rows,
+        "pages": pages,
+        "bytes": size,
+        "index_count": index_count,
+        "throughput": throughput,
+        "est_seconds": rows / throughput * (1 + index_count) if throughput else 0.0,
+    }
+
+
+def build_migration_plan(conn, table_name, fields, new_name=None):
+    # Describes how the edited fields would be applied: mode is none, in_place or rebuild
+    new_name = new_name or table_name
+    temp_table = unused_table_name(conn, f"temp_{table_name}")
+    temp_sql = generate_create_sql(new_name, fields).replace(f'CREATE TABLE "{new_name}"', f'CREATE TABLE "{temp_table}"')
+    old_cols = [col[1] for col in table_info(conn, table_name)]
+    # Carry data across renamed fields as well as unchanged ones
+    col_map = [(f.get("original_name") or f["name"], f["name"]) for f in fields
+               if (f.get("original_name") or f["name"]) in old_cols]
+    plan = {"table": table_name, "new_name": new_name, "temp_table": temp_table, "temp_sql": temp_sql,
+            "col_map": col_map}
+
+    statements = plan_table_changes(conn, table_name, fields, new_name)
+    if statements == []:
+        plan.update(mode="none", statements=[])
+        return plan
+    if statements:
+        plan.update(mode="in_place", statements=statements,
+                    rewrites_rows=any("DROP COLUMN" in statement for statement in statements))
+    else:
+        src_str = ", ".join(f'"{old}"' for old, new in col_map)
+        dst_str = ", ".join(f'"{new}"' for old, new in col_map)
+        statements = [
+            temp_sql,
+            f'INSERT INTO "{temp_table}" ({dst_str}) SELECT {src_str} FROM "{table_name}";  -- in rowid chunks',
+            f'DROP TABLE "{table_name}";',
+            f'ALTER TABLE "{temp_table}" RENAME TO "{table_name}";',
+            "-- recreate indexes, triggers and views"]
+        if new_name != table_name:
+            statements.append(f"ALTER TABLE {quote_identifier(table_name)} RENAME TO {quote_identifier(new_name)};")
+        statements.append(f"ANALYZE {quote_identifier(new_name)};")
+        plan.update(mode="rebuild", rewrites_rows=True, statements=statements)
+    plan.update(estimate_table_cost(conn, table_name, col_map, sample_copy=plan["rewrites_rows"]))
+    return plan
+
+
+def apply_in_place_changes(conn, statements):
+    # Runs ALTER TABLE statements in one transaction; False means SQLite refused and
+    # nothing was changed, so the caller should rebuild instead
+    try:
+        with transaction(conn):
+            for statement in statements:
+                conn.execute(statement)
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def rebuild_table(conn, table, temp_table, create_sql, col_map, chunk_size=50000, progress=None, cancelled=None,
+                  new_name=None):
+    # Rebuilds a table following SQLite's documented procedure
+    # (https://www.sqlite.org/lang_altertable.html#otheralter), copying rows in rowid chunks,
+    # then renames it to new_name if given.
+    # conn must be in autocommit mode (isolation_level=None). Returns a list of warnings.
+    fk_enabled = conn.execute("PRAGMA foreign_keys;").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys = OFF;")
+    warnings = []
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            # Indexes and triggers are dropped with the table. Every view is dropped up front
+            # and recreated in its original order, so the rename cannot trip over one.
+            saved = conn.execute(
+                "SELECT type, name, sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') "
+                "AND sql IS NOT NULL;", (table,)).fetchall()
+            views = conn.execute("SELECT type, name, sql FROM sqlite_master WHERE type = 'view' ORDER BY rowid;").fetchall()
+            for _, view_name, _ in views:
+                conn.execute(f"DROP VIEW {quote_identifier(view_name)};")
+
+            conn.execute(create_sql)
+            copy_table_rows(conn, table, temp_table, col_map, chunk_size, progress, cancelled)
+            conn.execute(f"DROP TABLE {quote_identifier(table)};")
+            conn.execute(f"ALTER TABLE {quote_identifier(temp_table)} RENAME TO {quote_identifier(table)};")
+
+            for obj_type, name, sql in saved + views:
+                try:
+                    conn.execute(sql)
+                except sqlite3.Error as e:
+                    warnings.append(f"{obj_type.capitalize()} '{name}' was not recreated: {str(e)}")
+            if new_name and new_name != table:
+                # A plain rename also rewrites the references in other tables, triggers and views
+                conn.execute(f"ALTER TABLE {quote_identifier(table)} RENAME TO {quote_identifier(new_name)};")
+                table = new_name
+
+            # Checked whether or not the connection enforces foreign keys: the rebuilt table's
+            # own references, and every table that references it
+            checked = [table] + [row[0] for row in conn.execute(
+                "SELECT DISTINCT m.name FROM sqlite_master AS m, pragma_foreign_key_list(m.name) AS f "
+                "WHERE m.type = 'table' AND m.name != ? AND f.\"table\" = ? COLLATE NOCASE;", (table, table))]
+            violations = [row for name in checked
+                          for row in conn.execute(f"PRAGMA foreign_key_check({quote_identifier(name)});").fetchall()]
+            if violations:
+                raise sqlite3.IntegrityError(
+                    f"{len(violations)} row(s) would violate foreign key constraints on '{table}'")
+            conn.execute("COMMIT;")
+        except BaseException:
+            conn.execute("ROLLBACK;")
+            raise
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {'ON' if fk_enabled else 'OFF'};")
+    conn.execute(f"ANALYZE {quote_identifier(table)};")
+    return warnings
+
+
+def copy_table_rows(conn, table, temp_table, col_map, chunk_size=50000, progress=None, cancelled=None):
+    if not col_map:
+        return
+    src_str = ", ".join(f'"{old}"' for old, new in col_map)
+    dst_str = ", ".join(f'"{new}"' for old, new in col_map)
+    insert_sql = f'INSERT INTO "{temp_table}" ({dst_str}) SELECT {src_str} FROM "{table}"'
+    try:
+        total = conn.execute(f'SELECT count(rowid) FROM "{table}";').fetchone()[0]
+    except sqlite3.OperationalError:
+        # WITHOUT ROWID table: no cheap way to chunk, copy in one statement
+        conn.execute(insert_sql + ";")
+        return
+    copied = 0
+    if progress:
+        progress(copied, total)
+    # Each chunk is the next chunk_size rows after the last rowid copied, so gaps in the
+    # rowids cost nothing
+    last = None
+    while True:
+        if cancelled and cancelled():
+            raise RebuildCancelled()
+        after, params = ("", []) if last is None else (" WHERE rowid > ?", [last])
+        last, count = conn.execute(
+            f'SELECT max(rowid), count(*) FROM (SELECT rowid FROM "{table}"{after} ORDER BY rowid LIMIT ?);',
+            params + [chunk_size]).fetchone()
+        if not count:
+            break
+        cursor = conn.execute(insert_sql + (f"{after} AND" if after else " WHERE") + " rowid <= ?;", params + [last])
+        copied += cursor.rowcount
+        if progress:
+            progress(copied, total)
+
+
+# Row data
+
+def display_value(value):
+    # The editor shows and edits NULL as an empty string
+    return "" if value is None else str(value)
+
+
+def convert_value(value, col_type):
+    if value in (None, "", "NULL"):
+        return None
+    try:
+        if "INTEGER" in col_type.upper():
+            return int(value)
+        elif "FLOAT" in col_type.upper() or "REAL" in col_type.upper():
+            return float(value)
+        elif "CHAR" in col_type.upper() or "TEXT" in col_type.upper():
+            return str(value)
+        else:
+            return value
+    except (ValueError, TypeError):
+        return None
+
+
+def normalize_date(date_str):
+    # Remove extra spaces and handle various date formats
+    date_str = date_str.strip().replace(" ", "")
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).strftime("%d-%m-%Y")
+        except ValueError:
+            continue
+    # If parsing fails, return the original (will fail validation if too long)
+    return date_str
+
+
+def validate_value(col_name, value, constraints):
+    # value is the text as typed or read from CSV
+    if constraints.get("not_null", False) and not value.strip():
+        raise ValueError(f"Column '{col_name}' cannot be empty (NOT NULL constraint).")
+    max_length = constraints.get("max_length")
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f"Value in column '{col_name}' exceeds maximum length of {max_length} characters.")
+
+
+class LazyCell:
+    # Stands in for a BLOB or long TEXT value that was not fetched in full
+    __slots__ = ("kind", "length", "prefix")
+
+    def __init__(self, kind, length, prefix):
+        self.kind = kind
+        self.length = length
+        self.prefix = prefix
+
+    def __eq__(self, other):
+        return isinstance(other, LazyCell) and (self.kind, self.length, self.prefix) == (other.kind, other.length, other.prefix)
+
+    def __str__(self):
+        if self.kind == "blob":
+            return f"<BLOB {format_bytes(self.length)}> {self.prefix[:16].hex(' ')}"
+        return f"{self.prefix}... ({self.length:,} characters)"
+
+
+def lazy_cell(marker, prefix):
+    kind, length = marker.split(":")
+    return LazyCell(kind, int(length), prefix)
+
+
+def lazy_column_flags(column_types):
+    # Only columns without INTEGER or REAL affinity are likely to hold BLOBs or long text
+    return [column_affinity(col_type) not in ("INTEGER", "REAL") for col_type in column_types]
+
+
+def select_list(key_columns, columns=None, lazy_flags=None):
+    # Key columns first, then every column. Lazy columns add a second expression that is
+    # "kind:length" for values too large to fetch, in which case the first is a prefix.
+    keys = [key if key == "rowid" else quote_identifier(key) for key in key_columns]
+    if columns is None:
+        return ", ".join(keys + ["*"])
+    items = []
+    for column, lazy in zip(columns, lazy_flags or [False] * len(columns)):
+        q = quote_identifier(column)
+        if not lazy:
+            items.append(q)
+            continue
+        large = f"(typeof({q}) = 'blob' OR (typeof({q}) = 'text' AND length({q}) > {PREVIEW_CHARS}))"
+        items.append(f"CASE WHEN {large} THEN substr({q}, 1, {PREVIEW_CHARS}) ELSE {q} END")
+        items.append(f"CASE WHEN {large} THEN typeof({q}) || ':' || length({q}) END")
+    return ", ".join(keys + items)
+
+
+def decode_row(row, key_count, lazy_flags=None):
+    # Splits a row read with select_list into (key, values)
+    key = tuple(row[:key_count])
+    if not lazy_flags or not any(lazy_flags):
+        return key, row[key_count:]
+    values = []
+    idx = key_count
+    for lazy in lazy_flags:
+        value = row[idx]
+        idx += 1
+        if lazy:
+            marker = row[idx]
+            idx += 1
+            if marker is not None:
+                value = lazy_cell(marker, value)
+        values.append(value)
+    return key, values
+
+
+class StoredColumn:
+    # One column of a RowStore. INTEGER and REAL columns use an array with a bitmap of
+    # NULL positions; other columns, and typed ones that meet a value their array cannot
+    # hold, use a list in which equal strings share one interned object.
+    __slots__ = ("data", "nulls", "python_type")
+
+    TYPECODES = {int: "q", float: "d"}
+
+    def __init__(self, python_type=None):
+        self.python_type = python_type
+        self.data = array(self.TYPECODES[python_type]) if python_type else []
+        self.nulls = None
+
+    def __len__(self):
+        return len(self.data)
+
+    def extend(self, values):
+        start = len(self.data)
+        if self.python_type:
+            # The array rejects text and BLOBs; REAL affinity never returns integers
+            nulls = values.count(None)
+            try:
+                self.data.extend(array(self.data.typecode,
+                                       values if not nulls else [0 if value is None else value for value in values]))
+            except (TypeError, OverflowError):
+                self.to_list()
+            else:
+                if nulls:
+                    for idx in [idx for idx, value in enumerate(values) if value is None]:
+                        self.set_null(start + idx, True)
+                return
+        intern = sys.intern
+        self.data.extend([intern(value) if type(value) is str else value for value in values])
+
+    def to_list(self):
+        if self.python_type:
+            self.data = [self.get(idx) for idx in range(len(self.data))]
+            self.python_type = None
+            self.nulls = None
+
+    def set_null(self, idx, null):
+        if self.nulls is None:
+            if not null:
+                return
+            self.nulls = bytearray((len(self.data) + 7) // 8)
+        if len(self.nulls) <= idx >> 3:
+            self.nulls.extend(bytes((idx >> 3) + 1 - len(self.nulls)))
+        if null:
+            self.nulls[idx >> 3] |= 1 << (idx & 7)
+        else:
+            self.nulls[idx >> 3] &= ~(1 << (idx & 7)) & 0xFF
+
+    def get(self, idx):
+        if self.python_type is None:
+            return self.data[idx]
+        nulls = self.nulls
+        if nulls is not None and idx >> 3 < len(nulls) and nulls[idx >> 3] & (1 << (idx & 7)):
+            return None
+        return self.data[idx]
+
+    def set(self, idx, value):
+        if self.python_type is not None:
+            if value is None:
+                self.data[idx] = 0
+                self.set_null(idx, True)
+                return
+            if type(value) is self.python_type:
+                try:
+                    self.data[idx] = value
+                    self.set_null(idx, False)
+                    return
+                except OverflowError:
+                    pass
+            self.to_list()
+        self.data[idx] = sys.intern(value) if type(value) is str else value
+
+    def memory_size(self):
+        if self.python_type is not None:
+            return self.data.itemsize * len(self.data) + (len(self.nulls) if self.nulls else 0)
+        # Estimated from an evenly spaced sample; shared objects (interned strings, small
+        # integers, None) are counted once per sample
+        sample = self.data[::max(1, len(self.data) // MEMORY_SAMPLE)]
+        distinct = {id(value): value for value in sample}
+        per_value = sum(sys.getsizeof(value) for value in distinct.values()) / max(1, len(sample))
+        return sys.getsizeof(self.data) + int(per_value * len(self.data))
+
+
+class RowStore:
+    # Column-oriented copy of the rows a browse query returned, addressed by position.
+    # Values keep the type SQLite returned them with; rows with a key column are looked
+    # up by their position, not by key.
+    def __init__(self, key_types, column_types, lazy_flags=None):
+        self.key_count = len(key_types)
+        self.lazy_flags = list(lazy_flags) if lazy_flags else [False] * len(column_types)
+        self.columns = []
+        for col_type in list(key_types) + list(column_types):
+            affinity = column_affinity(col_type)
+            self.columns.append(StoredColumn(int if affinity == "INTEGER" else float if affinity == "REAL" else None))
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def extend(self, rows):
+        # Takes rows read with select_list(key_columns, columns, lazy_flags)
+        if not rows:
+            return
+        raw = list(zip(*rows))
+        values = list(raw[:self.key_count])
+        idx = self.key_count
+        for lazy in self.lazy_flags:
+            column = raw[idx]
+            idx += 1
+            if lazy:
+                markers = raw[idx]
+                idx += 1
+                if markers.count(None) != len(markers):
+                    column = [value if marker is None else lazy_cell(marker, value)
+                              for value, marker in zip(column, markers)]
+            values.append(column)
+        for stored, column in zip(self.columns, values):
+            stored.extend(column)
+
+    def append(self, key, values):
+        for stored, value in zip(self.columns, list(key) + list(values)):
+            stored.extend([value])
+        return len(self) - 1
+
+    def key(self, idx):
+        return tuple(stored.get(idx) for stored in self.columns[:self.key_count])
+
+    def set_key(self, idx, key):
+        for stored, value in zip(self.columns[:self.key_count], key):
+            stored.set(idx, value)
+
+    def value(self, idx, column):
+        return self.columns[self.key_count + column].get(idx)
+
+    def row(self, idx):
+        return [stored.get(idx) for stored in self.columns[self.key_count:]]
+
+    def set_value(self, idx, column, value):
+        self.columns[self.key_count + column].set(idx, value)
+
+    def set_row(self, idx, values):
+        for column, value in enumerate(values):
+            self.set_value(idx, column, value)
+
+    def memory_size(self):
+        return sum(stored.memory_size() for stored in self.columns)
+
+
+class PageCache:
+    # Recently browsed query results, least recently used first, kept within a byte
+    # budget. Entries are tagged with their table so a write can drop just that table.
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        self.token = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def validate(self, token):
+        # token identifies the database state (data_version, schema_version); everything
+        # is dropped when it moves. None means it cannot be read now and keeps the entries.
+        if token is not None and token != self.token:
+            self.clear()
+            self.token = token
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, table_name, key, value, size):
+        self.remove(key)
+        if size > self.budget_bytes:
+            return
+        self.entries[key] = (table_name, value, size)
+        self.used_bytes += size
+        while self.used_bytes > self.budget_bytes:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.used_bytes -= entry[2]
+
+    def invalidate_table(self, table_name):
+        for key in [key for key, entry in self.entries.items() if entry[0] == table_name]:
+            self.remove(key)
+
+    def clear(self):
+        self.entries.clear()
+        self.used_bytes = 0
+        self.token = None
+
+
+class EditJournal:
+    # Undo and redo history of unsaved grid edits. An operation is a tuple
+    # (step, kind, row id, column or position, old, new) and the operations of one user
+    # action share a step, so they are undone together:
+    #   ("edit", row id, column, old text or None if unedited, new text)
+    #   ("add", row id, position, None, JSON list of the row's texts)
+    #   ("remove", row id, position, JSON list of the row's [column, text] edits, None)
+    # Past memory_ops operations on a stack, the oldest half moves to a table in a private
+    # temporary database and is read back when undo or redo gets to it.
+    UNDO, REDO = 0, 1
+
+    def __init__(self, memory_ops=JOURNAL_MEMORY_OPS):
+        self.memory_ops = memory_ops
+        self.stacks = ([], [])
+        self.spilled = [0, 0]
+        self.step = 0
+        self.conn = None
+
+    def can_undo(self):
+        return bool(self.stacks[self.UNDO] or self.spilled[self.UNDO])
+
+    def can_redo(self):
+        return bool(self.stacks[self.REDO] or self.spilled[self.REDO])
+
+    def record(self, ops):
+        # ops are (kind, row id, column or position, old, new) for one user action
+        if not ops:
+            return
+        self.step += 1
+        self.push(self.UNDO, [(self.step,) + op for op in ops])
+        self.stacks[self.REDO].clear()
+        if self.spilled[self.REDO]:
+            self.conn.execute("DELETE FROM journal WHERE stack = ?", (self.REDO,))
+            self.spilled[self.REDO] = 0
+
+    def undo(self):
+        # The last step's operations, newest first
+        ops = self.pop_step(self.UNDO)
+        self.push(self.REDO, ops)
+        return ops
+
+    def redo(self):
+        # The next undone step's operations, oldest first
+        ops = self.pop_step(self.REDO)
+        self.push(self.UNDO, ops)
+        return ops
+
+    def push(self, stack, ops):
+        ops_stack = self.stacks[stack]
+        ops_stack.extend(ops)
+        if len(ops_stack) > self.memory_ops:
+            self.spill(stack, len(ops_stack) - self.memory_ops // 2)
+
+    def pop_step(self, stack):
+        ops_stack = self.stacks[stack]
+        if not ops_stack:
+            self.unspill(stack)
+        if not ops_stack:
+            return []
+        step = ops_stack[-1][0]
+        ops = []
+        while ops_stack and ops_stack[-1][0] == step:
+            ops.append(ops_stack.pop())
+            if not ops_stack:
+                self.unspill(stack)
+        return ops
+
+    def spill(self, stack, count):
+        if self.conn is None:
+            # An empty file name opens a temporary database that SQLite deletes on close
+            self.conn = sqlite3.connect("", isolation_level=None)
+            self.conn.execute(
+                "CREATE TABLE journal (stack INTEGER, seq INTEGER, step INTEGER, kind TEXT, row_id INTEGER, "
+                "position INTEGER, old, new, PRIMARY KEY (stack, seq)) WITHOUT ROWID")
+        ops_stack = self.stacks[stack]
+        first = self.spilled[stack]
+        self.conn.execute("BEGIN")
+        self.conn.executemany(
+            "INSERT INTO journal VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((stack, first + offset) + op for offset, op in enumerate(ops_stack[:count])))
+        self.conn.execute("COMMIT")
+        del ops_stack[:count]
+        self.spilled[stack] += count
+
+    def unspill(self, stack):
+        # Reads back the newest spilled operations, up to half the memory budget
+        if not self.spilled[stack]:
+            return
+        first = max(0, self.spilled[stack] - self.memory_ops // 2)
+        ops = [tuple(row) for row in self.conn.execute(
+            "SELECT step, kind, row_id, position, old, new FROM journal WHERE stack = ? AND seq >= ? ORDER BY seq",
+            (stack, first))]
+        self.conn.execute("DELETE FROM journal WHERE stack = ? AND seq >= ?", (stack, first))
+        self.stacks[stack][:0] = ops
+        self.spilled[stack] = first
+
+    def clear(self):
+        for ops_stack in self.stacks:
+            ops_stack.clear()
+        self.spilled = [0, 0]
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def has_cascading_writes(conn):
+    # True when writing one table can change another: a trigger, or a foreign key that
+    # updates or deletes child rows
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' UNION ALL "
+        "SELECT 1 FROM sqlite_master AS m, pragma_foreign_key_list(m.name) AS f WHERE m.type = 'table' "
+        "AND (f.on_delete NOT IN ('NO ACTION', 'RESTRICT') OR f.on_update NOT IN ('NO ACTION', 'RESTRICT')) "
+        "LIMIT 1").fetchone() is not None
+
+
+def browse_query(table_name, key_columns, current_filter=None, sort_column=None, sort_order="ASC",
+                 columns=None, lazy_flags=None):
+    sql = f"SELECT {select_list(key_columns, columns, lazy_flags)} FROM {quote_identifier(table_name)}"
+    where, params = filter_clause(current_filter)
+    if where:
+        sql += f" WHERE {where}"
+    if sort_column:
+        sql += f" ORDER BY {quote_identifier(sort_column)} {sort_order}"
+    return sql, params
+
+
+def filter_clause(current_filter):
+    # The editor's search as a WHERE condition and its parameters
+    if not current_filter:
+        return "", []
+    field_name, mode, term = current_filter
+    if mode == "Equals":
+        return f"{quote_identifier(field_name)} = ?", [term]
+    if mode == "Starts with":
+        return f"{quote_identifier(field_name)} LIKE ? ESCAPE '\\'", [escape_like(term) + "%"]
+    return f"{quote_identifier(field_name)} LIKE ? ESCAPE '\\'", ["%" + escape_like(term) + "%"]
+
+
+def key_where(key_columns):
+    return " AND ".join(f"{key if key == 'rowid' else quote_identifier(key)} = ?" for key in key_columns)
+
+
+def fetch_rows_by_key(conn, table_name, key_columns, keys, columns=None, lazy_flags=None):
+    # Re-reads the given rows; returns {key: values}. Keys missing from the result were deleted.
+    keys = list(keys)
+    if not keys:
+        return {}
+    key_sql = ", ".join(key if key == "rowid" else quote_identifier(key) for key in key_columns)
+    if len(key_columns) == 1:
+        where = f"{key_sql} IN ({','.join(['?'] * len(keys))})"
+    else:
+        row = f"({','.join(['?'] * len(key_columns))})"
+        where = f"({key_sql}) IN (VALUES {','.join([row] * len(keys))})"
+    params = [value for key in keys for value in key]
+    rows = conn.execute(
+        f"SELECT {select_list(key_columns, columns, lazy_flags)} FROM {quote_identifier(table_name)} WHERE {where}",
+        params).fetchall()
+    return dict(decode_row(row, len(key_columns), lazy_flags) for row in rows)
+
+
+def diff_rows(store, edited_rows, deleted_keys=()):
+    # store is the RowStore the grid was filled from; edited_rows is a list of
+    # (store index, texts) where the index is None for new rows and texts holds None for
+    # cells that were never edited. Edited cells whose text still matches the stored
+    # value are left alone, so untouched values keep their stored type.
+    updates = []
+    inserts = []
+    for idx, texts in edited_rows:
+        if idx is None:
+            inserts.append(list(texts))
+            continue
+        changed = {column: text for column, text in enumerate(texts)
+                   if text is not None and display_value(store.value(idx, column)) != text}
+        if changed:
+            updates.append((store.key(idx), changed))
+    return {"updates": updates, "inserts": inserts, "deletes": list(deleted_keys)}
+
+
+def parse_pasted_rows(text):
+    # Rows of a block copied from a spreadsheet (tab-separated) or from a CSV file. Quoted
+    # cells may hold delimiters and line breaks. Text without tabs is read as CSV only when
+    # every line splits into the same number of cells; otherwise each line is one value.
+    if text.endswith("\n"):
+        text = text[:-2] if text.endswith("\r\n") else text[:-1]
+    if not text:
+        return []
+    if "\t" in text:
+        return list(csv.reader(io.StringIO(text), delimiter="\t"))
+    rows = list(csv.reader(io.StringIO(text)))
+    if len({len(row) for row in rows}) == 1 and len(rows[0]) > 1:
+        return rows
+    return [[line] for line in text.splitlines()]
+
+
+def pasted_header(row, columns):
+    # Column positions named by a pasted header row, or None if the row is data
+    lower = {col.lower(): idx for idx, col in enumerate(columns)}
+    positions = [lower.get(text.strip().lower()) for text in row]
+    if None in positions or len(set(positions)) != len(positions):
+        return None
+    return positions
+
+
+def check_pasted_values(columns, constraints, cells, limit=CONFLICT_REPORT_LIMIT):
+    # NOT NULL and length problems among pasted (label, column index, text) cells, checked
+    # column by column so unconstrained columns are skipped. At most limit are listed.
+    by_column = {}
+    for label, idx, text in cells:
+        by_column.setdefault(idx, []).append((label, text))
+    problems = []
+    for idx in sorted(by_column):
+        column_constraints = constraints.get(columns[idx], {}) or {}
+        if not column_constraints.get("not_null", False) and column_constraints.get("max_length") is None:
+            continue
+        for label, text in by_column[idx]:
+            try:
+                validate_value(columns[idx], text, column_constraints)
+            except ValueError as e:
+                problems.append(f"{label}: {e}")
+                if len(problems) >= limit:
+                    return problems
+    return problems
+
+
+def validate_changes(columns, constraints, changes):
+    for _, changed in changes["updates"]:
+        for idx, text in changed.items():
+            validate_value(columns[idx], text, constraints.get(columns[idx], {}))
+    for texts in changes["inserts"]:
+        for idx, text in enumerate(texts):
+            validate_value(columns[idx], text, constraints.get(columns[idx], {}))
+
+
+def skip_quoted(sql, idx):
+    # Index just past the string, quoted identifier or comment starting at idx, or idx
+    # itself when nothing quoted starts there
+    char = sql[idx]
+    if sql.startswith("--", idx):
+        end = sql.find("\n", idx)
+        return len(sql) if end < 0 else end + 1
+    if sql.startswith("/*", idx):
+        end = sql.find("*/", idx + 2)
+        return len(sql) if end < 0 else end + 2
+    if char == "[":
+        end = sql.find("]", idx + 1)
+        return len(sql) if end < 0 else end + 1
+    if char in "'\"`":
+        end = idx + 1
+        while True:
+            end = sql.find(char, end)
+            if end < 0:
+                return len(sql)
+            # A doubled quote is an escaped one
+            if not sql.startswith(char * 2, end):
+                return end + 1
+            end += 2
+    return idx
+
+
+def check_constraints(create_sql):
+    # The expression of every CHECK constraint in a CREATE TABLE statement, whether it
+    # is written on a column or on the table
+    checks = []
+    idx = 0
+    while idx < len(create_sql):
+        after = skip_quoted(create_sql, idx)
+        if after != idx:
+            idx = after
+            continue
+        match = re.compile(r"CHECK\s*\(", re.IGNORECASE).match(create_sql, idx)
+        if not match or (idx and (create_sql[idx - 1].isalnum() or create_sql[idx - 1] == "_")):
+            idx += 1
+            continue
+        start = idx = match.end()
+        depth = 1
+        while idx < len(create_sql) and depth:
+            after = skip_quoted(create_sql, idx)
+            if after != idx:
+                idx = after
+                continue
+            depth += {"(": 1, ")": -1}.get(create_sql[idx], 0)
+            idx += 1
+        checks.append(create_sql[start:idx - 1].strip())
+    return checks
+
+
+def unique_keys(conn, table_name, key_columns):
+    # [(columns, collations)] for every UNIQUE or PRIMARY KEY index of the table, and for
+    # an INTEGER PRIMARY KEY, which has no index of its own. Partial and expression
+    # indexes are left to SQLite to enforce.
+    keys = []
+    for _, index_name, unique, _, partial in conn.execute(f"PRAGMA index_list({quote_identifier(table_name)})"):
+        if not unique or partial:
+            continue
+        info = [row for row in conn.execute(f"PRAGMA index_xinfo({quote_identifier(index_name)})") if row[5]]
+        if any(row[1] < 0 for row in info):
+            continue
+        keys.append(([row[2] for row in info], [row[4] for row in info]))
+    if key_columns != ["rowid"] and key_columns not in [columns for columns, _ in keys]:
+        keys.append((list(key_columns), ["BINARY"] * len(key_columns)))
+    return keys
+
+
+def stage_changes(conn, table_name, columns, column_types, key_columns, changes):
+    # Copies the rows a save would write into a temp table with the table's column types:
+    # inserts as converted, updates as the stored row with the edited values applied, and
+    # deletes as their key. Each row keeps its operation, its position in changes, its
+    # original key and, for updates, the edited column indexes.
+    quoted_table = f"main.{quote_identifier(table_name)}"
+    staging = f"temp.{STAGING_TABLE}"
+    types = [column_types[col] for col in columns]
+    key_names = [f'"__stage_k{idx}"' for idx in range(len(key_columns))]
+    conn.execute(f"DROP TABLE IF EXISTS {staging}")
+    conn.execute(
+        f'CREATE TABLE {staging} ("__stage_op" TEXT, "__stage_pos" INTEGER, "__stage_cols" TEXT, '
+        f'{", ".join(key_names)}, '
+        + ", ".join(f"{quote_identifier(col)} {col_type}" for col, col_type in zip(columns, types)) + ")")
+    targets = ", ".join(['"__stage_op"', '"__stage_pos"', '"__stage_cols"'] + key_names
+                        + [quote_identifier(col) for col in columns])
+    if changes["deletes"]:
+        conn.executemany(
+            f'INSERT INTO {staging} ("__stage_op", "__stage_pos", {", ".join(key_names)}) '
+            f"VALUES ('delete', ?, {', '.join(['?'] * len(key_columns))})",
+            [[pos] + list(key) for pos, key in enumerate(changes["deletes"])])
+    if changes["inserts"]:
+        conn.executemany(
+            f"INSERT INTO {staging} ({targets}) VALUES ('insert', ?, NULL, {', '.join(['NULL'] * len(key_columns))}, "
+            f"{', '.join(['?'] * len(columns))})",
+            [[pos] + [convert_value(text, types[idx]) for idx, text in enumerate(texts)]
+             for pos, texts in enumerate(changes["inserts"])])
+    # Rows that changed the same set of columns share one prepared INSERT ... SELECT
+    groups = {}
+    for pos, (key, changed) in enumerate(changes["updates"]):
+        groups.setdefault(tuple(sorted(changed)), []).append((pos, key, changed))
+    for indexes, group in groups.items():
+        values = ", ".join("?" if idx in indexes else quote_identifier(col) for idx, col in enumerate(columns))
+        conn.executemany(
+            f"INSERT INTO {staging} ({targets}) SELECT 'update', ?, ?, {', '.join(['?'] * len(key_columns))}, {values} "
+            f"FROM {quoted_table} WHERE {key_where(key_columns)}",
+            [[pos, ",".join(map(str, indexes))] + list(key) + [convert_value(changed[idx], types[idx]) for idx in indexes] + list(key)
+             for pos, key, changed in group])
+
+
+def check_staged(conn, table_name, columns, key_columns):
+    # Checks the staged rows against the table's NOT NULL, CHECK and UNIQUE constraints.
+    # Every query reads only staged rows, and the UNIQUE lookups go through the index
+    # that enforces them, so the cost follows the size of the edit. Returns a list of
+    # conflicts.
+    quoted_table = f"main.{quote_identifier(table_name)}"
+    staging = f"temp.{STAGING_TABLE}"
+    key_names = [f'"__stage_k{idx}"' for idx in range(len(key_columns))]
+    written = f"FROM {staging} AS __staged WHERE __staged.\"__stage_op\" != 'delete'"
+    describe = ", ".join(['__staged."__stage_op"', '__staged."__stage_pos"']
+                         + [f"__staged.{name}" for name in key_names])
+
+    def label(row):
+        if row[0] == "insert":
+            return f"new row {row[1] + 1}"
+        return ", ".join(f"{col}={value}" for col, value in zip(key_columns, row[2:]))
+
+    conflicts = []
+    # The rowid alias is assigned when left NULL; WITHOUT ROWID primary keys are NOT NULL
+    rowid_alias = rowid_alias_column(conn, table_name, key_columns)
+    info = {col[1]: col for col in table_info(conn, table_name)}
+    for col in columns:
+        not_null = info[col][3] or (col in key_columns and rowid_alias is None)
+        if not_null and col != rowid_alias:
+            for row in conn.execute(f"SELECT {describe} {written} AND __staged.{quote_identifier(col)} IS NULL"):
+                conflicts.append(f"{label(row)}: '{col}' cannot be NULL")
+
+    for expr in check_constraints(create_table_sql(conn, table_name)):
+        try:
+            rows = conn.execute(f"SELECT {describe} {written} AND NOT ({expr})").fetchall()
+        except sqlite3.OperationalError:
+            # Refers to something a staged row does not have; SQLite checks it on save
+            continue
+        conflicts += [f"{label(row)}: fails CHECK ({expr})" for row in rows]
+
+    leaving = f"SELECT {', '.join(key_names)} FROM {staging} WHERE \"__stage_op\" != 'insert'"
+    table_key = ", ".join(f"__target.{key if key == 'rowid' else quote_identifier(key)}" for key in key_columns)
+    for key_cols, collations in unique_keys(conn, table_name, key_columns):
+        quoted = [quote_identifier(col) for col in key_cols]
+        shown = ", ".join(key_cols)
+        present = " AND ".join(f"__staged.{q} IS NOT NULL" for q in quoted)
+        grouping = ", ".join(f"__staged.{q} COLLATE {coll}" for q, coll in zip(quoted, collations))
+        # Two staged rows with the same value, in one pass over the batch
+        for row in conn.execute(
+                f"SELECT count(*), {', '.join(f'__staged.{q}' for q in quoted)} {written} AND {present} "
+                f"GROUP BY {grouping} HAVING count(*) > 1"):
+            conflicts.append(f"UNIQUE ({shown}): {row[0]} edited rows share the value {display_key(row[1:])}")
+        # A staged row matching a row that stays in the table. Rows being updated or
+        # deleted are skipped, since their current values are about to change.
+        matches = " AND ".join(f"__target.{q} = __staged.{q} COLLATE {coll}" for q, coll in zip(quoted, collations))
+        for row in conn.execute(
+                f"SELECT {describe}, {', '.join(f'__staged.{q}' for q in quoted)} {written} AND {present} AND EXISTS ("
+                f"SELECT 1 FROM {quoted_table} AS __target WHERE {matches} AND ({table_key}) NOT IN ({leaving}))"):
+            conflicts.append(f"{label(row)}: UNIQUE ({shown}) value {display_key(row[2 + len(key_columns):])} "
+                             f"already exists in the table")
+    return conflicts
+
+
+def rowid_alias_column(conn, table_name, key_columns):
+    # The INTEGER PRIMARY KEY column that names the rowid, if the table has one
+    if len(key_columns) == 1 and key_columns != ["rowid"] and not is_without_rowid(conn, table_name):
+        return key_columns[0]
+    return None
+
+
+def display_key(values):
+    return ", ".join(repr(value) for value in values)
+
+
+def save_row_changes(conn, table_name, columns, column_types, key_columns, changes):
+    # Validates and writes a diff_rows result in one transaction: the rows are staged in a
+    # temp table, checked against the table's constraints (raising ConstraintConflicts
+    # before anything is written) and applied from the staging table. Returns the keys of
+    # the inserted rows, the converted values written per row and {old key: new key} for
+    # updates that changed a key column.
+    with transaction(conn):
+        stage_changes(conn, table_name, columns, column_types, key_columns, changes)
+        conflicts = check_staged(conn, table_name, columns, key_columns)
+        if conflicts:
+            more = len(conflicts) - CONFLICT_REPORT_LIMIT
+            raise ConstraintConflicts("\n".join(conflicts[:CONFLICT_REPORT_LIMIT])
+                                      + (f"\n... and {more} more" if more > 0 else ""))
+        result = apply_staged(conn, table_name, columns, column_types, key_columns, changes)
+        conn.execute(f"DROP TABLE temp.{STAGING_TABLE}")
+    return result
+
+
+def apply_staged(conn, table_name, columns, column_types, key_columns, changes):
+    # One DELETE, one UPDATE per set of edited columns and one INSERT, whatever the number
+    # of rows
+    quoted_table = f"main.{quote_identifier(table_name)}"
+    staging = f"temp.{STAGING_TABLE}"
+    types = [column_types[col] for col in columns]
+    key_names = [f'"__stage_k{idx}"' for idx in range(len(key_columns))]
+    table_keys = [key if key == "rowid" else quote_identifier(key) for key in key_columns]
+    table_key = ", ".join(table_keys)
+    # The staging table has the same column names, so the target's are always qualified
+    target_key = ", ".join(f"{quoted_table}.{key}" for key in table_keys)
+    staged_key = ", ".join(key_names)
+    staged_alias_key = ", ".join(f"__staged.{name}" for name in key_names)
+
+    if changes["deletes"]:
+        conn.execute(f"DELETE FROM {quoted_table} WHERE ({table_key}) IN "
+                     f"(SELECT {staged_key} FROM {staging} WHERE \"__stage_op\" = 'delete')")
+
+    key_indexes = [columns.index(col) if col in columns else None for col in key_columns]
+    written = {}
+    rekeyed = {}
+    groups = set()
+    for key, changed in changes["updates"]:
+        indexes = tuple(sorted(changed))
+        groups.add(indexes)
+        new_values = {idx: convert_value(changed[idx], types[idx]) for idx in indexes}
+        new_key = tuple(new_values.get(idx, old) for idx, old in zip(key_indexes, key))
+        if new_key != key:
+            rekeyed[key] = new_key
+        written[new_key] = new_values
+    for indexes in groups:
+        targets = ", ".join(quote_identifier(columns[idx]) for idx in indexes)
+        sources = ", ".join(f"__staged.{quote_identifier(columns[idx])}" for idx in indexes)
+        group = f"__staged.\"__stage_op\" = 'update' AND __staged.\"__stage_cols\" = ?"
+        cols_text = ",".join(map(str, indexes))
+        if UPDATE_FROM:
+            conn.execute(f"UPDATE {quoted_table} SET ({targets}) = ({sources}) FROM {staging} AS __staged "
+                         f"WHERE {group} AND ({target_key}) = ({staged_alias_key})", (cols_text,))
+        else:
+            conn.execute(f"UPDATE {quoted_table} SET ({targets}) = (SELECT {sources} FROM {staging} AS __staged "
+                         f"WHERE {group} AND ({staged_alias_key}) = ({target_key})) "
+                         f"WHERE ({table_key}) IN "
+                         f"(SELECT {staged_alias_key} FROM {staging} AS __staged WHERE {group})",
+                         (cols_text, cols_text))
+
+    inserted_keys = []
+    if changes["inserts"]:
+        # New rowids are given out here, above every existing and staged one, so the
+        # inserted rows' keys are known without reading them back one by one
+        alias = rowid_alias_column(conn, table_name, key_columns)
+        target = '"__stage_k0"' if key_columns == ["rowid"] else quote_identifier(alias) if alias else None
+        if target:
+            base = conn.execute(
+                f"SELECT max(ifnull((SELECT max(rowid) FROM {quoted_table}), 0), "
+                f"ifnull((SELECT max({target}) FROM {staging} WHERE \"__stage_op\" = 'insert'), 0))").fetchone()[0]
+            if "AUTOINCREMENT" in create_table_sql(conn, table_name).upper():
+                seq = conn.execute("SELECT seq FROM main.sqlite_sequence WHERE name = ?", (table_name,)).fetchone()
+                base = max(base, seq[0] if seq else 0)
+            conn.execute(f"UPDATE {staging} SET {target} = ? + \"__stage_pos\" + 1 "
+                         f"WHERE \"__stage_op\" = 'insert' AND {target} IS NULL", (base,))
+        if key_columns != ["rowid"]:
+            conn.execute(f"UPDATE {staging} SET " + ", ".join(
+                f"{name} = {quote_identifier(key)}" for name, key in zip(key_names, key_columns))
+                + " WHERE \"__stage_op\" = 'insert'")
+        quoted_columns = ", ".join(quote_identifier(col) for col in columns)
+        rowid_target = "rowid, " if key_columns == ["rowid"] else ""
+        rowid_source = '"__stage_k0", ' if key_columns == ["rowid"] else ""
+        conn.execute(f"INSERT INTO {quoted_table} ({rowid_target}{quoted_columns}) "
+                     f"SELECT {rowid_source}{quoted_columns} FROM {staging} "
+                     f"WHERE \"__stage_op\" = 'insert' ORDER BY \"__stage_pos\"")
+        for row in conn.execute(f"SELECT {staged_key}, {quoted_columns} FROM {staging} "
+                                f"WHERE \"__stage_op\" = 'insert' ORDER BY \"__stage_pos\""):
+            key = tuple(row[:len(key_columns)])
+            inserted_keys.append(key)
+            written[key] = dict(enumerate(row[len(key_columns):]))
+    return inserted_keys, written, rekeyed
+
+
+class CellReader:
+    # Reads one value in byte chunks, through incremental BLOB I/O when the row has a
+    # rowid and with substr() on the value cast to BLOB for WITHOUT ROWID tables
+    def __init__(self, conn, table_name, column, key_columns, key):
+        self.conn = conn
+        self.table_name = table_name
+        self.column = column
+        self.where = key_where(key_columns)
+        self.key = list(key)
+        q = quote_identifier(column)
+        row = conn.execute(
+            f"SELECT typeof({q}), CASE typeof({q}) WHEN 'blob' THEN length({q}) ELSE length(CAST({q} AS BLOB)) END "
+            f"FROM {quote_identifier(table_name)} WHERE {self.where}", self.key).fetchone()
+        if row is None:
+            raise ValueError("The row no longer exists.")
+        self.kind, self.length = row[0], row[1] or 0
+        self.rowid = rowid_for_key(conn, table_name, key_columns, key)
+
+    def read(self, offset, size, conn=None):
+        # conn lets a long-lived reader fetch each chunk on whichever pooled connection is free
+        conn = conn or self.conn
+        if self.rowid is not None and self.kind in ("blob", "text"):
+            with conn.blobopen(self.table_name, self.column, self.rowid, readonly=True) as blob:
+                blob.seek(offset)
+                return blob.read(size)
+        value = conn.execute(
+            f"SELECT substr(CAST({quote_identifier(self.column)} AS BLOB), ?, ?) FROM {quote_identifier(self.table_name)} "
+            f"WHERE {self.where}", [offset + 1, size] + self.key).fetchone()
+        return value[0] if value and value[0] is not None else b""
+
+
+def rowid_for_key(conn, table_name, key_columns, key):
+    if key_columns == ["rowid"]:
+        return key[0]
+    try:
+        row = conn.execute(
+            f"SELECT rowid FROM {quote_identifier(table_name)} WHERE {key_where(key_columns)}", list(key)).fetchone()
+    except sqlite3.OperationalError:
+        # WITHOUT ROWID table
+        return None
+    return row[0] if row else None
+
+
+def export_cell(conn, table_name, column, key_columns, key, file_path, progress=None):
+    reader = CellReader(conn, table_name, column, key_columns, key)
+    with open(file_path, "wb") as f:
+        for offset in range(0, reader.length, CELL_CHUNK_SIZE):
+            f.write(reader.read(offset, CELL_CHUNK_SIZE))
+            if progress:
+                progress(min(offset + CELL_CHUNK_SIZE, reader.length), reader.length)
+    return reader.length
+
+
+def import_cell(conn, table_name, column, key_columns, key, file_path, progress=None):
+    # Stores a file as the cell's BLOB value, streaming it through incremental BLOB I/O
+    size = os.path.getsize(file_path)
+    quoted = quote_identifier(table_name)
+    with transaction(conn):
+        rowid = rowid_for_key(conn, table_name, key_columns, key)
+        with open(file_path, "rb") as f:
+            if rowid is None:
+                conn.execute(f"UPDATE {quoted} SET {quote_identifier(column)} = ? WHERE {key_where(key_columns)}",
+                             [f.read()] + list(key))
+                return size
+            conn.execute(f"UPDATE {quoted} SET {quote_identifier(column)} = zeroblob(?) WHERE rowid = ?", (size, rowid))
+            with conn.blobopen(table_name, column, rowid) as blob:
+                written = 0
+                while True:
+                    chunk = f.read(CELL_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    blob.write(chunk)
+                    written += len(chunk)
+                    if progress:
+                        progress(written, size)
+    return size
+
+
+def truncate_table(conn, table_name):
+    with transaction(conn):
+        conn.execute(f"DELETE FROM {quote_identifier(table_name)}")
+
+
+def import_csv(conn, table_name, file_path, date_columns=DATE_COLUMNS, batch_size=IMPORT_BATCH_SIZE,
+               progress=None, cancelled=None):
+    # Validates and inserts every row of a CSV whose header matches the table's columns,
+    # all in one transaction. Returns the number of rows imported.
+    info = table_info(conn, table_name)
+    db_columns = [col[1] for col in info]
+    column_types = [col[2] for col in info]
+    constraints = [parse_column_constraints(col) for col in info]
+    insert_sql = f"INSERT INTO {quote_identifier(table_name)} VALUES ({','.join(['?'] * len(db_columns))})"
+    count = 0
+    with open(file_path, "r", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header != db_columns:
+            raise ValueError("CSV header doesn't match table columns")
+        with transaction(conn):
+            batch = []
+            for row in reader:
+                if len(row) != len(db_columns):
+                    raise ValueError(f"Line {reader.line_num} has {len(row)} values, expected {len(db_columns)}.")
+                for col_idx, col_name in enumerate(db_columns):
+                    if col_name in date_columns:
+                        row[col_idx] = normalize_date(row[col_idx])
+                    validate_value(col_name, row[col_idx], constraints[col_idx])
+                batch.append([convert_value(value, column_types[idx]) for idx, value in enumerate(row)])
+                if len(batch) >= batch_size:
+                    if cancelled and cancelled():
+                        raise ImportCancelled()
+                    conn.executemany(insert_sql, batch)
+                    count += len(batch)
+                    batch = []
+                    if progress:
+                        progress(count)
+            if batch:
+                conn.executemany(insert_sql, batch)
+                count += len(batch)
+    return count
+
+
+def write_csv(file_path, columns, rows):
+    with open(file_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def export_table_csv(conn, table_name, file_path, current_filter=None, sort_column=None, sort_order="ASC"):
+    # Streams a table (optionally filtered like the editor's search) to CSV.
+    # Returns the number of rows written.
+    columns = [col[1] for col in table_info(conn, table_name)]
+    sql, params = browse_query(table_name, [], current_filter, sort_column, sort_order)
+    count = 0
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        with open(file_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            while True:
+                rows = cursor.fetchmany(IMPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                writer.writerows([display_value(value) for value in row] for row in rows)
+                count += len(rows)
+    finally:
+        cursor.close()
+    return count
+
+
+# Bulk column changes
+
+def regexp_replace(pattern, replacement, value):
+    # Text values only; a value the pattern leaves alone is returned as it was, so it does
+    # not count as changed
+    if not isinstance(value, (str, int, float)):
+        return value
+    text = str(value)
+    result = re.sub(pattern, replacement, text)
+    return value if result == text else result
+
+
+def plan_bulk_change(table_name, column, col_type, operation, find="", replacement="", current_filter=None,
+                     order_columns=(), key_columns=("rowid",)):
+    # A bulk column change over the rows matching the editor's search. find is the text,
+    # pattern or SQL expression; replacement is the replacement text or the value to set.
+    # order_columns are (column, "ASC"/"DESC") pairs giving the row order fill-down follows,
+    # before the key. The plan's "select" query lists (key columns..., old value, new value)
+    # for every row that would change; when the new value depends only on the row itself,
+    # "set" and "where" let the change run as a plain UPDATE.
+    if operation not in BULK_OPERATIONS:
+        raise ValueError(f"Unknown bulk operation '{operation}'.")
+    q = quote_identifier(column)
+    quoted_table = quote_identifier(table_name)
+    table_keys = [key if key == "rowid" else quote_identifier(key) for key in key_columns]
+    keys = ", ".join(f'{key} AS "__bulk_k{idx}"' for idx, key in enumerate(table_keys))
+    where, where_params = filter_clause(current_filter)
+
+    if operation == "fill-down":
+        # Empty cells (NULL or '') take the value of the last non-empty cell above them.
+        # The running count of non-empty cells numbers each run, which starts with its value.
+        order = ", ".join([f"{quote_identifier(col)} {direction}" for col, direction in order_columns]
+                          + [f"{key} ASC" for key in table_keys])
+        empty = f"({q} IS NULL OR {q} = '')"
+        key_names = ", ".join(f'"__bulk_k{idx}"' for idx in range(len(key_columns)))
+        runs = (f"SELECT {keys}, {q} AS \"__bulk_old\", "
+                f"count(CASE WHEN {empty} THEN NULL ELSE 1 END) OVER (ORDER BY {order} ROWS UNBOUNDED PRECEDING) AS \"__bulk_run\", "
+                f"row_number() OVER (ORDER BY {order}) AS \"__bulk_pos\" "
+                f"FROM {quoted_table}" + (f" WHERE {where}" if where else ""))
+        filled = (f"SELECT {key_names}, \"__bulk_old\", \"__bulk_run\", "
+                  f"first_value(\"__bulk_old\") OVER (PARTITION BY \"__bulk_run\" ORDER BY \"__bulk_pos\") AS \"__bulk_new\" "
+                  f"FROM ({runs})")
+        return {"select": f"SELECT {key_names}, \"__bulk_old\", \"__bulk_new\" FROM ({filled}) "
+                          f"WHERE \"__bulk_run\" > 0 AND (\"__bulk_old\" IS NULL OR \"__bulk_old\" = '')",
+                "params": where_params, "set": None}
+
+    conditions = [where] if where else []
+    condition_params = list(where_params)
+    if operation == "replace":
+        if not find:
+            raise ValueError("Enter the text to replace.")
+        if find == replacement:
+            raise ValueError("The replacement is the same as the text it replaces.")
+        new, new_params = f"replace({q}, ?, ?)", [find, replacement]
+        conditions.append(f"instr({q}, ?) > 0")
+        condition_params.append(find)
+    else:
+        if operation == "regex":
+            try:
+                re.compile(find)
+            except re.error as e:
+                raise ValueError(f"Invalid regular expression: {e}")
+            new, new_params = f"regexp_replace(?, ?, {q})", [find, replacement]
+        elif operation == "set":
+            value = convert_value(replacement, col_type)
+            if value is None and replacement not in ("", "NULL"):
+                raise ValueError(f"'{replacement}' is not a valid {col_type} value for '{column}'.")
+            new, new_params = "?", [value]
+        elif operation == "null":
+            new, new_params = "NULL", []
+        else:
+            if not find.strip():
+                raise ValueError("Enter an SQL expression, for example upper(name).")
+            new, new_params = f"({find})", []
+        conditions.append(f"{new} IS NOT {q}")
+        condition_params += new_params
+    where = " AND ".join(conditions)
+    return {"select": f"SELECT {keys}, {q} AS \"__bulk_old\", {new} AS \"__bulk_new\" FROM {quoted_table} WHERE {where}",
+            "params": new_params + condition_params,
+            "set": new, "set_params": new_params, "where": where, "where_params": condition_params}
+
+
+def preview_bulk_change(conn, table_name, plan, limit=BULK_PREVIEW_ROWS):
+    # (rows that would change, the first few (old, new) pairs)
+    conn.create_function("regexp_replace", 3, regexp_replace, deterministic=True)
+    if plan["set"] is None:
+        # Window queries sort every row before returning the first, so they are counted in the same pass
+        rows = conn.execute(f"SELECT \"__bulk_old\", \"__bulk_new\", count(*) OVER () FROM ({plan['select']}) LIMIT ?",
+                            list(plan["params"]) + [limit]).fetchall()
+        return (rows[0][2] if rows else 0), [row[:2] for row in rows]
+    count = conn.execute(f"SELECT count(*) FROM {quote_identifier(table_name)} WHERE {plan['where']}",
+                         plan["where_params"]).fetchone()[0]
+    sample = conn.execute(f"SELECT \"__bulk_old\", \"__bulk_new\" FROM ({plan['select']}) LIMIT ?",
+                          list(plan["params"]) + [limit]).fetchall()
+    return count, sample
+
+
+def apply_bulk_change(conn, table_name, column, key_columns, plan):
+    # One UPDATE, in one transaction. Returns the number of rows changed.
+    conn.create_function("regexp_replace", 3, regexp_replace, deterministic=True)
+    quoted_table = f"main.{quote_identifier(table_name)}"
+    q = quote_identifier(column)
+    sql, params = plan["select"], plan["params"]
+    table_keys = [key if key == "rowid" else quote_identifier(key) for key in key_columns]
+    target_key = ", ".join(f"{quoted_table}.{key}" for key in table_keys)
+    bulk_key = ", ".join(f'__bulk."__bulk_k{idx}"' for idx in range(len(key_columns)))
+    with transaction(conn):
+        if plan["set"] is not None:
+            cursor = conn.execute(f"UPDATE {quoted_table} SET {q} = {plan['set']} WHERE {plan['where']}",
+                                  plan["set_params"] + plan["where_params"])
+        elif UPDATE_FROM:
+            cursor = conn.execute(f"UPDATE {quoted_table} SET {q} = __bulk.\"__bulk_new\" FROM ({sql}) AS __bulk "
+                                  f"WHERE ({target_key}) = ({bulk_key})", params)
+        else:
+            # The changed rows are collected first, so the window query runs once
+            conn.execute(f"DROP TABLE IF EXISTS temp.{BULK_TABLE}")
+            conn.execute(f"CREATE TEMP TABLE {BULK_TABLE} AS {sql}", params)
+            conn.execute(f"CREATE INDEX temp.{BULK_TABLE}_key ON {BULK_TABLE} ({bulk_key.replace('__bulk.', '')})")
+            cursor = conn.execute(
+                f"UPDATE {quoted_table} SET {q} = (SELECT __bulk.\"__bulk_new\" FROM temp.{BULK_TABLE} AS __bulk "
+                f"WHERE ({bulk_key}) = ({target_key})) "
+                f"WHERE ({', '.join(table_keys)}) IN (SELECT {bulk_key} FROM temp.{BULK_TABLE} AS __bulk)")
+            conn.execute(f"DROP TABLE temp.{BULK_TABLE}")
+    return cursor.rowcount
+
+
+# Column profiles
+
+def profile_text(value):
+    # Short display text for a profiled value; long ones are ColumnSketch keys
+    if isinstance(value, tuple):
+        return str(LazyCell(value[0], value[1], value[3]))
+    if isinstance(value, bytes):
+        return str(LazyCell("blob", len(value), value[:PREVIEW_CHARS]))
+    if isinstance(value, str) and len(value) > PREVIEW_CHARS:
+        return str(LazyCell("text", len(value), value[:PREVIEW_CHARS]))
+    return display_value(value)
+
+
+class ColumnSketch:
+    # SQLite aggregate behind profile_table. Counts every value exactly until a column has
+    # more than PROFILE_EXACT_VALUES distinct ones. After that it keeps only the heaviest
+    # counts (Misra-Gries, so counts may be low by at most undercount) and estimates the
+    # distinct count with a HyperLogLog seeded from the values counted so far.
+    def __init__(self):
+        self.counts = {}
+        self.registers = None
+        self.undercount = 0
+
+    def step(self, value):
+        # Called for every row, so a value already counted takes the shortest path
+        if value is None:
+            return
+        counts = self.counts
+        count = counts.get(value)
+        if count is None:
+            self.add(value)
+        else:
+            counts[value] = count + 1
+
+    def add(self, value):
+        counts = self.counts
+        if type(value) in (str, bytes) and len(value) > PREVIEW_CHARS:
+            # Long values are counted under their length, hash and a prefix
+            value = ("blob" if type(value) is bytes else "text", len(value), hash(value), value[:PREVIEW_CHARS])
+            count = counts.get(value)
+            if count is not None:
+                counts[value] = count + 1
+                return
+        counts[value] = 1
+        if self.registers is not None:
+            self.add_hash(value)
+        if len(counts) > PROFILE_EXACT_VALUES:
+            if self.registers is None:
+                self.registers = bytearray(1 << HLL_BITS)
+                for key in counts:
+                    self.add_hash(key)
+            self.prune()
+
+    def add_hash(self, value):
+        # Python's hash of an integer is the integer itself, so it is mixed (splitmix64)
+        h = hash(value) & 0xFFFFFFFFFFFFFFFF
+        h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        h ^= h >> 31
+        index = h & ((1 << HLL_BITS) - 1)
+        rank = 65 - HLL_BITS - (h >> HLL_BITS).bit_length()
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def prune(self):
+        # Subtracts the count of the (keep + 1)-th most frequent value from every count
+        keep = PROFILE_EXACT_VALUES // 2
+        threshold = heapq.nlargest(keep + 1, self.counts.values())[-1]
+        self.counts = {value: count - threshold for value, count in self.counts.items() if count > threshold}
+        self.undercount += threshold
+
+    def distinct(self):
+        if self.registers is None:
+            return len(self.counts)
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def finalize(self):
+        # Only values known to repeat are reported: more than once, or more often than
+        # pruning could have undercounted
+        top = heapq.nlargest(PROFILE_TOP_K, self.counts.items(), key=itemgetter(1))
+        return json.dumps({
+            "distinct": self.distinct(), "exact": self.registers is None, "undercount": self.undercount,
+            "top": [[profile_text(value), count] for value, count in top if count > max(1, self.undercount)],
+        })
+
+
+def profile_table(conn, table_name):
+    # Row count, NULLs, distinct values, min, max, average length and most common values
+    # of every column, from a single scan of the table. Returns one dict per column.
+    columns = table_info(conn, table_name)
+    conn.create_aggregate("profile_sketch", 1, ColumnSketch)
+    items = ["count(*)"]
+    for col in columns:
+        q = quote_identifier(col[1])
+        items += [f"count({q})", f"min({q})", f"max({q})", f"avg(length({q}))", f"profile_sketch({q})"]
+    row = conn.execute(f"SELECT {', '.join(items)} FROM {quote_identifier(table_name)}").fetchone()
+    profiles = []
+    for idx, col in enumerate(columns):
+        count, min_value, max_value, avg_length, sketch = row[1 + idx * 5:6 + idx * 5]
+        # An empty table never calls the aggregate
+        sketch = json.loads(sketch) if sketch else {"distinct": 0, "exact": True, "undercount": 0, "top": []}
+        profiles.append({
+            "column": col[1], "type": col[2], "rows": row[0], "nulls": row[0] - count,
+            "distinct": sketch["distinct"], "distinct_exact": sketch["exact"],
+            "min": None if min_value is None else profile_text(min_value),
+            "max": None if max_value is None else profile_text(max_value),
+            "avg_length": avg_length, "top": sketch["top"], "top_undercount": sketch["undercount"],
+        })
+    return profiles
@@ -0,0 +1,414 @@
+import bisect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Statements and operations slower than these are written to the slow log
+SLOW_STATEMENT_MS = 50
+SLOW_OPERATION_MS = 250
+SLOW_LOG_PATH = os.environ.get(
+    "SQLITE_EDITOR_SLOW_LOG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "slow_operations.jsonl"))
+# Upper bounds of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+# The progress handler fires every this many virtual machine instructions
+PROGRESS_STEPS = 1000
+TRACE_SIZE = 200
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, elapsed_ms):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, fraction):
+        # Returns the upper bound of the bucket holding the requested rank
+        rank = fraction * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return LATENCY_BUCKETS_MS[idx] if idx < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return 0.0
+
+
+def params_shape(parameters):
+    # Logs the shape of the bound parameters, never their values
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {"named": sorted(parameters)}
+    try:
+        return {"count": len(parameters), "types": [type(value).__name__ for value in parameters]}
+    except TypeError:
+        return {"type": type(parameters).__name__}
+
+
+def statement_kind(sql):
+    words = sql.lstrip(" \t\r\n(").split(None, 1)
+    return words[0].upper().rstrip(";") if words else "?"
+
+
+class Operation:
+    def __init__(self, diagnostics, name, details):
+        self.diagnostics = diagnostics
+        self.name = name
+        self.details = details
+        self.counters = diagnostics.thread_counters()
+        self.start_sql_ms = self.counters["sql_ms"]
+        self.start_statements = self.counters["statements"]
+        self.previous = self.counters["operation"]
+        self.counters["operation"] = name
+        self.start = time.perf_counter()
+        self.finished = False
+
+    def finish(self, rows=None, error=None):
+        # Safe to call more than once; only the first call is recorded
+        if self.finished:
+            return
+        self.finished = True
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        self.counters["operation"] = self.previous
+        sql_ms = self.counters["sql_ms"] - self.start_sql_ms
+        self.diagnostics.record("Operation " + self.name, elapsed_ms, SLOW_OPERATION_MS, {
+            "kind": "operation",
+            "name": self.name,
+            "rows": rows,
+            "duration_ms": round(elapsed_ms, 3),
+            "sql_ms": round(sql_ms, 3),
+            "other_ms": round(elapsed_ms - sql_ms, 3),
+            "statements": self.counters["statements"] - self.start_statements,
+            "error": error,
+            **self.details,
+        })
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(error=str(exc) if exc else None)
+        return False
+
+
+class Diagnostics:
+    # Collects latency histograms, a trace of recent statements and the slow log
+    # for every instrumented connection in the process, from any thread
+    def __init__(self, slow_log_path=SLOW_LOG_PATH):
+        self.slow_log_path = slow_log_path
+        # The trace callback runs for every statement step, including each row of an
+        # executemany, so collecting is off until the panel turns it on
+        self.trace_enabled = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.histograms = {}
+        self.trace = deque(maxlen=TRACE_SIZE)
+        self.slow = deque(maxlen=TRACE_SIZE)
+
+    def thread_counters(self):
+        counters = getattr(self.local, "counters", None)
+        if counters is None:
+            counters = self.local.counters = {"sql_ms": 0.0, "statements": 0, "operation": None}
+        return counters
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.trace.clear()
+            self.slow.clear()
+
+    def record(self, key, elapsed_ms, slow_ms, entry):
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.add(elapsed_ms)
+            if elapsed_ms < slow_ms:
+                return
+            entry = {"time": datetime.now().isoformat(timespec="milliseconds"),
+                     "thread": threading.current_thread().name, **entry}
+            self.slow.append(entry)
+            if not self.slow_log_path:
+                return
+            try:
+                with open(self.slow_log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+            except OSError:
+                # A read-only install directory must not break database work
+                self.slow_log_path = None
+
+    def record_statement(self, sql, parameters, elapsed_ms, rows, vm_steps, error=None):
+        counters = self.thread_counters()
+        counters["sql_ms"] += elapsed_ms
+        counters["statements"] += 1
+        self.record("SQL " + statement_kind(sql), elapsed_ms, SLOW_STATEMENT_MS, {
+            "kind": "statement",
+            "operation": counters["operation"],
+            "sql": sql if len(sql) <= 2000 else sql[:2000] + "...",
+            "params": parameters,
+            "rows": rows,
+            "duration_ms": round(elapsed_ms, 3),
+            "vm_steps": vm_steps,
+            "error": error,
+        })
+
+    def add_trace(self, sql):
+        if self.trace_enabled:
+            self.trace.append((time.time(), threading.current_thread().name, sql))
+
+    def operation(self, name, **details):
+        return Operation(self, name, details)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                key: {
+                    "count": h.count, "total_ms": h.total_ms, "mean_ms": h.total_ms / h.count if h.count else 0,
+                    "p50_ms": h.percentile(0.5), "p95_ms": h.percentile(0.95), "p99_ms": h.percentile(0.99),
+                    "max_ms": h.max_ms,
+                }
+                for key, h in self.histograms.items()
+            }
+
+
+DIAGNOSTICS = Diagnostics()
+
+
+def start_operation(name, **details):
+    return DIAGNOSTICS.operation(name, **details)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    # Times each statement from execute() until its rows are fetched or the cursor moves on.
+    # Rows read by iterating the cursor directly are not counted.
+    pending = None
+
+    def execute(self, sql, parameters=()):
+        self.finish_statement()
+        steps = self.connection.vm_steps
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        except Exception as e:
+            DIAGNOSTICS.record_statement(sql, params_shape(parameters), (time.perf_counter() - start) * 1000,
+                                         None, self.connection.vm_steps - steps, str(e))
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if self.description is None:
+            DIAGNOSTICS.record_statement(sql, params_shape(parameters), elapsed_ms, self.rowcount,
+                                         self.connection.vm_steps - steps)
+        else:
+            self.pending = [sql, params_shape(parameters), elapsed_ms, 0, steps]
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self.finish_statement()
+        batch = [0]
+
+        def counted(seq):
+            for parameters in seq:
+                batch[0] += 1
+                yield parameters
+
+        steps = self.connection.vm_steps
+        start = time.perf_counter()
+        error = None
+        try:
+            super().executemany(sql, counted(seq_of_parameters))
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            DIAGNOSTICS.record_statement(sql, {"batch": batch[0]}, (time.perf_counter() - start) * 1000,
+                                         None if error else self.rowcount, self.connection.vm_steps - steps, error)
+        return self
+
+    def executescript(self, sql_script):
+        self.finish_statement()
+        steps = self.connection.vm_steps
+        start = time.perf_counter()
+        try:
+            super().executescript(sql_script)
+        finally:
+            DIAGNOSTICS.record_statement(sql_script, None, (time.perf_counter() - start) * 1000, None,
+                                         self.connection.vm_steps - steps)
+        return self
+
+    def timed_fetch(self, fetch, *args):
+        if self.pending is None:
+            return fetch(*args)
+        start = time.perf_counter()
+        result = fetch(*args)
+        self.pending[2] += (time.perf_counter() - start) * 1000
+        return result
+
+    def fetchone(self):
+        row = self.timed_fetch(super().fetchone)
+        if self.pending is not None:
+            if row is None:
+                self.finish_statement()
+            else:
+                self.pending[3] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self.timed_fetch(super().fetchmany, size)
+        if self.pending is not None:
+            self.pending[3] += len(rows)
+            if len(rows) < size:
+                self.finish_statement()
+        return rows
+
+    def fetchall(self):
+        rows = self.timed_fetch(super().fetchall)
+        if self.pending is not None:
+            self.pending[3] += len(rows)
+            self.finish_statement()
+        return rows
+
+    def finish_statement(self):
+        if self.pending is None:
+            return
+        sql, shape, elapsed_ms, rows, steps = self.pending
+        self.pending = None
+        try:
+            steps = self.connection.vm_steps - steps
+        except sqlite3.ProgrammingError:
+            steps = None
+        DIAGNOSTICS.record_statement(sql, shape, elapsed_ms, rows, steps)
+
+    def close(self):
+        self.finish_statement()
+        super().close()
+
+    def __del__(self):
+        try:
+            self.finish_statement()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    # Connection factory that times every statement, traces the SQL it runs and
+    # counts virtual machine steps with a progress handler
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.vm_steps = 0
+        self.user_progress = None
+        self.progress_calls = 0
+        super().set_progress_handler(self.on_progress, PROGRESS_STEPS)
+        self.set_trace_callback(DIAGNOSTICS.add_trace)
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The built-in shortcuts create plain cursors, so route them through cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def on_progress(self):
+        self.vm_steps += PROGRESS_STEPS
+        if self.user_progress:
+            handler, every = self.user_progress
+            self.progress_calls += 1
+            if self.progress_calls >= every:
+                self.progress_calls = 0
+                return handler()
+        return 0
+
+    def set_progress_handler(self, progress_handler, n):
+        # Chains a caller's handler (used for cancel buttons) behind the step counter
+        if progress_handler is None:
+            self.user_progress = None
+        else:
+            self.user_progress = (progress_handler, max(1, n // PROGRESS_STEPS))
+            self.progress_calls = 0
+
+
+def show_diagnostics(parent):
+    # Imported here so headless scripts can use the instrumentation without Qt
+    from PyQt6.QtWidgets import (
+        QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPlainTextEdit,
+        QPushButton, QCheckBox, QTabWidget
+    )
+    from PyQt6.QtCore import Qt
+
+    dialog = QDialog(parent)
+    dialog.setWindowTitle("Diagnostics")
+    dialog.resize(900, 550)
+    layout = QVBoxLayout(dialog)
+    log_label = QLabel()
+    layout.addWidget(log_label)
+
+    tabs = QTabWidget()
+    latency_table = QTableWidget(0, 8)
+    latency_table.setHorizontalHeaderLabels(["Name", "Count", "Total ms", "Mean ms", "p50 ms", "p95 ms", "p99 ms", "Max ms"])
+    latency_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+    tabs.addTab(latency_table, "Latency")
+    slow_text = QPlainTextEdit()
+    slow_text.setReadOnly(True)
+    tabs.addTab(slow_text, "Slow Operations")
+    trace_text = QPlainTextEdit()
+    trace_text.setReadOnly(True)
+    tabs.addTab(trace_text, "Statement Trace")
+    layout.addWidget(tabs)
+
+    def refresh():
+        log_label.setText(
+            f"Slow log ({SLOW_STATEMENT_MS} ms statements, {SLOW_OPERATION_MS} ms operations): "
+            f"{DIAGNOSTICS.slow_log_path or 'disabled'}  (percentiles are histogram bucket bounds)")
+        stats = DIAGNOSTICS.snapshot()
+        latency_table.setRowCount(len(stats))
+        # Operations first, then statements, each slowest total first
+        ordered = sorted(stats.items(), key=lambda item: (not item[0].startswith("Operation"), -item[1]["total_ms"]))
+        for row_idx, (name, values) in enumerate(ordered):
+            latency_table.setItem(row_idx, 0, QTableWidgetItem(name))
+            for col_idx, key in enumerate(("count", "total_ms", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"), 1):
+                value = values[key]
+                item = QTableWidgetItem(f"{value:,}" if key == "count" else f"{value:,.2f}")
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                latency_table.setItem(row_idx, col_idx, item)
+        latency_table.resizeColumnsToContents()
+        with DIAGNOSTICS.lock:
+            slow = list(DIAGNOSTICS.slow)
+            trace = list(DIAGNOSTICS.trace)
+        slow_text.setPlainText("\n".join(json.dumps(entry, default=str) for entry in reversed(slow)))
+        trace_text.setPlainText("\n".join(
+            f"{time.strftime('%H:%M:%S', time.localtime(ts))}  [{thread}]  {' '.join(sql.split())}"
+            for ts, thread, sql in reversed(trace)))
+
+    def reset():
+        DIAGNOSTICS.reset()
+        refresh()
+
+    button_layout = QHBoxLayout()
+    trace_check = QCheckBox("Trace statements")
+    trace_check.setChecked(DIAGNOSTICS.trace_enabled)
+    trace_check.toggled.connect(lambda checked: setattr(DIAGNOSTICS, "trace_enabled", checked))
+    button_layout.addWidget(trace_check)
+    button_layout.addStretch()
+    for caption, handler in (("Refresh", refresh), ("Reset", reset), ("Close", dialog.accept)):
+        button = QPushButton(caption)
+        button.clicked.connect(handler)
+        button_layout.addWidget(button)
+    layout.addLayout(button_layout)
+
+    refresh()
+    dialog.exec()
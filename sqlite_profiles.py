@@ -0,0 +1,117 @@
+import sqlite3
+from pathlib import Path
+import sqlite_diagnostics
+
+# Named PRAGMA profiles applied to every connection the editors open.
+# page_size only takes effect on a database that has no tables yet.
+CONNECTION_PROFILES = {
+    "Safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16384,  # negative values are KiB, so 16 MB
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+        "page_size": 4096,
+    },
+    "Fast interactive": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "page_size": 4096,
+    },
+    "Bulk": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -262144,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+        "page_size": 8192,
+    },
+}
+
+DEFAULT_PROFILE = "Fast interactive"
+
+PROFILE_DESCRIPTIONS = {
+    "Safe": "WAL with full fsync on every commit; survives power loss",
+    "Fast interactive": "WAL with NORMAL sync, 64 MB cache and memory-mapped reads",
+    "Bulk": "No fsync and a large cache for imports and rebuilds; a power cut can corrupt the file",
+}
+
+# Read-only and immutable opens never write, so they can map much more of the file
+READ_ONLY_MMAP_SIZE = 1073741824
+
+SYNCHRONOUS_NAMES = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}
+TEMP_STORE_NAMES = {0: "DEFAULT", 1: "FILE", 2: "MEMORY"}
+
+
+def apply_profile(conn, profile_name, new_database=False):
+    settings = CONNECTION_PROFILES[profile_name]
+    # busy_timeout first so the journal_mode switch can wait for other connections
+    conn.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+    if new_database or conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+        # Must run before the first table is created and before switching to WAL
+        conn.execute(f"PRAGMA page_size = {int(settings['page_size'])}")
+    conn.execute(f"PRAGMA journal_mode = {settings['journal_mode']}").fetchall()
+    conn.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}").fetchall()
+    conn.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+
+
+def connect(db_path, profile_name=DEFAULT_PROFILE, new_database=False, **kwargs):
+    # Every connection is instrumented so the diagnostics panel sees all statements
+    kwargs.setdefault("factory", sqlite_diagnostics.InstrumentedConnection)
+    conn = sqlite3.connect(db_path, **kwargs)
+    try:
+        apply_profile(conn, profile_name, new_database)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+def apply_read_only_profile(conn, profile_name, mmap_size=None):
+    # Journal, sync and page size settings do not apply to a connection that cannot write
+    settings = CONNECTION_PROFILES[profile_name]
+    conn.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+    conn.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'] if mmap_size is None else mmap_size)}").fetchall()
+    conn.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+    conn.execute("PRAGMA query_only = ON")
+
+
+def connect_read_only(db_path, profile_name=DEFAULT_PROFILE, immutable=False, mmap_size=None, **kwargs):
+    # immutable=1 also skips locking and change detection; SQLite then ignores any -wal
+    # file, so changes that have not been checkpointed are not visible
+    kwargs.setdefault("factory", sqlite_diagnostics.InstrumentedConnection)
+    uri = Path(db_path).resolve().as_uri() + ("?mode=ro&immutable=1" if immutable else "?mode=ro")
+    conn = sqlite3.connect(uri, uri=True, **kwargs)
+    try:
+        apply_read_only_profile(conn, profile_name, mmap_size)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+def describe_connection(conn):
+    values = {}
+    for pragma in ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout", "page_size"):
+        row = conn.execute(f"PRAGMA {pragma}").fetchone()
+        values[pragma] = row[0] if row else None
+    cache_size = values["cache_size"] or 0
+    cache_text = f"{-cache_size // 1024} MB" if cache_size < 0 else f"{cache_size} pages"
+    return (
+        f"journal={str(values['journal_mode']).upper()}  "
+        f"sync={SYNCHRONOUS_NAMES.get(values['synchronous'], values['synchronous'])}  "
+        f"cache={cache_text}  "
+        f"mmap={(values['mmap_size'] or 0) // 1048576} MB  "
+        f"temp={TEMP_STORE_NAMES.get(values['temp_store'], values['temp_store'])}  "
+        f"busy={values['busy_timeout']} ms  "
+        f"page={values['page_size']} B"
+    )